@@ -0,0 +1,84 @@
+"""
+V3 pandas / Polars 后端对比基准
+用途：在合成数据上比较两个后端从读取CSV到得到导出表（读取 → 合并 → 归一化 → 分级 → 选择列）的耗时，
+     并逐值核对两者的导出表完全一致
+
+用法：
+    python benchmarks/bench_backends.py                    # 1k 和 100k 行
+    python benchmarks/bench_backends.py --sizes 10M --repeat 1
+
+Polars 在 Rust 中分配内存，tracemalloc 看不到，这里只比较耗时（每个后端取 --repeat 次中的最小值）。
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+import pandas as pd  # noqa: E402
+
+from bench_pipeline import BENCH_DATA_DIR, SIZES  # noqa: E402
+from data_cleaning_v3 import DataCleanerV3  # noqa: E402
+from synthetic_data import ensure_generated  # noqa: E402
+
+BACKENDS = ['pandas', 'polars']
+
+
+def build_export(backend):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataCleanerV3(use_cache=False, backend=backend).build_export_frame()
+
+
+def time_backend(backend, repeat):
+    """返回 (最短耗时, 导出表)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = build_export(backend)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['1k', '100k'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    mismatches = 0
+    print(f"  {'size':<8}{'backend':<10}{'export frame':>16}{'speedup':>10}")
+    for size in args.sizes:
+        data_root = BENCH_DATA_DIR / size
+        ensure_generated(data_root, SIZES[size])
+        # 管道使用相对路径 ./data
+        os.chdir(data_root)
+        try:
+            results = {backend: time_backend(backend, args.repeat) for backend in BACKENDS}
+        finally:
+            os.chdir(cwd)
+
+        base_seconds, base_frame = results['pandas']
+        for backend, (seconds, frame) in results.items():
+            print(f"  {size:<8}{backend:<10}{seconds * 1000:>13.1f} ms{base_seconds / seconds:>9.2f}x")
+            try:
+                pd.testing.assert_frame_equal(frame, base_frame)
+            except AssertionError as exc:
+                mismatches += 1
+                print(f"⚠ {backend} output differs from pandas at {size}: {exc}")
+
+    if mismatches:
+        sys.exit(1)
+    print("✓ Polars output identical to pandas")
+
+
+if __name__ == '__main__':
+    main()
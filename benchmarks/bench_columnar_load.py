@@ -0,0 +1,119 @@
+"""
+列式产物加载基准
+用途：比较 countries.json 与 Parquet / Arrow IPC 产物的加载耗时和常驻内存（RSS）增长
+
+用法：
+    python benchmarks/bench_columnar_load.py                 # 使用当前 countries.json
+    python benchmarks/bench_columnar_load.py --rows 1000000  # 把数据平铺到 100 万行再比较
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+import pandas as pd  # noqa: E402
+
+from columnar_export import read_columnar, write_columnar  # noqa: E402
+from json_export import write_json  # noqa: E402
+
+LEVEL_COLUMNS = ['education_level', 'economic_opportunity_level', 'safety_level',
+                 'healthcare_level', 'cost_level', 'climate_preference']
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 每种加载方式：名称 → (产物后缀, 加载函数)
+LOADERS = {
+    'json (json.load)': ('.json', load_json),
+    'json → pandas': ('.json', lambda path: pd.DataFrame(load_json(path))),
+    'parquet → arrow': ('.parquet', lambda path: read_columnar(path)),
+    'parquet → pandas': ('.parquet', lambda path: read_columnar(path).to_pandas()),
+    'arrow ipc (mmap)': ('.arrow', lambda path: read_columnar(path, memory_map=True)),
+    'arrow ipc → pandas': ('.arrow', lambda path: read_columnar(path, memory_map=True).to_pandas()),
+}
+
+
+def rss_mb():
+    """当前进程 RSS（MB）；没有 /proc 的平台退化为峰值 RSS"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def build_artifacts(countries_file, rows, workdir):
+    """读取 countries.json，按需平铺到 rows 行，写出 JSON / Parquet / Arrow 三种产物"""
+    df = pd.DataFrame(load_json(countries_file))
+    for col in LEVEL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    if rows and rows != len(df):
+        repeats = -(-rows // len(df))
+        df = pd.concat([df] * repeats, ignore_index=True).iloc[:rows]
+
+    base = Path(workdir) / 'countries.json'
+    write_json(df, base)
+    write_columnar(df, base)
+    return base, len(df)
+
+
+def run_child(loader, path, repeat):
+    """在独立进程中运行一种加载方式，保证 RSS 互不干扰；RSS 为持有加载结果时的增量"""
+    load = LOADERS[loader][1]
+    rss_before = rss_mb()
+    timings = []
+    result = None
+    for _ in range(repeat):
+        result = None
+        start = time.perf_counter()
+        result = load(path)
+        timings.append(time.perf_counter() - start)
+    rss_after = rss_mb()
+    timings.sort()
+    print(json.dumps({'seconds': timings[len(timings) // 2], 'rss_mb': rss_after - rss_before}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--countries', default=str(ROOT / 'countries.json'))
+    parser.add_argument('--rows', type=int, default=0, help='平铺到的行数（默认使用原始行数）')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--child', nargs=2, metavar=('LOADER', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        base, n_rows = build_artifacts(args.countries, args.rows, workdir)
+        print(f"Rows: {n_rows}")
+        print(f"{'loader':<22}{'size (KB)':>12}{'median (ms)':>14}{'RSS +MB':>10}")
+        for loader, (suffix, _) in LOADERS.items():
+            path = base.with_suffix(suffix)
+            output = subprocess.run(
+                [sys.executable, __file__, '--repeat', str(args.repeat), '--child', loader, str(path)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{loader:<22}{path.stat().st_size / 1024:>12.1f}"
+                  f"{result['seconds'] * 1000:>14.2f}{result['rss_mb']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
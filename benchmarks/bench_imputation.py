@@ -0,0 +1,75 @@
+"""
+近邻插补基准
+用途：在合成数据上测量 V3 合并表一次完整插补（所有指标列）的耗时，并统计填补的单元格数
+
+用法：
+    python benchmarks/bench_imputation.py                  # 1k 和 100k 行，精确近邻
+    python benchmarks/bench_imputation.py --eps 0 0.5 1    # 同时比较近似近邻
+
+合成数据的指标彼此独立、均匀分布，是 KD 树最不利的情况；真实指标相关性强，查询更快。
+没有安装 scipy 时使用暴力距离计算，明显更慢。
+单核参考值（100k 行）：精确 1.3–1.5 s、eps=1 0.8–0.95 s（scipy），精确约 4.5 s（无 scipy）
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_pipeline import BENCH_DATA_DIR, SIZES  # noqa: E402
+from data_cleaning_v3 import CONFIG, DataCleanerV3  # noqa: E402
+from knn_imputation import DEFAULT_NEIGHBORS, cKDTree, impute_frame  # noqa: E402
+from synthetic_data import ensure_generated  # noqa: E402
+
+
+def load_frame(data_root):
+    cwd = os.getcwd()
+    # 管道使用相对路径 ./data
+    os.chdir(data_root)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return DataCleanerV3(use_cache=False).load_all_data()
+    finally:
+        os.chdir(cwd)
+
+
+def time_impute(frame, k, eps, repeat):
+    """返回 (最短耗时, 填补的单元格数)"""
+    best, flags = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, flags = impute_frame(frame, list(CONFIG.normalize), k, eps)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, int(flags.to_numpy().sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['1k', '100k'])
+    parser.add_argument('--neighbors', type=int, default=DEFAULT_NEIGHBORS)
+    parser.add_argument('--eps', type=float, nargs='+', default=[0.0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if cKDTree is None:
+        print("⚠ scipy not installed, timing the brute-force neighbour search")
+    print(f"  {'size':<8}{'eps':>6}{'imputed cells':>16}{'time':>12}")
+    for size in args.sizes:
+        data_root = BENCH_DATA_DIR / size
+        ensure_generated(data_root, SIZES[size])
+        frame = load_frame(data_root)
+        for eps in args.eps:
+            seconds, cells = time_impute(frame, args.neighbors, eps, args.repeat)
+            print(f"  {size:<8}{eps:>6g}{cells:>16}{seconds * 1000:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
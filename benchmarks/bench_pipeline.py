@@ -0,0 +1,185 @@
+"""
+管道各阶段基准测试
+用途：在合成数据上测量 V1/V2/V3 管道每个阶段以及 convert_data.py 的耗时和峰值内存，
+     并与保存的基线比较，找出变慢的阶段
+
+用法：
+    python benchmarks/bench_pipeline.py                          # 1k 行，与 benchmarks/baseline.json 比较
+    python benchmarks/bench_pipeline.py --sizes 1k 100k 10M      # 多个规模（10M 需要数 GB 磁盘和内存）
+    python benchmarks/bench_pipeline.py --pipelines v3 --sizes 100k
+    python benchmarks/bench_pipeline.py --save-baseline           # 用本次结果覆盖基线
+
+计时和内存分两遍测量：第一遍只计时，第二遍打开 tracemalloc 记录每个阶段的峰值内存增量，
+避免 tracemalloc 的开销影响耗时。合成数据缓存在 .cache/bench-data/ 下。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import runpy
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from synthetic_data import ensure_generated  # noqa: E402
+
+BASELINE_FILE = ROOT / 'benchmarks' / 'baseline.json'
+BENCH_DATA_DIR = ROOT / '.cache' / 'bench-data'
+
+SIZES = {'1k': 1_000, '100k': 100_000, '10M': 10_000_000}
+
+# 各管道的阶段：(模块, 类, 构造参数, 阶段方法列表)
+PIPELINES = {
+    'v1': ('data_cleaning', 'DataCleaner', {'data_dir': Path('data/dataset_exercise'), 'use_cache': False},
+           ['load_data', 'merge_all_data', 'create_composite_score']),
+    'v2': ('data_cleaning_v2', 'DataCleanerV2', {'use_cache': False},
+           ['load_all_data', 'normalize_indices', 'create_preference_levels', 'save_to_json']),
+    'v3': ('data_cleaning_v3', 'DataCleanerV3', {'use_cache': False},
+           ['load_all_data', 'normalize_indices', 'create_preference_levels', 'save_to_json']),
+    'convert_data': None,
+}
+
+# 超过基线这么多倍视为变慢（耗时过短的阶段波动大，低于 MIN_SECONDS 的不比较）
+DEFAULT_THRESHOLD = 1.25
+MIN_SECONDS = 0.05
+
+
+def run_stages(pipeline, measure_memory):
+    """按顺序运行一个管道的所有阶段，返回 {阶段: 耗时或峰值内存}"""
+    results = {}
+    if measure_memory:
+        tracemalloc.start()
+
+    def measure(stage, func):
+        if measure_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        elapsed = time.perf_counter() - start
+        if measure_memory:
+            results[stage] = (tracemalloc.get_traced_memory()[1] - before) / (1024 * 1024)
+        else:
+            results[stage] = elapsed
+
+    if PIPELINES[pipeline] is None:
+        measure('convert_data', lambda: runpy.run_path(str(ROOT / 'convert_data.py'), run_name='__main__'))
+    else:
+        module_name, class_name, kwargs, stages = PIPELINES[pipeline]
+        module = __import__(module_name)
+        cleaner = getattr(module, class_name)(**kwargs)
+        for stage in stages:
+            measure(stage, getattr(cleaner, stage))
+
+    if measure_memory:
+        tracemalloc.stop()
+    return results
+
+
+def run_child(pipeline, data_root, measure_memory):
+    """子进程：切换到合成数据目录（管道使用相对路径 ./data），计时和内存各跑一遍"""
+    os.chdir(data_root)
+    timings = run_stages(pipeline, measure_memory=False)
+    memory = run_stages(pipeline, measure_memory=True) if measure_memory else {}
+    print(json.dumps({stage: {'seconds': seconds, 'peak_mb': memory.get(stage)}
+                      for stage, seconds in timings.items()}))
+
+
+def run_benchmarks(sizes, pipelines, measure_memory=True, regenerate=False):
+    results = {}
+    for size in sizes:
+        data_root = BENCH_DATA_DIR / size
+        if regenerate and (data_root / '.complete').exists():
+            (data_root / '.complete').unlink()
+        print(f"Preparing {size} synthetic rows...", flush=True)
+        ensure_generated(data_root, SIZES[size])
+
+        results[size] = {}
+        for pipeline in pipelines:
+            command = [sys.executable, __file__, '--child', pipeline, str(data_root)]
+            if not measure_memory:
+                command.append('--no-memory')
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            results[size][pipeline] = json.loads(output.strip().splitlines()[-1])
+            print_results(size, pipeline, results[size][pipeline])
+    return results
+
+
+def print_results(size, pipeline, stages, baseline=None, threshold=DEFAULT_THRESHOLD):
+    """打印一个管道的各阶段结果；有基线时附上耗时倍数并标出变慢的阶段，返回变慢的阶段数"""
+    regressions = 0
+    for stage, result in stages.items():
+        line = f"  {size:<6}{pipeline:<14}{stage:<26}{result['seconds'] * 1000:>12.1f} ms"
+        if result.get('peak_mb') is not None:
+            line += f"{result['peak_mb']:>10.1f} MB"
+        base = (baseline or {}).get(size, {}).get(pipeline, {}).get(stage)
+        if base:
+            ratio = result['seconds'] / base['seconds']
+            line += f"{ratio:>8.2f}x"
+            if ratio > threshold and base['seconds'] >= MIN_SECONDS:
+                line += "  ⚠ slower than baseline"
+                regressions += 1
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['1k'])
+    parser.add_argument('--pipelines', nargs='+', choices=list(PIPELINES), default=list(PIPELINES))
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果写入基线文件（与已有规模合并）')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--output', type=Path, help='把本次结果写成 JSON')
+    parser.add_argument('--no-memory', action='store_true', help='只计时，不测量峰值内存')
+    parser.add_argument('--regenerate', action='store_true', help='重新生成合成数据')
+    parser.add_argument('--child', nargs=2, metavar=('PIPELINE', 'DATA_ROOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], measure_memory=not args.no_memory)
+        return
+
+    results = run_benchmarks(args.sizes, args.pipelines, not args.no_memory, args.regenerate)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        for size, pipelines in results.items():
+            baseline.setdefault(size, {}).update(pipelines)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"✓ Baseline saved to {args.baseline}")
+        return
+
+    if args.baseline.exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nComparison with {args.baseline} (time ratio, > {args.threshold:.2f}x flagged):")
+        regressions = sum(
+            print_results(size, pipeline, stages, baseline, args.threshold)
+            for size, pipelines in results.items() for pipeline, stages in pipelines.items()
+        )
+        if regressions:
+            print(f"⚠ {regressions} stage(s) slower than baseline")
+            sys.exit(1)
+        print("✓ No stage slower than baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+推荐服务压测
+用途：用多个 keep-alive 连接并发请求 scripts/recommend_server.py，报告吞吐（请求/秒）、
+     p50/p90/p99 延迟和平均响应大小
+
+请求混合：随机问卷答案的 /recommend（含未作答的题）、随机国家的 /country/{code}、
+随机字段的 /rank；随机种子固定，每次压测的请求序列相同。
+
+用法：
+    python benchmarks/bench_recommend_server.py                       # 在子进程中启动服务再压测
+    python benchmarks/bench_recommend_server.py --url http://127.0.0.1:8000 --concurrency 64 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+from recommender import DIMENSIONS, QUIZ_OPTIONS  # noqa: E402
+
+# 请求混合中各接口的比例
+MIX = [('recommend', 0.8), ('country', 0.1), ('rank', 0.1)]
+
+
+def request_targets(countries_file, n, seed=0):
+    """生成 n 个请求路径"""
+    with open(countries_file, 'r', encoding='utf-8') as f:
+        countries = json.load(f)
+    codes = [c['country_code'] for c in countries if c.get('country_code')]
+    fields = sorted({key for c in countries for key, value in c.items()
+                     if isinstance(value, (int, float)) and not isinstance(value, bool)})
+
+    rng = random.Random(seed)
+    kinds, weights = zip(*MIX)
+    targets = []
+    for kind in rng.choices(kinds, weights, k=n):
+        if kind == 'recommend':
+            # 每道题 1/6 的概率未作答
+            query = {f'q{question}': rng.choice(QUIZ_OPTIONS[question])
+                     for _, question, _, _ in DIMENSIONS if rng.random() > 1 / 6}
+            targets.append(f"/recommend?{urlencode({**query, 'k': 10})}")
+        elif kind == 'country':
+            targets.append(f'/country/{rng.choice(codes)}')
+        else:
+            query = {'field': rng.choice(fields), 'k': 10, 'order': rng.choice(['asc', 'desc'])}
+            targets.append(f'/rank?{urlencode(query)}')
+    return targets
+
+
+async def _worker(host, port, targets, deadline, latencies, sizes, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            if time.perf_counter() > deadline:
+                break
+            start = time.perf_counter()
+            writer.write(f'GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode('latin-1'))
+            head = await reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            length = next(int(line.split(':', 1)[1]) for line in lines if line.lower().startswith('content-length:'))
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            sizes.append(len(head) + length)
+            status = lines[0].split(' ')[1]
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, targets, concurrency, duration):
+    """concurrency 个连接轮流取请求，直到请求用完或超过 duration 秒"""
+    latencies, sizes, statuses = [], [], {}
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker(host, port, targets[i::concurrency], deadline, latencies, sizes, statuses)
+                           for i in range(concurrency)))
+    return time.perf_counter() - start, np.array(latencies), np.array(sizes), statuses
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(countries_file):
+    """在子进程中启动服务，等待端口可连接"""
+    port = _free_port()
+    process = subprocess.Popen([sys.executable, str(ROOT / 'scripts' / 'recommend_server.py'),
+                                '--countries-file', str(countries_file), '--port', str(port)],
+                               stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return process, port
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("Recommendation server exited during startup")
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Recommendation server did not start within 10s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='已在运行的服务地址；不给出时在子进程中启动')
+    parser.add_argument('--countries-file', type=Path, default=Path('countries.json'))
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=50_000)
+    parser.add_argument('--duration', type=float, default=10.0, help='最长压测时间（秒）')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    targets = request_targets(args.countries_file, args.requests, args.seed)
+    process = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        process, port = start_server(args.countries_file)
+        host = '127.0.0.1'
+
+    try:
+        elapsed, latencies, sizes, statuses = asyncio.run(
+            run_load(host, port, targets, args.concurrency, args.duration))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+    print(f"✓ {len(latencies)} requests over {args.concurrency} connections in {elapsed:.2f}s: "
+          f"{len(latencies) / elapsed:.0f} req/s")
+    print(f"  latency p50 {p50:.2f} ms, p90 {p90:.2f} ms, p99 {p99:.2f} ms, max {latencies.max() * 1000:.2f} ms")
+    print(f"  mean response {sizes.mean() / 1024:.1f} KB "
+          f"(countries.json {args.countries_file.stat().st_size / 1024:.0f} KB)")
+    print(f"  status codes: {dict(sorted(statuses.items()))}")
+
+
+if __name__ == '__main__':
+    main()
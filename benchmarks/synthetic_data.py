@@ -0,0 +1,185 @@
+"""
+合成数据生成器
+用途：按真实数据的结构（列顺序、分数范围、N/A 比例）生成任意行数的输入文件，供基准测试使用
+
+生成的目录结构与仓库一致：
+    <root>/data/1-economic-opportunity.csv ... 10-tax-index.csv
+    <root>/data/dataset_exercise/{country_name,cost_of_living,quality_of_living,cleaned_countries_data}.csv
+    <root>/data/dataset_exercise/gdp/Metadata_Country_*.csv
+
+用法：
+    python benchmarks/synthetic_data.py /tmp/bench-100k --rows 100000
+"""
+
+import argparse
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+from data_cleaning_v3 import SOURCES  # noqa: E402
+from source_loader import COUNTRY_METADATA_FILE  # noqa: E402
+
+# 生成器结构变化时递增，已生成的数据会被重新生成
+GENERATOR_VERSION = 1
+
+# 真实文件不可用时使用的默认结构
+DEFAULT_COLUMNS = ['Country Code', 'Country Name', 'Score']
+DEFAULT_SCORE_RANGE = (0.0, 100.0)
+DEFAULT_MISSING_RATE = 0.25
+
+# V1 输入文件覆盖的国家比例（与仓库数据接近）
+COST_COVERAGE = 0.8
+QUALITY_COVERAGE = 0.45
+
+COST_COLUMNS = ['Rank', 'Country', 'Cost of Living Index', 'Rent Index', 'Cost of Living Plus Rent Index',
+                'Groceries Index', 'Restaurant Price Index', 'Local Purchasing Power Index']
+QUALITY_COLUMNS = ['Rank', 'Country', 'Quality of Life Index', 'Purchasing Power Index', 'Safety Index',
+                   'Health Care Index', 'Cost of Living Index', 'Property Price to Income Ratio',
+                   'Traffic Commute Time Index', 'Pollution Index', 'Climate Index']
+
+
+def country_codes(rows):
+    """rows 个不重复的大写字母代码：不超过 26^3 时与 ISO3 一样为 3 位，否则加长"""
+    width = max(3, math.ceil(math.log(max(rows, 2), 26)))
+    index = np.arange(rows, dtype=np.int64)
+    letters = np.empty((rows, width), dtype=np.uint8)
+    for position in range(width):
+        letters[:, width - 1 - position] = index // 26 ** position % 26 + ord('A')
+    return letters.view(f'S{width}').ravel().astype(str)
+
+
+def source_profile(path):
+    """真实数据源的列顺序、分数范围和缺失比例"""
+    if not path.exists():
+        return DEFAULT_COLUMNS, DEFAULT_SCORE_RANGE, DEFAULT_MISSING_RATE
+    df = pd.read_csv(path)
+    scores = pd.to_numeric(df['Score'], errors='coerce')
+    if scores.notna().any():
+        score_range = (float(scores.min()), float(scores.max()))
+    else:
+        score_range = DEFAULT_SCORE_RANGE
+    return list(df.columns), score_range, float(scores.isna().mean())
+
+
+def uniform_scores(rng, rows, low, high, missing_rate=0.0):
+    scores = np.round(rng.uniform(low, high, rows), 2)
+    if missing_rate:
+        scores[rng.random(rows) < missing_rate] = np.nan
+    return scores
+
+
+def write_indicator_sources(data_dir, codes, names, rng):
+    """data/N-*.csv：与真实文件相同的列顺序，缺失值写为 N/A"""
+    for filename, score_column, _ in SOURCES:
+        columns, (low, high), missing_rate = source_profile(ROOT / 'data' / filename)
+        df = pd.DataFrame({
+            'Country Code': codes,
+            'Country Name': names,
+            score_column: uniform_scores(rng, len(codes), low, high, missing_rate),
+        })
+        df[columns].to_csv(data_dir / filename, index=False, na_rep='N/A')
+
+
+def write_metadata(data_dir, codes, names):
+    path = data_dir / COUNTRY_METADATA_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({
+        'Country Code': codes,
+        'Region': 'Synthetic',
+        'IncomeGroup': 'High income',
+        'SpecialNotes': '',
+        'TableName': names,
+    }).to_csv(path, index=False, encoding='utf-8-sig')
+
+
+def write_v1_inputs(exercise_dir, names, rng):
+    """V1 的三个输入文件：国家列表、生活成本、生活质量"""
+    rows = len(names)
+    pd.DataFrame({'country_name': names}).to_csv(exercise_dir / 'country_name.csv', index=False)
+
+    cost_names = names[rng.random(rows) < COST_COVERAGE]
+    cost = pd.DataFrame({'Rank': np.arange(1, len(cost_names) + 1), 'Country': cost_names})
+    for col in COST_COLUMNS[2:]:
+        cost[col] = uniform_scores(rng, len(cost_names), 10, 150)
+    cost.to_csv(exercise_dir / 'cost_of_living.csv', index=False)
+
+    quality_names = names[rng.random(rows) < QUALITY_COVERAGE]
+    quality = pd.DataFrame({'Rank': np.arange(1, len(quality_names) + 1), 'Country': quality_names})
+    for col in QUALITY_COLUMNS[2:]:
+        quality[col] = uniform_scores(rng, len(quality_names), 10, 220)
+    quality.to_csv(exercise_dir / 'quality_of_living.csv', index=False)
+
+
+def write_cleaned_data(exercise_dir, names, rng):
+    """V1 输出 cleaned_countries_data.csv（V2 和 convert_data.py 的输入）"""
+    cost_names = names[rng.random(len(names)) < COST_COVERAGE]
+    rows = len(cost_names)
+    has_quality = rng.random(rows) < QUALITY_COVERAGE / COST_COVERAGE
+
+    def quality_column(low, high):
+        return np.where(has_quality, uniform_scores(rng, rows, low, high), np.nan)
+
+    df = pd.DataFrame({
+        'country_name': cost_names,
+        'cost_of_living_index': uniform_scores(rng, rows, 15, 130),
+        'cost_level': rng.integers(1, 11, rows),
+        'rent_index': uniform_scores(rng, rows, 2, 100),
+        'groceries_index': uniform_scores(rng, rows, 15, 130),
+        'restaurant_index': uniform_scores(rng, rows, 10, 130),
+        'purchasing_power_index': uniform_scores(rng, rows, 10, 200),
+        'quality_of_life_index': quality_column(60, 220),
+        'quality_level': np.where(has_quality, rng.integers(1, 11, rows), np.nan),
+        'safety_index': quality_column(20, 90),
+        'healthcare_index': quality_column(30, 85),
+        'pollution_index': quality_column(10, 95),
+        'climate_index': quality_column(20, 100),
+        'composite_score': quality_column(2, 7),
+    })
+    df.to_csv(exercise_dir / 'cleaned_countries_data.csv', index=False)
+
+
+def generate(root, rows, seed=0):
+    """在 root 下生成 rows 个国家的全部输入文件，返回 root"""
+    root = Path(root)
+    data_dir = root / 'data'
+    exercise_dir = data_dir / 'dataset_exercise'
+    exercise_dir.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    codes = country_codes(rows)
+    names = ('Country ' + pd.Series(codes)).to_numpy(dtype=object)
+
+    write_indicator_sources(data_dir, codes, names, rng)
+    write_metadata(data_dir, codes, names)
+    write_v1_inputs(exercise_dir, names, rng)
+    write_cleaned_data(exercise_dir, names, rng)
+    (root / '.complete').write_text(f'{GENERATOR_VERSION} {rows} {seed}\n')
+    return root
+
+
+def ensure_generated(root, rows, seed=0):
+    """root 下已有相同参数生成的完整数据时直接复用"""
+    marker = Path(root) / '.complete'
+    if marker.exists() and marker.read_text() == f'{GENERATOR_VERSION} {rows} {seed}\n':
+        return Path(root)
+    return generate(root, rows, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root', type=Path)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate(args.root, args.rows, args.seed)
+    print(f"✓ Generated {args.rows} synthetic countries under {args.root}")
+
+
+if __name__ == '__main__':
+    main()
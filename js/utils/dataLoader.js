@@ -1,13 +1,37 @@
+// Slim payload written by scripts/client_payload.py: columnar, level fields encoded as indices into `levels`
+export function expandSlimPayload(payload) {
+    const { fields, levels, encoded, columns, count } = payload;
+    const isEncoded = fields.map(field => encoded.includes(field));
+    const countries = new Array(count);
+    for (let i = 0; i < count; i++) {
+        const country = {};
+        fields.forEach((field, j) => {
+            const value = columns[j][i];
+            country[field] = isEncoded[j] && value !== null ? levels[value] : value;
+        });
+        countries[i] = country;
+    }
+    return countries;
+}
+
+async function fetchJson(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error('Network response was not ok');
+    }
+    return response.json();
+}
+
 export async function loadCountries() {
     try {
-        const response = await fetch('./countries.json');
-        if (!response.ok) {
-            throw new Error('Network response was not ok');
+        // Prefer the slim payload (only the fields the recommender reads), fall back to the full countries.json
+        try {
+            return expandSlimPayload(await fetchJson('./countries.slim.json'));
+        } catch (slimError) {
+            return await fetchJson('./countries.json');
         }
-        const data = await response.json();
-        return data;
     } catch (error) {
         console.error('Error loading country data:', error);
         return [];
     }
-}
\ No newline at end of file
+}
@@ -0,0 +1,131 @@
+"""
+前端精简数据包
+用途：浏览器端推荐器只读取国家名称和 6 个等级字段，countries.json 却包含全部指标且带缩进。
+     这里写出只含这些字段的列式 countries.slim.json（等级编码为共享字典中的小整数），
+     并预先压缩为 .gz / .br，静态服务器可以直接发送（nginx gzip_static / brotli_static）
+
+文件结构：
+    {"version": 1, "count": 国家数, "fields": [字段...], "levels": [等级取值...],
+     "encoded": [用 levels 编码的字段...], "columns": [[第 1 个字段的所有值], ...]}
+    编码字段的值为 levels 中的下标，缺失为 null；js/utils/dataLoader.js 的 expandSlimPayload 还原为记录数组
+
+用法：
+    python scripts/client_payload.py [countries.json]
+"""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from recommender import DIMENSIONS, QUIZ_OPTIONS, BatchRecommender
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 数据包结构版本，字段或布局变化时递增
+PAYLOAD_VERSION = 1
+
+SLIM_SUFFIX = '.slim.json'
+
+LEVEL_FIELDS = [field for _, _, field, _ in DIMENSIONS]
+SLIM_FIELDS = ['country_code', 'country_name'] + LEVEL_FIELDS
+
+# 共享等级字典按问卷选项的顺序排列，数据中出现的其他取值追加在后面
+BASE_LEVELS = list(dict.fromkeys(option for options in QUIZ_OPTIONS.values() for option in options))
+
+
+def client_payload_paths(output_file):
+    """countries.json 对应的精简数据包及其预压缩文件（未安装 brotli 时没有 .br）"""
+    output_file = Path(output_file)
+    slim = output_file.with_name(output_file.stem + SLIM_SUFFIX)
+    paths = [slim, slim.with_name(slim.name + '.gz')]
+    if brotli is not None:
+        paths.append(slim.with_name(slim.name + '.br'))
+    return paths
+
+
+def _values(series):
+    """Series → JSON 列表，缺失为 None"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def build_payload(df):
+    """导出表（DataFrame）→ 精简数据包 dict；表中没有的字段跳过"""
+    fields = [field for field in SLIM_FIELDS if field in df.columns]
+    encoded = [field for field in fields if field in LEVEL_FIELDS]
+
+    levels = list(BASE_LEVELS)
+    for field in encoded:
+        levels += [value for value in pd.unique(df[field].dropna().astype(str)) if value not in levels]
+    positions = {level: i for i, level in enumerate(levels)}
+
+    columns = []
+    for field in fields:
+        values = _values(df[field])
+        if field in encoded:
+            values = [None if value is None else positions[str(value)] for value in values]
+        columns.append(values)
+
+    return {
+        'version': PAYLOAD_VERSION,
+        'count': len(df),
+        'fields': fields,
+        'levels': levels,
+        'encoded': encoded,
+        'columns': columns,
+    }
+
+
+def compress(data):
+    """{'.gz': 字节, '.br': 字节}；gzip 不写入时间戳，内容不变时压缩结果也不变"""
+    compressed = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed['.br'] = brotli.compress(data, quality=11)
+    return compressed
+
+
+def write_client_payload(df, output_file):
+    """写出精简数据包和预压缩文件，返回 {路径: 字节数}"""
+    if brotli is None:
+        print("⚠ brotli not installed, writing only the .gz precompressed payload")
+    data = json.dumps(build_payload(df), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    slim = client_payload_paths(output_file)[0]
+    variants = {slim: data}
+    for suffix, payload in compress(data).items():
+        variants[slim.with_name(slim.name + suffix)] = payload
+
+    for path, payload in variants.items():
+        with open(path, 'wb') as f:
+            f.write(payload)
+    return {path: len(payload) for path, payload in variants.items()}
+
+
+def payload_sizes(output_file):
+    """完整 countries.json 与精简数据包在原始、gzip、brotli 下的字节数：[(名称, 字节数)]"""
+    sizes = []
+    for path in (Path(output_file), client_payload_paths(output_file)[0]):
+        data = path.read_bytes()
+        sizes.append((path.name, len(data)))
+        sizes += [(path.name + suffix, len(payload)) for suffix, payload in compress(data).items()]
+    return sizes
+
+
+def print_sizes(output_file):
+    sizes = payload_sizes(output_file)
+    full = sizes[0][1]
+    print("\n前端数据包大小:")
+    for name, size in sizes:
+        print(f"  {name:<28}{size / 1024:>9.1f} KB{size / full:>8.1%}")
+
+
+if __name__ == '__main__':
+    countries_file = Path(sys.argv[1] if len(sys.argv) > 1 else 'countries.json')
+    countries = pd.DataFrame(BatchRecommender.from_json(countries_file).countries)
+    for path, size in write_client_payload(countries, countries_file).items():
+        print(f"✓ Saved {path} ({size} bytes)")
+    print_sizes(countries_file)
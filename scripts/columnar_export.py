@@ -0,0 +1,81 @@
+"""
+列式二进制导出
+用途：在 JSON/CSV 之外写出带类型的 Parquet 和 Arrow IPC（Feather）文件，
+     等级列使用字典编码，Python 服务可以内存映射零拷贝加载
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# 列式产物的结构版本，列名或类型变化时递增
+SCHEMA_VERSION = 1
+
+COLUMNAR_SUFFIXES = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def columnar_paths(output_file, formats=('parquet', 'arrow')):
+    """与 output_file 同名、不同后缀的列式产物路径（未安装 pyarrow 时为空）"""
+    if pa is None:
+        return []
+    output_file = Path(output_file)
+    return [output_file.with_suffix(COLUMNAR_SUFFIXES[fmt]) for fmt in formats]
+
+
+def to_arrow_table(df, dictionary_columns=()):
+    """
+    DataFrame → Arrow Table
+    categorical 列和 dictionary_columns 中的文本列存为字典编码，元数据中记录结构版本
+    """
+    df = df.copy()
+    for col in dictionary_columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'schema_version'] = str(SCHEMA_VERSION).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def write_columnar(df, output_file, formats=('parquet', 'arrow'), dictionary_columns=()):
+    """
+    按 output_file 的文件名写出 .parquet / .arrow
+    Arrow IPC 文件不压缩，保证可以内存映射零拷贝读取；返回写出的路径列表
+    """
+    if pa is None:
+        print("⚠ pyarrow not installed, skipping Parquet/Arrow export")
+        return []
+
+    table = to_arrow_table(df, dictionary_columns)
+    paths = columnar_paths(output_file, formats)
+    for fmt, path in zip(formats, paths):
+        if fmt == 'parquet':
+            pq.write_table(table, path)
+        else:
+            feather.write_feather(table, path, compression='uncompressed')
+    return paths
+
+
+def read_columnar(path, memory_map=True):
+    """读取列式产物为 Arrow Table，并检查结构版本"""
+    if pa is None:
+        raise ImportError("Reading Parquet/Arrow artifacts requires pyarrow")
+
+    path = Path(path)
+    if path.suffix == COLUMNAR_SUFFIXES['parquet']:
+        table = pq.read_table(path, memory_map=memory_map)
+    else:
+        table = feather.read_table(path, memory_map=memory_map)
+
+    version = (table.schema.metadata or {}).get(b'schema_version')
+    if version is None or int(version) != SCHEMA_VERSION:
+        raise ValueError(f"{path} has schema version {version!r}, expected {SCHEMA_VERSION}")
+    return table
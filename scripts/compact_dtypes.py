@@ -0,0 +1,59 @@
+"""
+紧凑数据类型工具
+用途：把合并表的指标列降为 float32、文本键列转为 categorical，等级列保持 int8 编码的 categorical；
+     导出器在写出前才还原为 float64 和文本，并统计转换前后的内存占用
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def frame_memory_mb(df):
+    """DataFrame 的深度内存占用（MB，含索引和文本列中的字符串）"""
+    return float(df.memory_usage(deep=True, index=True).sum()) / (1024 * 1024)
+
+
+def compact_frame(df, key_columns=()):
+    """
+    float64 列降为 float32，key_columns 中的文本列转为 categorical，其余列不变
+    float32 约有 7 位有效数字，只适用于 0-100 这类指标列，不要用于 GDP、人口等大数值列
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == np.float64:
+            series = series.astype(np.float32)
+        elif col in key_columns and not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def expand_float32(series):
+    """
+    float32 → float64：取 float32 的最短十进制表示再解析，
+    使 23.69f 还原为 23.69 而不是 23.690000534057617，JSON/CSV 中的文本与 float64 计算时一致
+    """
+    values = series.to_numpy(dtype=np.float32, na_value=np.nan)
+    return pd.Series(values.astype(str).astype(np.float64), index=series.index, name=series.name)
+
+
+def expand_frame(df, key_columns=()):
+    """compact_frame 的逆操作：float32 列还原为 float64，key_columns 中的 categorical 列还原为文本"""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == np.float32:
+            series = expand_float32(series)
+        elif col in key_columns and isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(series.cat.categories.dtype)
+        columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_report(df, key_columns=()):
+    """紧凑表与对应标准类型表（float64 + 文本键）的内存对比"""
+    before = frame_memory_mb(expand_frame(df, key_columns))
+    after = frame_memory_mb(df)
+    return {'rows': len(df), 'standard_mb': round(before, 3), 'compact_mb': round(after, 3),
+            'saved_percent': round((1 - after / before) * 100, 1) if before else 0.0}
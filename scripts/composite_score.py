@@ -0,0 +1,65 @@
+"""
+综合评分工具
+用途：把参与综合评分的指标一次性归一化为矩阵（附缺失掩码），
+     之后任意权重的评分只需一次带掩码的矩阵-向量乘法，一批权重为一次矩阵乘法，
+     适合前端拖动权重滑块时的实时重排
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class CompositeScorer:
+    """
+    预先归一化的指标矩阵
+
+    每列按 (x - min) / (max - min + 1) * 10 归一化到 0-10（invert 中的列为 10 减去该值，
+    即数值越低越好）；不存在或全为空的列不参与评分。
+    某个国家在权重不为 0 的列上缺失时，该国评分为缺失（NaN），与逐列累加时 NaN 的传播一致。
+    """
+
+    def __init__(self, df, columns, invert=()):
+        self.index = df.index
+        self.columns = [col for col in columns if col in df.columns and df[col].notna().any()]
+
+        values = np.empty((len(df), len(self.columns)), dtype=np.float64)
+        for j, col in enumerate(self.columns):
+            raw = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            min_val, max_val = np.nanmin(raw), np.nanmax(raw)
+            normalized = (raw - min_val) / (max_val - min_val + 1) * 10
+            values[:, j] = 10 - normalized if col in invert else normalized
+
+        self.missing = np.isnan(values)
+        # 缺失位置填 0，乘法结果再由掩码置为 NaN；掩码也存一份浮点矩阵，使掩码传播同样走 BLAS 乘法
+        self.values = np.where(self.missing, 0.0, values)
+        self._missing = self.missing.astype(np.float64)
+
+    def weight_vector(self, weights):
+        """{列名: 权重} → 与 columns 对齐的权重向量（未给出的列权重为 0，未知列被忽略）"""
+        return np.array([weights.get(col, 0.0) for col in self.columns], dtype=np.float64)
+
+    def weight_matrix(self, weights_batch):
+        """一批权重（{列名: 权重} 列表或 (批大小, 列数) 数组）→ (批大小, 列数) 矩阵"""
+        if isinstance(weights_batch, np.ndarray):
+            return np.atleast_2d(weights_batch).astype(np.float64, copy=False)
+        return np.array([self.weight_vector(weights) for weights in weights_batch], dtype=np.float64)
+
+    def score(self, weights):
+        """一组权重下所有国家的综合评分（Series，与输入表同索引）"""
+        w = self.weight_vector(weights) if isinstance(weights, dict) else np.asarray(weights, dtype=np.float64)
+        scores = self.values @ w
+        scores[self._missing @ (w != 0).astype(np.float64) > 0] = np.nan
+        return pd.Series(scores, index=self.index, name='composite_score')
+
+    def score_batch(self, weights_batch):
+        """一批权重的评分矩阵 (批大小, 国家数)：一次矩阵乘法"""
+        w = self.weight_matrix(weights_batch)
+        scores = w @ self.values.T
+        scores[(w != 0).astype(np.float64) @ self._missing.T > 0] = np.nan
+        return scores
+
+    def rank(self, weights, k=None):
+        """按评分从高到低排列的国家（缺失评分排在最后），k 为 None 时返回全部"""
+        scores = self.score(weights)
+        ranked = scores.sort_values(ascending=False, kind='stable', na_position='last')
+        return ranked if k is None else ranked.iloc[:k]
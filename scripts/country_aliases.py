@@ -0,0 +1,222 @@
+"""
+国家名称别名索引
+用途：把各数据源中不同拼写的国家名称解析为 ISO3 代码和统一的显示名称。
+     名称先规范化（大小写折叠、去重音、展开缩写、词序排序）后精确匹配，
+     匹配不到时用三元组（trigram）倒排索引做模糊匹配；整列按去重后的值解析并记忆结果
+"""
+
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import source_loader
+from source_loader import read_country_names
+
+# 常用英文名称 → ISO3，补充 WDI 中使用正式名称的国家（如 Korea, Rep.、Turkiye、Viet Nam）
+# 同一代码的第一个名称作为显示名称
+KNOWN_ALIASES = {
+    'Bahamas': 'BHS',
+    'Brunei': 'BRN',
+    'Cape Verde': 'CPV',
+    'Congo': 'COG',
+    'Congo (Brazzaville)': 'COG',
+    'Democratic Republic of the Congo': 'COD',
+    'Congo (Kinshasa)': 'COD',
+    'Czech Republic': 'CZE',
+    'East Timor': 'TLS',
+    'Egypt': 'EGY',
+    'Gambia': 'GMB',
+    'Hong Kong': 'HKG',
+    'Hong Kong S.A.R. of China': 'HKG',
+    'Iran': 'IRN',
+    'Ivory Coast': 'CIV',
+    'Kyrgyzstan': 'KGZ',
+    'Laos': 'LAO',
+    'Macao': 'MAC',
+    'Macau': 'MAC',
+    'Macedonia': 'MKD',
+    'Micronesia': 'FSM',
+    'North Korea': 'PRK',
+    'Palestine': 'PSE',
+    'State of Palestine': 'PSE',
+    'Puerto Rico': 'PRI',
+    'Russia': 'RUS',
+    'Slovakia': 'SVK',
+    'South Korea': 'KOR',
+    'Syria': 'SYR',
+    'Taiwan': 'TWN',
+    'Taiwan Province of China': 'TWN',
+    'Turkey': 'TUR',
+    'United States of America': 'USA',
+    'Vatican City': 'VAT',
+    'Venezuela': 'VEN',
+    'Vietnam': 'VNM',
+    'Yemen': 'YEM',
+}
+
+# 规范化时展开的缩写和忽略的词
+ABBREVIATIONS = {'st': 'saint', 'rep': 'republic', 'dem': 'democratic', 'fed': 'federated', 'is': 'islands'}
+IGNORED_TOKENS = {'the'}
+
+# 模糊匹配的最低 Dice 相似度：能容忍 Phillipines、Kazakstan 这类拼写错误，
+# 又不会把 Niger/Nigeria（0.71）、Austria/Australia（0.67）混在一起
+FUZZY_THRESHOLD = 0.72
+
+
+def normalize_name(name):
+    """规范化名称：去重音、大小写折叠、& → and、展开缩写、去掉 the，词按字母序排列"""
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold().replace('&', ' and ')
+    tokens = [ABBREVIATIONS.get(token, token) for token in re.findall(r'[a-z0-9]+', text)]
+    return ' '.join(sorted(token for token in tokens if token not in IGNORED_TOKENS))
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AliasIndex:
+    """
+    规范化名称 → ISO3 代码 的索引
+
+    显示名称的优先级：标准名称列表（country_name.csv）> KNOWN_ALIASES > 带代码的数据源名称。
+    同一个规范化名称指向不同代码时视为有歧义，不做解析。
+    """
+
+    def __init__(self):
+        self.codes = {}          # 规范化名称 → 代码（有歧义时为 None）
+        self.names = {}          # 代码 → 显示名称
+        self._trigram_index = None
+        self._memo = {}
+
+    def add(self, name, code, display=False, override=False):
+        """添加一个别名；display=True 时同时设为该代码的显示名称"""
+        if not isinstance(name, str) or not name.strip() or not isinstance(code, str) or not code:
+            return
+        key = normalize_name(name)
+        if override or key not in self.codes:
+            self.codes[key] = code
+        elif self.codes[key] != code:
+            self.codes[key] = None
+        if display or code not in self.names:
+            self.names[code] = name.strip()
+        self._trigram_index = None
+        self._memo.clear()
+
+    @classmethod
+    def build(cls, code_tables=(), standard_names=(), aliases=KNOWN_ALIASES):
+        """
+        code_tables: 代码 → 名称 的 Series 列表（WDI 元数据、带代码的数据源）
+        standard_names: 标准名称列表，解析到代码后作为显示名称
+        """
+        index = cls()
+        for table in code_tables:
+            for code, name in table.items():
+                index.add(name, code)
+        # 同一代码的多个常用名称中，第一个作为显示名称
+        displayed = set()
+        for name, code in aliases.items():
+            index.add(name, code, display=code not in displayed, override=True)
+            displayed.add(code)
+        for name in standard_names:
+            code = index.lookup(name)
+            if code is not None:
+                index.add(name, code, display=True, override=True)
+        index._build_trigram_index()
+        return index
+
+    def _build_trigram_index(self):
+        keys = [key for key, code in self.codes.items() if code is not None]
+        postings = {}
+        for i, key in enumerate(keys):
+            for gram in trigrams(key):
+                postings.setdefault(gram, []).append(i)
+        self._trigram_index = (
+            keys,
+            np.array([len(trigrams(key)) for key in keys], dtype=np.int32),
+            {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()},
+        )
+
+    def fuzzy_lookup(self, name, threshold=FUZZY_THRESHOLD):
+        """三元组 Dice 相似度最高且不低于阈值的别名对应的代码；最高分对应多个代码时返回 None"""
+        if self._trigram_index is None:
+            self._build_trigram_index()
+        keys, sizes, postings = self._trigram_index
+        grams = trigrams(normalize_name(name))
+        hits = [postings[gram] for gram in grams if gram in postings]
+        if not hits:
+            return None
+
+        shared = np.bincount(np.concatenate(hits), minlength=len(keys))
+        dice = 2 * shared / (sizes + len(grams))
+        best = dice.max()
+        if best < threshold:
+            return None
+        codes = {self.codes[keys[i]] for i in np.flatnonzero(dice == best)}
+        return codes.pop() if len(codes) == 1 else None
+
+    def lookup(self, name):
+        """单个名称 → 代码：先精确匹配规范化名称，再模糊匹配；结果被记忆"""
+        if name in self._memo:
+            return self._memo[name]
+        if not isinstance(name, str) or not name.strip():
+            code = None
+        else:
+            code = self.codes.get(normalize_name(name))
+            if code is None:
+                code = self.fuzzy_lookup(name)
+        self._memo[name] = code
+        return code
+
+    def resolve(self, values):
+        """整列名称 → 代码数组（object，无法解析为 None），每个不同的名称只解析一次"""
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        resolved = np.array([self.lookup(name) for name in uniques.tolist()] + [None], dtype=object)
+        return resolved[codes]
+
+    def canonical_names(self, values):
+        """整列名称 → 显示名称，无法解析的名称保持原样"""
+        values = pd.Series(values, dtype=object)
+        codes = self.resolve(values)
+        names = np.array([self.names.get(code) if code is not None else None for code in codes], dtype=object)
+        return pd.Series(np.where(pd.isna(names), values.to_numpy(dtype=object), names),
+                         index=values.index, name=values.name, dtype=object)
+
+
+def load_alias_index(code_files=(), standard_file=None, metadata_files=(), cache=None):
+    """
+    构建（或从 PipelineCache 读取）别名索引
+    code_files: 带 Country Code / Country Name 列的数据源
+    standard_file: 一列 country_name 的标准名称文件
+    metadata_files: WDI 国家元数据文件（Country Code / TableName）
+    """
+    code_files = [Path(path) for path in code_files if Path(path).exists()]
+    metadata_files = [Path(path) for path in metadata_files if Path(path).exists()]
+    if standard_file is not None and not Path(standard_file).exists():
+        standard_file = None
+
+    key = None
+    if cache is not None:
+        inputs = [*code_files, *metadata_files, *([standard_file] if standard_file else [])]
+        key = cache.key(
+            [cache.file_digest(path) for path in inputs],
+            cache.file_digest(__file__), cache.file_digest(source_loader.__file__),
+        )
+        index = cache.get('country-aliases', key)
+        if index is not None:
+            return index
+
+    tables = [source_loader.load_country_codes(path.parent, path.name) for path in metadata_files]
+    tables += [read_country_names(path) for path in code_files]
+    standard_names = []
+    if standard_file is not None:
+        standard_names = pd.read_csv(standard_file)['country_name'].dropna().str.strip().tolist()
+
+    index = AliasIndex.build(tables, standard_names)
+    if cache is not None:
+        cache.put('country-aliases', key, index)
+    return index
@@ -3,128 +3,272 @@
 用途：标准化国家名称，合并多个数据源，创建评分系统
 """
 
+import argparse
+import json
 import pandas as pd
 import numpy as np
 import os
+from functools import partial
 from pathlib import Path
 
+import columnar_export
+import composite_score
+import country_aliases
+import instrumentation
+import level_binning
+import pipeline_engine
+import streaming_stats
+import wdi_loader
+from columnar_export import columnar_paths, write_columnar
+from composite_score import CompositeScorer
+from country_aliases import load_alias_index
+from instrumentation import RunRecorder
+from level_binning import LevelBins
+from pipeline_cache import PipelineCache, code_digest
+from pipeline_engine import Pipeline
+from streaming_stats import DEFAULT_CHUNK_SIZE, StreamingStats
+from wdi_loader import load_wdi_latest, resolve_wdi_paths
+
 # 设置数据目录
 DATA_DIR = Path('./data')
 
+# 管道的输入文件（相对 data_dir）
+INPUT_FILES = ['country_name.csv', 'quality_of_living.csv', 'cost_of_living.csv', 'economy_situation.json']
+
+# 原始CSV输入：属性名 → 文件名，每个文件一个读取节点
+RAW_FILES = {
+    'countries_name': 'country_name.csv',
+    'quality_of_living': 'quality_of_living.csv',
+    'cost_of_living': 'cost_of_living.csv',
+}
+
+# 导出节点，都只依赖综合评分节点，并行写出
+EXPORT_NODES = ['save:csv', 'save:columnar', 'save:json', 'save:summary']
+
+# 管道代码，修改后节点缓存和整次运行缓存自动失效
+CODE_FILES = [__file__, pipeline_engine.__file__, level_binning.__file__, columnar_export.__file__,
+              wdi_loader.__file__, country_aliases.__file__, composite_score.__file__, streaming_stats.__file__]
+
+# 综合评分的默认权重（DataCleaner(weights=...) 可以覆盖）
+COMPOSITE_WEIGHTS = {
+    'quality_level': 0.25,           # 生活质量：25%
+    'cost_level': 0.20,              # 生活成本：20%（成本越低越好，所以需要反向）
+    'income_group_score': 0.20,      # 收入水平：20%
+    'safety_index': 0.15,            # 安全指数：15%
+    'healthcare_index': 0.15,        # 医疗指数：15%
+    'climate_index': 0.05            # 气候指数：5%
+}
+
+# 数值越低越好的评分列
+INVERTED_SCORE_COLUMNS = ('cost_level',)
+
+# 本地世界银行 WDI 指标文件：输出列名 → 路径（先相对 data_dir 查找，找不到再相对当前目录）
+# 没有 economy_situation.json 时，可以通过 DataCleaner(wdi_indicators=WDI_INDICATORS) 用它们生成经济数据
+WDI_INDICATORS = {
+    'gdp_per_capita': 'gdp/API_NY.GDP.PCAP.CD_DS2_en_csv_v2_46.csv',
+    'gdp': 'API_NY.GDP.MKTP.CD_DS2_en_csv_v2_32.zip',
+}
+
+# 别名索引使用的 WDI 国家元数据（相对 data_dir，不存在时跳过）
+ALIAS_METADATA_FILES = ['gdp/Metadata_Country_API_NY.GDP.PCAP.CD_DS2_en_csv_v2_46.csv']
+
+# 经济数据中保留的列（缺少的列跳过）
+ECONOMY_COLUMNS = ['country_name', 'gdp', 'gdp_per_capita', 'income_group_score',
+                   'population', 'inflation', 'gni_per_capita']
+
+# 生活质量指数 → 等级（1-10）
+QUALITY_LEVELS = LevelBins([
+    (200, 10), (180, 9), (160, 8), (140, 7), (120, 6),
+    (100, 5), (80, 4), (60, 3), (40, 2),
+], default=1)
+
+# 生活成本指数 → 等级（1-10），1=最便宜，10=最贵
+COST_LEVELS = LevelBins([
+    (100, 10), (80, 9), (60, 8), (50, 7), (40, 6),
+    (30, 5), (25, 4), (20, 3), (15, 2),
+], default=1)
+
+# 人均GDP → 收入等级评分
+INCOME_GROUP_SCORES = LevelBins([
+    (50000, 10),  # 高收入
+    (30000, 8),   # 中高收入
+    (15000, 6),   # 中等收入
+    (5000, 4),    # 中低收入
+], default=2)     # 低收入
+
 class DataCleaner:
-    def __init__(self, data_dir=DATA_DIR):
+    def __init__(self, data_dir=DATA_DIR, use_cache=True, wdi_indicators=None, max_workers=None, weights=None):
         self.data_dir = data_dir
+        self.wdi_indicators = wdi_indicators or {}
+        self.weights = dict(COMPOSITE_WEIGHTS if weights is None else weights)
         self.countries_name = None
         self.quality_of_living = None
         self.cost_of_living = None
         self.economy_data = None
         self.merged_data = None
-        
+        self.alias_index = None
+        self.cache = PipelineCache() if use_cache else None
+        self.max_workers = max_workers
+        self._pipeline = None
+        self._scorer = None
+    
+    @property
+    def scorer(self):
+        """综合评分的 CompositeScorer（合并表来自缓存时按需构建）"""
+        if self._scorer is None and self.merged_data is not None:
+            self._scorer = CompositeScorer(self.merged_data, list(self.weights), invert=INVERTED_SCORE_COLUMNS)
+        return self._scorer
+    
+    @property
+    def pipeline(self):
+        """节点图（首次使用时构建）"""
+        if self._pipeline is None:
+            self._pipeline = self._build_pipeline()
+        return self._pipeline
+    
+    def _build_pipeline(self):
+        """
+        读取 → 清洗 → 名称映射 → 合并 → 综合评分 → 导出
+        各数据源的读取和清洗互不依赖，并行运行；节点结果按输入文件哈希缓存
+        """
+        pipeline = Pipeline('v1', self.cache, CODE_FILES, self.max_workers)
+        
+        for attribute, filename in RAW_FILES.items():
+            pipeline.add(f'load:{attribute}', partial(self._read_csv, filename),
+                         inputs=[self.data_dir / filename])
+        wdi_paths = self._wdi_paths()
+        pipeline.add('load:economy_data', partial(self._read_economy, wdi_paths),
+                     params={name: str(path) for name, path in wdi_paths.items()},
+                     inputs=[self.data_dir / 'economy_situation.json', *wdi_paths.values()])
+        
+        pipeline.add('clean:quality_of_living', self.clean_quality_of_living, ['load:quality_of_living'])
+        pipeline.add('clean:cost_of_living', self.clean_cost_of_living, ['load:cost_of_living'])
+        pipeline.add('clean:economy_data', self.clean_economy_data, ['load:economy_data'])
+        
+        # 别名索引自带缓存，名称映射每次重新计算（同时设置 self.alias_index）
+        pipeline.add('names', self.standardize_country_names,
+                     [f'load:{attribute}' for attribute in (*RAW_FILES, 'economy_data')],
+                     inputs=[self.data_dir / 'country_name.csv',
+                             *(self.data_dir / path for path in ALIAS_METADATA_FILES)],
+                     cache=False)
+        pipeline.add('merge', self._merge_cleaned,
+                     ['clean:quality_of_living', 'clean:cost_of_living', 'clean:economy_data', 'names'])
+        pipeline.add('composite', self.create_composite_score, ['merge'], params=self.weights)
+        
+        pipeline.add('save:csv', partial(self.save_cleaned_data, 'cleaned_countries_data.csv', False),
+                     ['composite'], cache=False)
+        pipeline.add('save:columnar', partial(self.save_columnar, 'cleaned_countries_data.csv'),
+                     ['composite'], cache=False)
+        pipeline.add('save:json', partial(self.save_cleaned_data, 'cleaned_countries_data.json', False),
+                     ['composite'], cache=False)
+        pipeline.add('save:summary', partial(self.save_summary_report, 'data_summary.txt'),
+                     ['composite'], cache=False)
+        return pipeline
+    
     def load_data(self):
-        """加载所有CSV文件"""
+        """并行加载所有输入文件"""
         print("Loading data...")
-        
-        # 加载国家名称（作为标准参考）
-        country_name_file = self.data_dir / 'country_name.csv'
-        if country_name_file.exists():
-            self.countries_name = pd.read_csv(country_name_file)
-            print(f"✓ Loaded {len(self.countries_name)} countries from country_name.csv")
-        else:
-            print("⚠ country_name.csv not found")
-        
-        # 加载生活质量数据
-        quality_file = self.data_dir / 'quality_of_living.csv'
-        if quality_file.exists():
-            self.quality_of_living = pd.read_csv(quality_file)
-            print(f"✓ Loaded quality_of_living.csv ({len(self.quality_of_living)} records)")
-        else:
-            print("⚠ quality_of_living.csv not found")
-        
-        # 加载生活成本数据
-        cost_file = self.data_dir / 'cost_of_living.csv'
-        if cost_file.exists():
-            self.cost_of_living = pd.read_csv(cost_file)
-            print(f"✓ Loaded cost_of_living.csv ({len(self.cost_of_living)} records)")
-        else:
-            print("⚠ cost_of_living.csv not found")
-        
-        # 加载经济数据（如果存在）
+        results = self.pipeline.run([f'load:{attribute}' for attribute in (*RAW_FILES, 'economy_data')])
+        for attribute in (*RAW_FILES, 'economy_data'):
+            setattr(self, attribute, results[f'load:{attribute}'])
+    
+    def _read_csv(self, filename):
+        path = self.data_dir / filename
+        if not path.exists():
+            print(f"⚠ {filename} not found")
+            return None
+        df = pd.read_csv(path)
+        print(f"✓ Loaded {filename} ({len(df)} records)")
+        return df
+    
+    def _read_economy(self, wdi_paths):
+        """加载经济数据（如果存在）；没有 economy_situation.json 且指定了 wdi_indicators 时读取 WDI 文件"""
         economy_file = self.data_dir / 'economy_situation.json'
         if economy_file.exists():
-            self.economy_data = pd.read_json(economy_file)
-            print(f"✓ Loaded economy_situation.json ({len(self.economy_data)} records)")
-        else:
-            print("⚠ economy_situation.json not found")
+            df = pd.read_json(economy_file)
+            print(f"✓ Loaded economy_situation.json ({len(df)} records)")
+            return df
+        if self.wdi_indicators:
+            return self._read_wdi_economy(wdi_paths)
+        print("⚠ economy_situation.json not found")
+        return None
     
-    def standardize_country_names(self):
+    def _wdi_paths(self):
+        """解析 WDI 指标文件路径，只保留存在的文件"""
+        return resolve_wdi_paths(self.wdi_indicators, self.data_dir)
+    
+    @staticmethod
+    def _read_wdi_economy(paths):
+        economy = load_wdi_latest(paths)
+        if economy is None:
+            return None
+        economy = economy.reset_index()
+        print(f"✓ Loaded {len(paths)} WDI indicators ({len(economy)} countries)")
+        return economy
+    
+    def load_wdi_economy_data(self):
+        """从本地 WDI 宽表（CSV 或 zip）读取各指标最近一年的值作为经济数据"""
+        economy = self._read_wdi_economy(self._wdi_paths())
+        if economy is not None:
+            self.economy_data = economy
+
+    def standardize_country_names(self, countries_name=None, quality_of_living=None, cost_of_living=None,
+                                  economy_data=None):
         """
         标准化国家名称
-        创建国家名称映射表，处理不同数据源的国家名称差异
+        用别名索引把各数据源中的不同拼写解析为同一个国家代码，作为合并键；显示名称保持数据源中的拼写
+        返回 (标准名称列表, {原名称: 合并键})，映射中只包含能解析为国家代码的名称
+        未传入的数据默认使用 load_data() 加载的属性
         """
         print("\nStandardizing country names...")
+        countries_name = self.countries_name if countries_name is None else countries_name
+        quality_of_living = self.quality_of_living if quality_of_living is None else quality_of_living
+        cost_of_living = self.cost_of_living if cost_of_living is None else cost_of_living
+        economy_data = self.economy_data if economy_data is None else economy_data
         
         # 创建标准国家名称列表
-        standard_countries = self.countries_name['country_name'].str.strip().str.title().tolist()
-        
-        # 创建清洁映射字典（处理常见的名称差异）
-        name_mapping = {
-            'Czech Republic': 'Czech Republic',
-            'North Macedonia': 'North Macedonia',
-            'Bosnia and Herzegovina': 'Bosnia and Herzegovina',
-            'Hong Kong': 'Hong Kong',
-            'United States': 'United States',
-            'United Kingdom': 'United Kingdom',
-            'Puerto Rico': 'Puerto Rico',
-            'United Arab Emirates': 'United Arab Emirates',
-            'South Korea': 'South Korea',
-            'South Africa': 'South Africa',
-            'Costa Rica': 'Costa Rica',
-            'El Salvador': 'El Salvador',
-            'New Zealand': 'New Zealand',
-            'Sri Lanka': 'Sri Lanka',
-            'Trinidad and Tobago': 'Trinidad and Tobago',
-        }
-        
-        return standard_countries, name_mapping
+        standard_countries = []
+        if countries_name is not None:
+            standard_countries = countries_name['country_name'].str.strip().str.title().tolist()
+        
+        self.alias_index = load_alias_index(
+            standard_file=self.data_dir / 'country_name.csv',
+            metadata_files=[self.data_dir / path for path in ALIAS_METADATA_FILES],
+            cache=self.cache,
+        )
+        
+        # 各数据源中出现的名称（与清洗步骤一样先 strip + title）
+        source_names = []
+        for df, column in ((quality_of_living, 'Country'), (cost_of_living, 'Country'),
+                           (economy_data, 'country_name')):
+            if df is not None and column in df.columns:
+                source_names.append(df[column].dropna().astype(str).str.strip().str.title())
+        if not source_names:
+            return standard_countries, {}
+        
+        names = pd.Series(pd.unique(pd.concat(source_names)), dtype=object)
+        codes = self.alias_index.resolve(names)
+        resolved = pd.notna(codes)
+        join_keys = dict(zip(names[resolved], codes[resolved]))
+        print(f"✓ {len(join_keys)}/{len(names)} country names resolved to country codes")
+        
+        return standard_countries, join_keys
     
-    def clean_quality_of_living(self):
-        """清洗生活质量数据"""
+    def clean_quality_of_living(self, quality_of_living=None):
+        """清洗生活质量数据（默认使用已加载的 self.quality_of_living）"""
         print("\nCleaning quality_of_living data...")
         
-        if self.quality_of_living is None:
+        df = self.quality_of_living if quality_of_living is None else quality_of_living
+        if df is None:
             return None
         
-        df = self.quality_of_living.copy()
+        df = df.copy()
         
         # 标准化国家名称
         df['Country'] = df['Country'].str.strip().str.title()
         
-        # 创建等级评分函数
-        def quality_level(score):
-            """将生活质量指数转换为等级（1-10）"""
-            if score >= 200:
-                return 10
-            elif score >= 180:
-                return 9
-            elif score >= 160:
-                return 8
-            elif score >= 140:
-                return 7
-            elif score >= 120:
-                return 6
-            elif score >= 100:
-                return 5
-            elif score >= 80:
-                return 4
-            elif score >= 60:
-                return 3
-            elif score >= 40:
-                return 2
-            else:
-                return 1
-        
         # 添加等级列
-        df['Quality_Level'] = df['Quality of Life Index'].apply(quality_level)
+        df['Quality_Level'] = QUALITY_LEVELS.cut(df['Quality of Life Index'])
         
         # 选择关键列
         df_clean = df[['Country', 'Quality of Life Index', 'Quality_Level',
@@ -144,47 +288,21 @@ class DataCleaner:
         print(f"✓ Cleaned {len(df_clean)} quality_of_living records")
         return df_clean
     
-    def clean_cost_of_living(self):
-        """清洗生活成本数据"""
+    def clean_cost_of_living(self, cost_of_living=None):
+        """清洗生活成本数据（默认使用已加载的 self.cost_of_living）"""
         print("\nCleaning cost_of_living data...")
         
-        if self.cost_of_living is None:
+        df = self.cost_of_living if cost_of_living is None else cost_of_living
+        if df is None:
             return None
         
-        df = self.cost_of_living.copy()
+        df = df.copy()
         
         # 标准化国家名称
         df['Country'] = df['Country'].str.strip().str.title()
         
-        # 创建成本等级函数
-        def cost_level(index):
-            """
-            将生活成本指数转换为等级（1-10）
-            1=最便宜，10=最贵
-            """
-            if index >= 100:
-                return 10
-            elif index >= 80:
-                return 9
-            elif index >= 60:
-                return 8
-            elif index >= 50:
-                return 7
-            elif index >= 40:
-                return 6
-            elif index >= 30:
-                return 5
-            elif index >= 25:
-                return 4
-            elif index >= 20:
-                return 3
-            elif index >= 15:
-                return 2
-            else:
-                return 1
-        
         # 添加等级列
-        df['Cost_Level'] = df['Cost of Living Index'].apply(cost_level)
+        df['Cost_Level'] = COST_LEVELS.cut(df['Cost of Living Index'])
         
         # 选择关键列
         df_clean = df[['Country', 'Cost of Living Index', 'Cost_Level',
@@ -204,45 +322,24 @@ class DataCleaner:
         print(f"✓ Cleaned {len(df_clean)} cost_of_living records")
         return df_clean
     
-    def clean_economy_data(self):
-        """清洗经济数据"""
+    def clean_economy_data(self, economy_data=None):
+        """清洗经济数据（默认使用已加载的 self.economy_data）"""
         print("\nCleaning economy data...")
         
-        if self.economy_data is None:
+        df = self.economy_data if economy_data is None else economy_data
+        if df is None:
             return None
         
-        df = self.economy_data.copy()
+        df = df.copy()
         
         # 标准化国家名称
         if 'country_name' in df.columns:
             df['country_name'] = df['country_name'].str.strip().str.title()
         
-        # 创建收入等级评分
-        def income_group_score(gdp_per_capita):
-            """
-            基于人均GDP分类收入等级
-            """
-            if pd.isna(gdp_per_capita):
-                return None
-            
-            if gdp_per_capita >= 50000:
-                return 10  # 高收入
-            elif gdp_per_capita >= 30000:
-                return 8   # 中高收入
-            elif gdp_per_capita >= 15000:
-                return 6   # 中等收入
-            elif gdp_per_capita >= 5000:
-                return 4   # 中低收入
-            else:
-                return 2   # 低收入
-        
-        # 添加收入等级列
-        df['income_group_score'] = df['gdp_per_capita'].apply(income_group_score)
-        
-        # 选择关键列
+        # 添加收入等级列，并选择关键列
         if 'gdp_per_capita' in df.columns:
-            df_clean = df[['country_name', 'gdp', 'gdp_per_capita', 'income_group_score',
-                           'population', 'inflation', 'gni_per_capita']].copy()
+            df['income_group_score'] = INCOME_GROUP_SCORES.cut(df['gdp_per_capita'])
+            df_clean = df[[col for col in ECONOMY_COLUMNS if col in df.columns]].copy()
         else:
             df_clean = df.copy()
         
@@ -259,36 +356,31 @@ class DataCleaner:
         return df_clean
     
     def merge_all_data(self):
-        """合并所有数据源"""
+        """合并所有数据源（各数据源的读取和清洗并行运行）"""
+        self.merged_data = self.pipeline.run(['merge'])['merge']
+        return self.merged_data
+    
+    def _merge_cleaned(self, quality_clean, cost_clean, economy_clean, names):
+        """按国家代码合并清洗后的数据源（显示名称保持数据源中的拼写）"""
         print("\nMerging all data sources...")
         
-        # 清洗各个数据源
-        quality_clean = self.clean_quality_of_living()
-        cost_clean = self.clean_cost_of_living()
-        economy_clean = self.clean_economy_data()
-        
-        # 从cost_of_living开始作为基础（通常数据最完整）
-        merged = cost_clean.copy() if cost_clean is not None else None
-        
-        # 合并生活质量数据
-        if merged is not None and quality_clean is not None:
-            merged = merged.merge(
-                quality_clean, 
-                on='country_name', 
-                how='outer'
-            )
-        elif quality_clean is not None:
-            merged = quality_clean.copy()
-        
-        # 合并经济数据
-        if merged is not None and economy_clean is not None:
-            merged = merged.merge(
-                economy_clean, 
-                on='country_name', 
-                how='outer'
-            )
-        elif economy_clean is not None:
-            merged = economy_clean.copy()
+        # 按合并键（国家代码，无法解析时为原名称）合并，同一国家的不同拼写不会被拆成多行；
+        # 显示名称依次取 cost_of_living、quality_of_living、经济数据中的拼写
+        _, join_keys = names
+        sources = [df for df in (cost_clean, quality_clean, economy_clean) if df is not None]
+        if not sources:
+            return None
+        merged = None
+        for i, df in enumerate(sources):
+            # 逐值查字典：Series.replace 对大映射是 行数×映射数 的开销
+            df = df.rename(columns={'country_name': f'_name_{i}'}).assign(
+                _join_key=df['country_name'].map(lambda name: join_keys.get(name, name)))
+            merged = df if merged is None else merged.merge(df, on='_join_key', how='outer')
+        
+        name_columns = [f'_name_{i}' for i in range(len(sources))]
+        display_names = merged[name_columns].bfill(axis=1).iloc[:, 0]
+        merged = merged.drop(columns=name_columns + ['_join_key'])
+        merged.insert(0, 'country_name', display_names)
         
         # 清理重复列
         merged = merged.loc[:, ~merged.columns.duplicated()]
@@ -296,82 +388,81 @@ class DataCleaner:
         # 排序
         merged = merged.sort_values('country_name').reset_index(drop=True)
         
-        self.merged_data = merged
         print(f"✓ Merged data: {len(merged)} countries, {len(merged.columns)} features")
         
         return merged
     
-    def create_composite_score(self):
-        """创建综合评分"""
+    def create_composite_score(self, merged=None):
+        """
+        创建综合评分（默认使用 self.merged_data，权重为 self.weights）
+        构建的 CompositeScorer 保存在 self.scorer，可用 scorer.score(weights) / rank(weights) 按其他权重重排
+        """
         print("\nCreating composite score...")
         
-        if self.merged_data is None:
+        merged = self.merged_data if merged is None else merged
+        if merged is None:
             print("⚠ No merged data available")
-            return self.merged_data
-        
-        df = self.merged_data.copy()
-        
-        # 权重设置
-        weights = {
-            'quality_level': 0.25,           # 生活质量：25%
-            'cost_level': 0.20,              # 生活成本：20%（成本越低越好，所以需要反向）
-            'income_group_score': 0.20,      # 收入水平：20%
-            'safety_index': 0.15,            # 安全指数：15%
-            'healthcare_index': 0.15,        # 医疗指数：15%
-            'climate_index': 0.05             # 气候指数：5%
-        }
-        
-        # 初始化综合分数
-        df['composite_score'] = 0
-        
-        # 标准化各个指标到0-10分
-        for col, weight in weights.items():
-            if col in df.columns:
-                # 检查是否有非null值
-                if df[col].notna().sum() > 0:
-                    # 获取有效数据的最小和最大值
-                    valid_data = df[col].dropna()
-                    if len(valid_data) > 0:
-                        min_val = valid_data.min()
-                        max_val = valid_data.max()
-                        
-                        # 处理特殊情况：cost_level需要反向（成本越低越好）
-                        if col == 'cost_level':
-                            normalized = 10 - ((df[col] - min_val) / (max_val - min_val + 1) * 10)
-                        else:
-                            normalized = (df[col] - min_val) / (max_val - min_val + 1) * 10
-                        
-                        df['composite_score'] += normalized * weight
-                    else:
-                        print(f"  ⚠ No valid data for {col}")
+            return merged
+        
+        # 各指标只归一化一次（0-10 分，cost_level 反向），之后任意权重都是一次矩阵-向量乘法
+        self._scorer = CompositeScorer(merged, list(self.weights), invert=INVERTED_SCORE_COLUMNS)
         
         # 四舍五入到两位小数
-        df['composite_score'] = df['composite_score'].round(2)
+        df = merged.assign(composite_score=self._scorer.score(self.weights).round(2))
         
         print("✓ Composite score created")
         return df
     
-    def save_cleaned_data(self, output_filename='cleaned_countries_data.csv'):
-        """保存清洗后的数据"""
+    def save_cleaned_data(self, output_filename='cleaned_countries_data.csv', columnar=True, data=None):
+        """保存清洗后的数据（默认 self.merged_data；columnar=True 时同时写出同名的 .parquet / .arrow）"""
         print(f"\nSaving cleaned data to {output_filename}...")
         
-        if self.merged_data is None:
+        data = self.merged_data if data is None else data
+        if data is None:
             print("⚠ No merged data to save")
             return
         
         output_path = self.data_dir / output_filename
-        self.merged_data.to_csv(output_path, index=False, encoding='utf-8')
+        self._numpy_levels(data).to_csv(output_path, index=False, encoding='utf-8')
         print(f"✓ Data saved to {output_path}")
+        
+        if columnar:
+            self.save_columnar(output_filename, data)
+    
+    @staticmethod
+    def _numpy_levels(data):
+        """
+        可空 Int8 等级列还原为逐行分级时的 NumPy 类型：有缺失时为 float64（写出 "5.0"），否则为 int64
+        列式副本保留 Int8，只有文本导出需要
+        """
+        levels = {col: data[col].astype('float64' if data[col].hasnans else 'int64')
+                  for col in data.columns if isinstance(data[col].dtype, pd.Int8Dtype)}
+        return data.assign(**levels) if levels else data
     
-    def save_summary_report(self, output_filename='data_summary.txt'):
-        """保存数据摘要报告"""
+    def save_columnar(self, output_filename='cleaned_countries_data.csv', data=None):
+        """写出与 output_filename 同名的 .parquet / .arrow"""
+        data = self.merged_data if data is None else data
+        if data is None:
+            return
+        for path in write_columnar(data, self.data_dir / output_filename):
+            print(f"✓ Columnar copy saved to {path}")
+    
+    def save_summary_report(self, output_filename='data_summary.txt', data=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        保存数据摘要报告（默认 data），同名 .json 中是同一份统计
+        所有列的计数、缺失、描述统计和综合评分排名在一次分块扫描中累计（见 streaming_stats.py）
+        """
         print(f"\nGenerating summary report...")
         
-        if self.merged_data is None:
+        data = self.merged_data if data is None else data
+        if data is None:
             print("⚠ No data to summarize")
             return
         
         output_path = self.data_dir / output_filename
+        stats = StreamingStats.from_frame(data, label='country_name', rank_columns=['composite_score'],
+                                          top_n=10, chunk_size=chunk_size)
+        summary = stats.to_dict()
         
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write("=" * 60 + "\n")
@@ -381,65 +472,92 @@ class DataCleaner:
             # 基本统计信息
             f.write("1. 数据概览\n")
             f.write("-" * 60 + "\n")
-            f.write(f"总国家数: {len(self.merged_data)}\n")
-            f.write(f"总特征数: {len(self.merged_data.columns)}\n")
-            f.write(f"缺失值: {self.merged_data.isnull().sum().sum()}\n\n")
+            f.write(f"总国家数: {stats.rows}\n")
+            f.write(f"总特征数: {len(stats.columns)}\n")
+            f.write(f"缺失值: {summary['missing']}\n\n")
             
             # 列信息
             f.write("2. 数据列信息\n")
             f.write("-" * 60 + "\n")
-            for col in self.merged_data.columns:
-                non_null = self.merged_data[col].notna().sum()
-                f.write(f"{col}: {non_null}/{len(self.merged_data)} ({non_null/len(self.merged_data)*100:.1f}%)\n")
+            for col in stats.columns:
+                non_null = summary['column_stats'][col]['count']
+                f.write(f"{col}: {non_null}/{stats.rows} ({non_null/stats.rows*100:.1f}%)\n")
             f.write("\n")
             
             # 统计指标
             f.write("3. 关键指标统计\n")
             f.write("-" * 60 + "\n")
             for col in ['quality_level', 'cost_level', 'income_group_score', 'composite_score']:
-                if col in self.merged_data.columns:
-                    stats = self.merged_data[col].describe()
+                if col in stats.digests:
+                    col_stats = stats.column(col)
                     f.write(f"\n{col}:\n")
-                    f.write(f"  平均值: {stats['mean']:.2f}\n")
-                    f.write(f"  中位数: {stats['50%']:.2f}\n")
-                    f.write(f"  最小值: {stats['min']:.2f}\n")
-                    f.write(f"  最大值: {stats['max']:.2f}\n")
+                    f.write(f"  平均值: {col_stats['mean']:.2f}\n")
+                    f.write(f"  中位数: {col_stats['50%']:.2f}\n")
+                    f.write(f"  最小值: {col_stats['min']:.2f}\n")
+                    f.write(f"  最大值: {col_stats['max']:.2f}\n")
             
             # 顶部和底部国家
-            if 'composite_score' in self.merged_data.columns:
+            if 'composite_score' in stats.top:
                 f.write("\n4. 综合评分排名\n")
                 f.write("-" * 60 + "\n")
                 f.write("前10名:\n")
-                top10 = self.merged_data.nlargest(10, 'composite_score')[['country_name', 'composite_score']]
-                for idx, row in top10.iterrows():
-                    f.write(f"  {row['country_name']}: {row['composite_score']}\n")
+                for name, score in stats.top['composite_score'].records():
+                    f.write(f"  {name}: {score}\n")
                 
                 f.write("\n底部10名:\n")
-                bottom10 = self.merged_data.nsmallest(10, 'composite_score')[['country_name', 'composite_score']]
-                for idx, row in bottom10.iterrows():
-                    f.write(f"  {row['country_name']}: {row['composite_score']}\n")
+                for name, score in stats.bottom['composite_score'].records():
+                    f.write(f"  {name}: {score}\n")
         
-        print(f"✓ Report saved to {output_path}")
+        json_path = output_path.with_suffix('.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        
+        print(f"✓ Report saved to {output_path} and {json_path}")
     
-    def run_pipeline(self):
-        """执行完整的数据处理管道"""
+    def run_pipeline(self, report_file=None, profile=None, trace_memory=None):
+        """
+        执行完整的数据处理管道
+        每个阶段的耗时、内存和行列数写入 JSON 运行报告（见 instrumentation.py）
+        """
+        recorder = RunRecorder('v1', report_file, profile, trace_memory)
         print("\n" + "=" * 60)
         print("开始数据清洗和预处理管道")
         print("=" * 60)
         
-        # 1. 加载数据
-        self.load_data()
-        
-        # 2. 合并数据
-        self.merge_all_data()
-        
-        # 3. 创建综合评分
-        self.merged_data = self.create_composite_score()
-        
-        # 4. 保存结果
-        self.save_cleaned_data('cleaned_countries_data.csv')
-        self.save_cleaned_data('cleaned_countries_data.json')
-        self.save_summary_report()
+        # 输入文件和代码都未变化且输出未被改动时，直接沿用上次结果
+        outputs = [self.data_dir / name for name in
+                   ('cleaned_countries_data.csv', 'cleaned_countries_data.json', 'data_summary.txt',
+                    'data_summary.json')]
+        outputs += columnar_paths(self.data_dir / 'cleaned_countries_data.csv')
+        run_key = None
+        if self.cache is not None:
+            run_key = self.cache.key(
+                str(Path(self.data_dir).resolve()),
+                [self.cache.file_digest(self.data_dir / name) for name in INPUT_FILES + ALIAS_METADATA_FILES],
+                {name: self.cache.file_digest(path) for name, path in self._wdi_paths().items()},
+                self.wdi_indicators, self.weights,
+                code_digest(self.cache, *CODE_FILES),
+            )
+            merged = self.cache.get_run('v1-run', run_key, outputs)
+            if merged is not None:
+                self.cache.flush()
+                self.merged_data = merged
+                print("✓ 输入和参数均未变化，沿用已有的输出文件")
+                recorder.finish(cache_hit=True)
+                return self.merged_data
+        
+        # 加载 → 清洗 → 合并 → 综合评分 → 保存，按节点依赖并行运行
+        self.pipeline.run(EXPORT_NODES, recorder)
+        results = self.pipeline.results
+        for attribute in (*RAW_FILES, 'economy_data'):
+            setattr(self, attribute, results[f'load:{attribute}'])
+        self.merged_data = results['composite']
+        
+        if self.cache is not None:
+            self.cache.put_run('v1-run', run_key, outputs, self.merged_data)
+            self.cache.flush()
+        
+        recorder.finish()
         
         print("\n" + "=" * 60)
         print("✓ 数据处理完成！")
@@ -450,8 +568,11 @@ class DataCleaner:
 
 if __name__ == "__main__":
     # 创建清洁器实例并运行
+    parser = argparse.ArgumentParser(description='数据清洗和预处理管道 v1')
+    args = instrumentation.add_arguments(parser).parse_args()
+    
     cleaner = DataCleaner()
-    cleaned_data = cleaner.run_pipeline()
+    cleaned_data = cleaner.run_pipeline(**instrumentation.recorder_options(args))
     
     # 显示处理结果示例
     print("\n数据示例（前5行）:")
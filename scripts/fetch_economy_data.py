@@ -0,0 +1,280 @@
+"""
+经济数据抓取脚本（异步版）
+用途：从 REST Countries 和世界银行 API 获取各国经济指标，生成 DataCleaner.load_data 读取的 economy_situation.json
+
+与 fetch_economy_data.js 相比：
+  - 整个运行只用一个连接池会话
+  - 国家代码由一次 REST Countries /all 请求在本地匹配，匹配不到的再单独查询
+  - 世界银行指标按多个国家一批查询（/country/A;B;C/indicator/...），并自动翻页
+  - 并发数有上限，失败请求按指数退避重试，响应缓存在 .cache/http/
+
+用法：
+    python scripts/fetch_economy_data.py
+    python scripts/fetch_economy_data.py --data-dir data/dataset_exercise
+    # 离线测试：先启动 python scripts/wb_stub_server.py，再
+    python scripts/fetch_economy_data.py --worldbank-url http://127.0.0.1:8765/v2 \\
+        --restcountries-url http://127.0.0.1:8765/v3.1 --no-cache
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+DATA_DIR = Path('./data')
+HTTP_CACHE_DIR = Path('./.cache/http')
+
+WORLDBANK_URL = 'https://api.worldbank.org/v2'
+RESTCOUNTRIES_URL = 'https://restcountries.com/v3.1'
+
+# 指标：输出列名 → 世界银行指标代码
+INDICATORS = {
+    'gdp': 'NY.GDP.MKTP.CD',            # GDP (current US$)
+    'gdp_per_capita': 'NY.GDP.PCAP.CD',  # GDP per capita (current US$)
+    'population': 'SP.POP.TOTL',         # Population
+    'inflation': 'FP.CPI.TOTL.ZG',       # Inflation rate
+    'gni_per_capita': 'NY.GNP.PCAP.CD',  # GNI per capita
+}
+YEAR = 2022
+
+# 每次世界银行请求包含的国家数（受 URL 长度限制）
+BATCH_SIZE = 50
+PER_PAGE = 1000
+MAX_CONCURRENCY = 8
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+TIMEOUT_SECONDS = 30
+# 缓存的响应在这段时间内直接复用
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 缓存未命中的标记（与缓存中的 null 响应区分）
+MISSING = object()
+
+
+class ResponseCache:
+    """按 URL 哈希保存 JSON 响应（404 保存为 null），过期后重新请求"""
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, ttl=CACHE_TTL_SECONDS, enabled=True):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.enabled = enabled
+        if enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url):
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url):
+        """返回缓存的响应；未缓存或已过期时返回 MISSING"""
+        if not self.enabled:
+            return MISSING
+        path = self._path(url)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return MISSING
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['data']
+        except (OSError, ValueError, KeyError, TypeError):
+            return MISSING
+
+    def put(self, url, data):
+        if not self.enabled:
+            return
+        path = self._path(url)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'data': data}, f)
+        os.replace(tmp_path, path)
+
+
+class Fetcher:
+    """共享一个连接池会话的 JSON 请求器：并发上限、重试退避、磁盘缓存"""
+
+    def __init__(self, session, cache, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES,
+                 backoff=BACKOFF_SECONDS):
+        self.session = session
+        self.cache = cache
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats = {'requests': 0, 'cache_hits': 0, 'retries': 0, 'failures': 0}
+
+    async def get_json(self, url):
+        """GET 并解析 JSON；重试用尽或 404 时返回 None"""
+        cached = self.cache.get(url)
+        if cached is not MISSING:
+            self.stats['cache_hits'] += 1
+            return cached
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * (1 + random.random()))
+            try:
+                async with self.semaphore:
+                    self.stats['requests'] += 1
+                    async with self.session.get(url) as response:
+                        if response.status in RETRY_STATUSES:
+                            continue
+                        if response.status == 404:
+                            data = None
+                        else:
+                            response.raise_for_status()
+                            data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                continue
+            self.cache.put(url, data)
+            return data
+
+        self.stats['failures'] += 1
+        return None
+
+
+def _name_key(name):
+    return ' '.join(str(name).casefold().split())
+
+
+async def resolve_country_codes(fetcher, names, base_url=RESTCOUNTRIES_URL):
+    """
+    国家名称 → ISO3 代码
+    先用一次 /all 请求建立本地索引（常用名、正式名、别名），匹配不到的再并发调用 /name/ 搜索
+    """
+    index = {}
+    countries = await fetcher.get_json(f'{base_url}/all?fields=name,cca3,altSpellings') or []
+    for country in countries:
+        code = country.get('cca3')
+        if not code:
+            continue
+        name = country.get('name') or {}
+        for alias in [name.get('common'), name.get('official'), *(country.get('altSpellings') or [])]:
+            if alias:
+                index.setdefault(_name_key(alias), code)
+
+    codes = {name: index.get(_name_key(name)) for name in names}
+    unresolved = [name for name, code in codes.items() if code is None]
+
+    async def search(name):
+        data = await fetcher.get_json(f'{base_url}/name/{quote(name)}?fields=cca3')
+        if isinstance(data, list) and data:
+            return data[0].get('cca3')
+        return None
+
+    for name, code in zip(unresolved, await asyncio.gather(*(search(name) for name in unresolved))):
+        codes[name] = code
+    return codes
+
+
+async def fetch_indicator(fetcher, codes, indicator, year=YEAR, base_url=WORLDBANK_URL,
+                          batch_size=BATCH_SIZE):
+    """按批查询一个指标，返回 {ISO3: value}"""
+    batches = [codes[i:i + batch_size] for i in range(0, len(codes), batch_size)]
+
+    async def fetch_batch(batch):
+        values = {}
+        page, pages = 1, 1
+        while page <= pages:
+            url = (f"{base_url}/country/{';'.join(batch)}/indicator/{indicator}"
+                   f"?format=json&date={year}&per_page={PER_PAGE}&page={page}")
+            data = await fetcher.get_json(url)
+            if not isinstance(data, list) or len(data) < 2 or not data[1]:
+                break
+            pages = int(data[0].get('pages') or 1)
+            for row in data[1]:
+                code = row.get('countryiso3code') or (row.get('country') or {}).get('id')
+                if code and row.get('value') is not None:
+                    values[code] = row['value']
+            page += 1
+        return values
+
+    values = {}
+    for result in await asyncio.gather(*(fetch_batch(batch) for batch in batches)):
+        values.update(result)
+    return values
+
+
+async def fetch_economy_data(names, worldbank_url=WORLDBANK_URL, restcountries_url=RESTCOUNTRIES_URL,
+                             year=YEAR, cache=None, max_concurrency=MAX_CONCURRENCY):
+    """抓取所有国家的经济指标，返回与 fetch_economy_data.js 相同结构的记录列表和请求统计"""
+    if aiohttp is None:
+        raise ImportError("fetch_economy_data.py requires aiohttp (pip install aiohttp)")
+    cache = cache or ResponseCache()
+
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT_SECONDS)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        fetcher = Fetcher(session, cache, max_concurrency)
+        country_codes = await resolve_country_codes(fetcher, names, restcountries_url)
+
+        codes = sorted({code for code in country_codes.values() if code})
+        results = await asyncio.gather(*(
+            fetch_indicator(fetcher, codes, indicator, year, worldbank_url)
+            for indicator in INDICATORS.values()
+        ))
+
+    indicator_values = dict(zip(INDICATORS, results))
+    records = []
+    for name in names:
+        code = country_codes.get(name)
+        if not code:
+            records.append({'country_name': name, 'country_code': None, 'error': 'Country code not found'})
+            continue
+        record = {'country_name': name, 'country_code': code, 'year': year}
+        for key in INDICATORS:
+            record[key] = indicator_values[key].get(code)
+        records.append(record)
+    return records, fetcher.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--output', type=Path, default=None, help='默认写入 <data-dir>/economy_situation.json')
+    parser.add_argument('--year', type=int, default=YEAR)
+    parser.add_argument('--worldbank-url', default=WORLDBANK_URL)
+    parser.add_argument('--restcountries-url', default=RESTCOUNTRIES_URL)
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY)
+    parser.add_argument('--no-cache', action='store_true', help='不读写 .cache/http 中的响应缓存')
+    args = parser.parse_args()
+
+    names = pd.read_csv(args.data_dir / 'country_name.csv')['country_name'].dropna().str.strip()
+    names = [name for name in names if name]
+    print(f"Found {len(names)} countries to process...")
+
+    start = time.perf_counter()
+    records, stats = asyncio.run(fetch_economy_data(
+        names,
+        worldbank_url=args.worldbank_url.rstrip('/'),
+        restcountries_url=args.restcountries_url.rstrip('/'),
+        year=args.year,
+        cache=ResponseCache(enabled=not args.no_cache),
+        max_concurrency=args.concurrency,
+    ))
+    elapsed = time.perf_counter() - start
+
+    output = args.output or args.data_dir / 'economy_situation.json'
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+
+    failed = sum(1 for record in records if 'error' in record)
+    print(f"✓ Data saved to {output}")
+    print(f"Successful: {len(records) - failed}, Failed: {failed}")
+    print(f"HTTP requests: {stats['requests']}, cache hits: {stats['cache_hits']}, "
+          f"retries: {stats['retries']}, failures: {stats['failures']}, elapsed: {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,532 @@
+"""
+指标管道
+用途：按 IndexPipelineConfig 把数据源读取、合并、归一化、等级派生和导出声明为
+     pipeline_engine 的节点；V2 与 V3 只是两份不同的配置
+
+节点命名：
+    country_codes / source:<列名> / baseline / aliases / country_names   读取
+    frame                                                                 合并
+    imputed                                                               近邻插补（可选）
+    normalized:<指标列> / level:<等级列>                                  每列一个节点
+    table → export → json / columnar / ranking_table / similarity_index   组装和导出
+                   / client_payload
+
+backend='polars' 时（只支持按国家代码对齐、没有 baseline_file 的配置）读取到选择导出列
+合并为一个 export 节点，由 polars_backend 构建的 LazyFrame 查询一次完成。
+"""
+
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import client_payload
+import columnar_export
+import compact_dtypes
+import json_export
+import knn_imputation
+import level_binning
+import pipeline_engine
+import polars_backend
+import source_loader
+from client_payload import client_payload_paths, print_sizes, write_client_payload
+from columnar_export import columnar_paths, write_columnar
+from compact_dtypes import compact_frame, expand_float32, expand_frame, memory_report
+from country_aliases import load_alias_index
+from instrumentation import RunRecorder
+from json_export import preview_records, to_records, write_json
+from knn_imputation import impute_frame
+from pipeline_cache import PipelineCache
+from pipeline_engine import Pipeline
+from ranking_table import build_ranking_table, ranking_table_path
+from similarity_index import load_similarity_index, similarity_index_path
+from source_loader import (COUNTRY_METADATA_FILE, align_sources, load_country_codes,
+                           read_country_names, read_source)
+
+DATA_DIR = Path('./data')
+
+# 所有版本共用的管道代码，修改后节点缓存和整次运行缓存自动失效
+CODE_FILES = [__file__, pipeline_engine.__file__, level_binning.__file__, source_loader.__file__,
+              json_export.__file__, columnar_export.__file__, compact_dtypes.__file__, polars_backend.__file__,
+              knn_imputation.__file__, client_payload.__file__]
+
+BACKENDS = ('pandas', 'polars')
+
+# 紧凑模式下转为 categorical 的国家键列（V3 的国家代码本身就是 CategoricalIndex）
+KEY_COLUMNS = ['country_name']
+
+
+class IndexPipelineConfig:
+    """
+    一个管道版本的全部差异
+
+    sources: [(文件名, 分数列, 输出列名)]，第一项为基础数据源；不存在的文件跳过
+    normalize: {指标列: (原始最小值, 原始最大值)}，归一化为 指标列_normalized
+    levels: [(等级列, 指标列, LevelBins)]，由 指标列_normalized 派生
+    export_columns: 导出的列（不存在的跳过）
+    baseline_file: 已清洗的基础表（按国家名称），数据源通过别名索引按代码连接；
+                   为 None 时以第一个数据源为基础、按国家代码对齐，导出时附加名称和代码
+    per_source_cache: 归一化列的缓存只依赖自身数据源和基础数据源，其他数据源变化时不重算
+    """
+
+    def __init__(self, name, title, sources, normalize, levels, export_columns,
+                 baseline_file=None, baseline_columns=(), standard_names_file=None,
+                 coverage_columns=(), preview_fields=(), ranking_table=False, similarity_index=False,
+                 client_payload=False, per_source_cache=False, code_files=()):
+        self.name = name
+        self.title = title
+        self.sources = list(sources)
+        self.normalize = dict(normalize)
+        self.levels = list(levels)
+        self.export_columns = list(export_columns)
+        self.baseline_file = baseline_file
+        self.baseline_columns = list(baseline_columns)
+        self.standard_names_file = standard_names_file
+        self.coverage_columns = list(coverage_columns)
+        self.preview_fields = list(preview_fields)
+        self.ranking_table = ranking_table
+        self.similarity_index = similarity_index
+        self.client_payload = client_payload
+        self.per_source_cache = per_source_cache
+        self.code_files = list(code_files)
+
+    def fingerprint(self):
+        """参与整次运行缓存 key 的配置内容"""
+        return [self.name, self.sources, self.normalize, self.levels, self.export_columns,
+                self.baseline_file, self.baseline_columns, self.standard_names_file, self.ranking_table,
+                self.similarity_index, self.client_payload]
+
+
+def normalize_to_ten_scale(series, old_min=None, old_max=None):
+    """将指标归一化到 1-10 范围"""
+    # 移除 'N/A' 和非数值
+    valid_data = pd.to_numeric(series, errors='coerce')
+    valid_data = valid_data.dropna()
+
+    if len(valid_data) == 0:
+        return series  # 全是NaN，返回原值
+
+    if old_min is None:
+        old_min = valid_data.min()
+    if old_max is None:
+        old_max = valid_data.max()
+
+    # 避免除以0
+    if old_max == old_min:
+        return series.apply(lambda x: 5 if pd.notna(x) else np.nan)
+
+    # 线性归一化到 1-10
+    normalized = (valid_data - old_min) / (old_max - old_min) * 9 + 1
+
+    # 将归一化结果放回原series位置
+    result = series.copy()
+    result[valid_data.index] = normalized
+    return result
+
+
+class IndexPipeline:
+    """
+    由配置生成节点图的清洗器
+
+    load_all_data / normalize_indices / create_preference_levels / save_to_json 分别运行对应的节点组，
+    可以逐阶段调用；run_pipeline 一次并行运行整张图。
+
+    compact=True 时合并表的指标列为 float32、国家名称为 categorical（等级列本来就是 int8 编码的
+    categorical），只在导出节点还原为 float64 和文本；组装完成后打印并记录转换前后的内存占用。
+    归一化列（以及 impute 时被填补的指标列）在 float64 下计算并保持 float64，写出的文件与标准模式逐字节相同。
+
+    impute=k 时在合并与归一化之间插入 imputed 节点：缺失的指标用已有指标上最相似的 k 个国家的均值填补，
+    导出表为每个指标列附加 指标列_imputed 标记（True 表示该值是填补的）。
+    """
+
+    config = None
+    normalize_to_ten_scale = staticmethod(normalize_to_ten_scale)
+
+    def __init__(self, use_cache=True, max_workers=None, compact=False, backend='pandas', impute=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        if backend == 'polars':
+            if self.config.baseline_file is not None:
+                raise ValueError("The polars backend only supports code-aligned pipelines (no baseline_file)")
+            if compact:
+                raise ValueError("Compact mode is not supported by the polars backend")
+            if impute:
+                raise ValueError("Imputation is not supported by the polars backend")
+            if polars_backend.pl is None:
+                print("⚠ polars not installed, falling back to the pandas backend")
+                backend = 'pandas'
+        self.merged_data = None
+        self.country_names = None
+        self.compact = compact
+        self.backend = backend
+        self.impute = impute or None
+        self.memory_report = None
+        # 内容哈希缓存：每个节点按其输入文件、参数和上游节点缓存
+        self.cache = PipelineCache() if use_cache else None
+        self.code_files = CODE_FILES + self.config.code_files
+        self.sources = [source for source in self.config.sources if (DATA_DIR / source[0]).exists()]
+        missing = [filename for filename, _, _ in self.config.sources if not (DATA_DIR / filename).exists()]
+        if not self.sources:
+            raise FileNotFoundError(f"No {self.config.name} data sources found in {DATA_DIR}: {', '.join(missing)}")
+        for filename in missing:
+            print(f"⚠ {DATA_DIR / filename} not found, skipping")
+        # 紧凑模式的节点结果类型不同，使用独立的缓存条目
+        name = f'{self.config.name}-compact' if compact else self.config.name
+        if backend != 'pandas':
+            name = f'{name}-{backend}'
+        if self.impute:
+            name = f'{name}-impute{self.impute}'
+        self.pipeline = Pipeline(name, self.cache, self.code_files, max_workers)
+        self.columns = {}
+        if backend == 'polars':
+            self._add_lazy_nodes()
+        else:
+            self._add_data_nodes()
+
+    # ---------- 节点图 ----------
+
+    def _add_data_nodes(self):
+        config, pipeline = self.config, self.pipeline
+        metadata = DATA_DIR / COUNTRY_METADATA_FILE
+        source_files = {output_name: DATA_DIR / filename for filename, _, output_name in self.sources}
+
+        pipeline.add('country_codes', partial(load_country_codes, DATA_DIR), inputs=[metadata])
+        for filename, score_column, output_name in self.sources:
+            pipeline.add(f'source:{output_name}',
+                         partial(read_source, DATA_DIR / filename, score_column, output_name),
+                         params=score_column, inputs=[DATA_DIR / filename])
+        source_nodes = [f'source:{output_name}' for _, _, output_name in self.sources]
+
+        if config.baseline_file is None:
+            base_file = DATA_DIR / self.sources[0][0]
+            pipeline.add('frame', self._merge_sources, ['country_codes', *source_nodes])
+            pipeline.add('country_names', partial(self._country_names, base_file), ['country_codes'],
+                         inputs=[base_file])
+            frame_columns = [output_name for _, _, output_name in self.sources]
+        else:
+            base_file = DATA_DIR / config.baseline_file
+            pipeline.add('baseline', partial(self._read_baseline, base_file),
+                         params=config.baseline_columns, inputs=[base_file])
+            # 别名索引自带缓存；inputs 仍需列全，下游 frame 的缓存 key 依赖它们
+            alias_inputs = [*source_files.values(), DATA_DIR / config.standard_names_file, metadata]
+            pipeline.add('aliases', partial(load_alias_index, list(source_files.values()),
+                                            DATA_DIR / config.standard_names_file, [metadata], self.cache),
+                         inputs=alias_inputs, cache=False)
+            pipeline.add('frame', self._join_baseline, ['baseline', 'country_codes', 'aliases', *source_nodes])
+            frame_columns = config.baseline_columns + [output_name for _, _, output_name in self.sources]
+
+        frame = self.frame_node = 'frame'
+        if self.impute:
+            # 插补用到所有指标列，下游的归一化不能再只按自身数据源缓存
+            frame = self.frame_node = pipeline.add('imputed', self._impute, ['frame'], params=self.impute)
+
+        # 每个指标列一个归一化节点，每个等级列一个派生节点，互不依赖的列并行计算
+        for col, (min_val, max_val) in config.normalize.items():
+            if col not in frame_columns:
+                continue
+            options = {}
+            if config.per_source_cache and not self.impute:
+                options = {'inputs': [source_files.get(col, base_file), base_file, metadata], 'key_deps': ()}
+            node = pipeline.add(f'normalized:{col}', partial(self._normalize, col, min_val, max_val), [frame],
+                                params=(min_val, max_val), **options)
+            self.columns[node] = col + '_normalized'
+
+        for level_col, index_col, bins in config.levels:
+            if f'normalized:{index_col}' not in pipeline.nodes:
+                continue
+            node = pipeline.add(f'level:{level_col}', partial(self._derive_level, level_col, bins),
+                                [f'normalized:{index_col}'], params=bins)
+            self.columns[node] = level_col
+
+        pipeline.add('table', self._assemble, [frame, *self.columns], cache=False)
+        deps = ['table'] if config.baseline_file is not None else ['table', 'country_names']
+        pipeline.add('export', self._export_frame, deps, cache=False)
+
+    def _add_lazy_nodes(self):
+        """整个 读取 → 归一化 → 分级 → 选择 查询是一个节点，按全部数据源和元数据文件缓存"""
+        inputs = [DATA_DIR / filename for filename, _, _ in self.sources] + [DATA_DIR / COUNTRY_METADATA_FILE]
+        self.pipeline.add('export', self._collect_lazy, params=self.config.fingerprint(), inputs=inputs)
+
+    def _add_exporters(self, output_file, json_format, columnar, lookups):
+        """写出节点依赖输出参数，每次保存时重新添加；json、columnar 并行写出"""
+        pipeline = self.pipeline
+        targets = [pipeline.add('json', partial(self._write_json, output_file, json_format), ['export'],
+                                replace=True, cache=False)]
+        if columnar:
+            targets.append(pipeline.add('columnar', partial(self._write_columnar, output_file), ['export'],
+                                        replace=True, cache=False))
+        if lookups and self.config.ranking_table:
+            # 预先计算全部问卷答案组合的推荐排名（读取写出的 JSON）
+            targets.append(pipeline.add('ranking_table', partial(self._build_ranking_table, output_file),
+                                        ['json'], replace=True, cache=False))
+        if lookups and self.config.similarity_index:
+            # 相似国家距离矩阵：只重算取值变化的国家
+            targets.append(pipeline.add('similarity_index', partial(self._update_similarity_index, output_file),
+                                        ['json'], replace=True, cache=False))
+        if lookups and self.config.client_payload:
+            # 前端用的精简数据包和预压缩文件；大小对比需要读取写出的完整 JSON
+            targets.append(pipeline.add('client_payload', partial(self._write_client_payload, output_file),
+                                        ['export', 'json'], replace=True, cache=False))
+        return targets
+
+    # ---------- 节点函数 ----------
+
+    def _merge_sources(self, country_codes, *columns):
+        """以第一个数据源的行为准，按标准国家代码分类一次性对齐"""
+        df = align_sources(columns, categories=country_codes.index)
+        for (filename, _, output_name) in self.sources:
+            print(f"✓ Loaded {filename}: {df[output_name].notna().sum()} values")
+        print(f"✓ Merged {len(self.sources)} sources: {len(df)} countries")
+        return compact_frame(df, KEY_COLUMNS) if self.compact else df
+
+    @staticmethod
+    def _country_names(base_file, country_codes):
+        """国家名称只在导出时附加：基础数据源的拼写优先，缺失时用WDI标准名称"""
+        return read_country_names(base_file).combine_first(country_codes)
+
+    def _read_baseline(self, path):
+        df = pd.read_csv(path)[self.config.baseline_columns].copy()
+        print(f"✓ Loaded baseline data: {len(df)} countries")
+        return df
+
+    def _join_baseline(self, df, country_codes, aliases, *columns):
+        """基础表只有国家名称，先通过别名索引查出对应代码，再按共享分类的整数编码对齐"""
+        if not columns:
+            return compact_frame(df, KEY_COLUMNS) if self.compact else df
+        indices = align_sources(columns, how='outer', categories=country_codes.index)
+        df = df.copy()
+        # 别名索引中有、但数据源和元数据中都没有的代码视为未匹配（不能构造分类外的值）
+        codes = aliases.resolve(df['country_name'])
+        codes[~pd.Index(codes).isin(indices.index.categories)] = None
+        df['country_code'] = pd.Categorical(codes, dtype=indices.index.dtype)
+        df = df.join(indices, on='country_code')
+        print(f"✓ Matched {df['country_code'].notna().sum()}/{len(df)} countries by country code")
+        for filename, _, output_name in self.sources:
+            print(f"✓ Merged {output_name} from {filename}")
+        return compact_frame(df, KEY_COLUMNS) if self.compact else df
+
+    def _impute(self, frame):
+        """缺失的指标列用近邻均值填补，标记列追加在合并表末尾"""
+        columns = [col for col in self.config.normalize if col in frame.columns]
+        if self.compact:
+            # 填补值是近邻均值，存为 float32 会改变导出值；指标列还原为 float64 后再计算距离和填补
+            frame = frame.assign(**{col: expand_float32(frame[col]) for col in columns})
+        df, flags = impute_frame(frame, columns, self.impute)
+        for col in columns:
+            df[f'{col}_imputed'] = flags[col]
+        print(f"✓ Imputed {int(flags.to_numpy().sum())} missing values in {int(flags.any(axis=1).sum())} "
+              f"countries from {self.impute} nearest neighbours")
+        return df
+
+    def _normalize(self, col, min_val, max_val, frame):
+        values = frame[col]
+        if values.dtype == np.float32:
+            # 还原为 float64 后计算并保留 float64：降为 float32 会改变导出值的最后几位
+            values = expand_float32(values)
+        result = normalize_to_ten_scale(values, min_val, max_val)
+        print(f"✓ Normalized {col}")
+        return result
+
+    @staticmethod
+    def _derive_level(level_col, bins, normalized):
+        result = bins.cut(normalized)
+        print(f"✓ Created {level_col}")
+        return result
+
+    def _assemble(self, frame, *columns):
+        """合并表 + 归一化列 + 等级列（按声明顺序追加）"""
+        df = frame.copy()
+        for node, values in zip(self.columns, columns):
+            df[self.columns[node]] = values
+        if self.compact:
+            self.memory_report = memory_report(df, KEY_COLUMNS)
+            print(f"✓ Compact dtypes: merged frame {self.memory_report['standard_mb']:.2f} MB → "
+                  f"{self.memory_report['compact_mb']:.2f} MB ({self.memory_report['saved_percent']}% saved)")
+        return df
+
+    def _collect_lazy(self):
+        plan = polars_backend.build_plan(self.config, DATA_DIR, self.sources, COUNTRY_METADATA_FILE)
+        export_data = polars_backend.collect_export(plan, self.config)
+        print(f"✓ Loaded, normalized and leveled {len(self.sources)} sources in one lazy query: "
+              f"{len(export_data)} countries")
+        return export_data
+
+    def _export_frame(self, table, country_names=None):
+        """选择导出列；按代码对齐的表在导出边缘附加国家名称和代码"""
+        export_cols = [col for col in self.config.export_columns if col in table.columns]
+        if self.impute:
+            export_cols += [f'{col}_imputed' for col in self.config.normalize if f'{col}_imputed' in table.columns]
+        export_data = table[export_cols].copy()
+        if self.compact:
+            # 导出边缘：float32 还原为 float64、国家名称还原为文本，写出的文件与标准模式结构相同
+            export_data = expand_frame(export_data, KEY_COLUMNS)
+
+        if country_names is None:
+            # 移除country_name为NaN的行
+            return export_data.dropna(subset=['country_name'])
+
+        codes = table.index.astype(str)
+        export_data.insert(0, 'country_code', codes)
+        export_data.insert(0, 'country_name', country_names.reindex(codes).to_numpy())
+        return export_data.reset_index(drop=True)
+
+    @staticmethod
+    def _write_json(output_file, json_format, export_data):
+        print(f"\nSaving to {output_file}...")
+        # 按列分块流式写出，缺失值向量化地写为 null
+        n_rows = write_json(export_data, output_file, json_format=json_format)
+        print(f"✓ Saved {n_rows} countries to {output_file}")
+        return n_rows
+
+    @staticmethod
+    def _write_columnar(output_file, export_data):
+        # 带类型的列式产物，等级列（categorical）为字典编码
+        paths = write_columnar(export_data, output_file)
+        for path in paths:
+            print(f"✓ Saved columnar copy to {path}")
+        return paths
+
+    @staticmethod
+    def _build_ranking_table(output_file, n_rows):
+        table_file = build_ranking_table(output_file)
+        print(f"✓ Ranking table saved to {table_file}")
+        return table_file
+
+    @staticmethod
+    def _write_client_payload(output_file, export_data, n_rows):
+        sizes = write_client_payload(export_data, output_file)
+        for path, size in sizes.items():
+            print(f"✓ Saved client payload to {path} ({size} bytes)")
+        print_sizes(output_file)
+        return list(sizes)
+
+    @staticmethod
+    def _update_similarity_index(output_file, n_rows):
+        load_similarity_index(output_file)
+        return similarity_index_path(output_file)
+
+    # ---------- 阶段 ----------
+
+    def load_all_data(self, recorder=None):
+        """并发加载所有数据源并合并"""
+        print(f"Loading all {len(self.sources)} data sources...")
+        if self.backend == 'polars':
+            return self.build_export_frame(recorder)
+        self.pipeline.run(['frame', *self.pipeline.select('country_names')], recorder)
+        self.merged_data = self.pipeline.results['frame'].copy()
+        self.country_names = self.pipeline.results.get('country_names')
+        return self.merged_data
+
+    def impute_missing(self, recorder=None):
+        """用近邻国家填补缺失的指标（impute 未开启时不做任何事）"""
+        if not self.impute:
+            return self.merged_data
+        print(f"\nImputing missing indicators from {self.impute} nearest neighbours...")
+        self.merged_data = self.pipeline.run(['imputed'], recorder)['imputed'].copy()
+        return self.merged_data
+
+    def normalize_indices(self, recorder=None):
+        """归一化所有指标到 1-10 范围（每列一个节点，并行计算）"""
+        print("\nNormalizing indices to 1-10 scale...")
+        if self.backend == 'polars':
+            return self.build_export_frame(recorder)
+        results = self.pipeline.run(self.pipeline.select('normalized:'), recorder)
+        self.merged_data = self._assemble(self.pipeline.results[self.frame_node], *results.values())
+        return self.merged_data
+
+    def create_preference_levels(self, recorder=None):
+        """为用户偏好创建水平等级"""
+        print("\nCreating preference levels...")
+        if self.backend == 'polars':
+            return self.build_export_frame(recorder)
+        self.merged_data = self.pipeline.run(['table'], recorder)['table']
+        return self.merged_data
+
+    def build_export_frame(self, recorder=None):
+        """只运行到导出表（不写文件）；polars 后端的三个数据阶段都由它完成"""
+        self.merged_data = self.pipeline.run(['export'], recorder)['export']
+        return self.merged_data
+
+    def save_to_json(self, output_file='countries.json', json_format='pretty', columnar=True, recorder=None):
+        """
+        保存为JSON格式
+        json_format: 'pretty'（indent=2）、'compact' 或 'ndjson'，按列分块流式写出
+        columnar: 同时写出同名的 .parquet / .arrow 列式文件
+        返回导出的记录列表（缺失值为 None）；需要 DataFrame 时用 build_export_frame()
+        """
+        return to_records(self._export(output_file, json_format, columnar, False, recorder))
+
+    def _export(self, output_file, json_format, columnar, lookups, recorder):
+        targets = self._add_exporters(output_file, json_format, columnar, lookups)
+        self.pipeline.run(targets, recorder)
+        export_data = self.pipeline.results['export']
+        self.merged_data = self.pipeline.results.get('table', export_data)
+        self.country_names = self.pipeline.results.get('country_names')
+        if recorder is not None and self.memory_report is not None:
+            recorder.note('memory', self.memory_report)
+
+        if self.config.coverage_columns:
+            print(f"\n数据覆盖统计:")
+            for col in self.config.coverage_columns:
+                if col in self.merged_data.columns:
+                    non_null = self.merged_data[col].notna().sum()
+                    coverage = (non_null / len(self.merged_data)) * 100
+                    print(f"  {col}: {non_null}/{len(self.merged_data)} ({coverage:.1f}%)")
+
+        print("\n示例数据（前3个国家）:")
+        for record in preview_records(export_data, 3):
+            fields = ', '.join(f"{label}={record.get(col)}" for label, col in self.config.preview_fields)
+            print(f"  {record['country_name']}: {fields}")
+
+        return export_data
+
+    def run_pipeline(self, output_file='countries.json', json_format='pretty',
+                     report_file=None, profile=None, trace_memory=None):
+        """
+        一次并行运行整张节点图，各节点的耗时、内存和行列数写入 JSON 运行报告
+        返回导出的记录列表（与 save_to_json 相同）
+        """
+        recorder = RunRecorder(self.config.name, report_file, profile, trace_memory)
+        print("=" * 60)
+        print(self.config.title)
+        print("=" * 60)
+
+        # 输入文件、配置和代码都未变化且输出文件未被改动时，直接沿用上次结果
+        outputs = [output_file, *columnar_paths(output_file)]
+        if self.config.ranking_table:
+            outputs.append(ranking_table_path(output_file))
+        if self.config.similarity_index:
+            outputs.append(similarity_index_path(output_file))
+        if self.config.client_payload:
+            outputs += client_payload_paths(output_file)
+        run_key = None
+        if self.cache is not None:
+            inputs = [COUNTRY_METADATA_FILE] + [source[0] for source in self.config.sources]
+            inputs += [path for path in (self.config.baseline_file, self.config.standard_names_file) if path]
+            run_key = self.cache.key(
+                [self.cache.file_digest(DATA_DIR / path) for path in inputs],
+                self.config.fingerprint(), self.compact, self.backend, self.impute, output_file, json_format,
+                [self.cache.file_digest(path) for path in self.code_files],
+            )
+            export_data = self.cache.get_run(f'{self.pipeline.name}-run', run_key, outputs)
+            if export_data is not None:
+                self.cache.flush()
+                print(f"✓ 输入和参数均未变化，沿用已有的 {output_file}")
+                recorder.finish(cache_hit=True)
+                return to_records(export_data)
+
+        print(f"Running {len(self.pipeline.nodes)} pipeline nodes with up to "
+              f"{self.pipeline.workers(recorder)} workers...")
+        export_data = self._export(output_file, json_format, True, True, recorder)
+
+        if self.cache is not None:
+            self.cache.put_run(f'{self.pipeline.name}-run', run_key, outputs, export_data)
+            self.cache.flush()
+        recorder.finish()
+
+        print("\n" + "=" * 60)
+        print("✓ 数据处理完成！")
+        print("=" * 60)
+
+        return to_records(export_data)
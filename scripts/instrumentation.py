@@ -0,0 +1,223 @@
+"""
+管道运行记录
+用途：记录每个阶段的墙钟时间和输出的行列数、整次运行的 tracemalloc 峰值内存（阶段逐个运行时
+     另记每个阶段的 CPU 时间和峰值内存），运行结束后写成 JSON 报告；
+     可选对每个阶段做 cProfile 或采样分析（pyinstrument），此时管道逐个运行阶段
+
+环境变量（命令行参数 --report / --profile 优先）：
+    PIPELINE_REPORT         报告文件路径，默认 .cache/runs/<管道>-<时间>.json
+    PIPELINE_PROFILE        cprofile 或 sample，分析结果写在报告旁
+    PIPELINE_TRACE_MEMORY   设为 0 时不启用 tracemalloc（减少开销）
+"""
+
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+REPORT_DIR = Path('./.cache/runs')
+PROFILE_MODES = ('cprofile', 'sample')
+
+REPORT_ENV = 'PIPELINE_REPORT'
+PROFILE_ENV = 'PIPELINE_PROFILE'
+TRACE_MEMORY_ENV = 'PIPELINE_TRACE_MEMORY'
+
+
+def output_shape(result):
+    """阶段返回值的 (行数, 列数)：DataFrame、记录列表或 (DataFrame, ...) 元组；无法判断时为 (None, None)"""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if isinstance(result, pd.DataFrame):
+        return result.shape
+    if isinstance(result, list):
+        columns = len(result[0]) if result and isinstance(result[0], dict) else None
+        return len(result), columns
+    return None, None
+
+
+class RunRecorder:
+    """
+    一次管道运行的记录器
+
+    用 recorder.run(阶段名, 函数, *参数) 代替直接调用阶段方法，返回值不变；
+    最后调用 finish() 写出报告。
+
+    process_time 和 tracemalloc 都是整个进程的：阶段在多个线程中并发运行（concurrent=True）时
+    只记录每个阶段的墙钟时间，内存只报告整次运行的峰值；启用性能分析时（serial）管道逐个运行阶段，
+    每个阶段的 CPU 时间、峰值内存和分析结果都只属于该阶段。
+    """
+
+    def __init__(self, pipeline, report_file=None, profile=None, trace_memory=None):
+        self.pipeline = pipeline
+        self.started_at = datetime.now(timezone.utc)
+        if report_file is None:
+            report_file = os.environ.get(REPORT_ENV) or \
+                REPORT_DIR / f"{pipeline}-{self.started_at.strftime('%Y%m%dT%H%M%S')}.json"
+        self.report_file = Path(report_file)
+
+        profile = profile or os.environ.get(PROFILE_ENV) or None
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {profile!r}, expected one of {PROFILE_MODES}")
+        if profile == 'sample' and pyinstrument is None:
+            print("⚠ pyinstrument not installed, falling back to cProfile")
+            profile = 'cprofile'
+        self.profile = profile
+
+        if trace_memory is None:
+            trace_memory = os.environ.get(TRACE_MEMORY_ENV, '1') != '0'
+        self.trace_memory = trace_memory
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        self.concurrent = False
+        self._memory_start = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+        self._peak = self._memory_start
+
+        self.stages = []
+        self.notes = {}
+        self.status = 'running'
+        self.cache_hit = False
+        self._start = time.perf_counter()
+
+    @property
+    def serial(self):
+        """
+        性能分析需要阶段逐个运行：cProfile / pyinstrument 只跟踪启动它的线程，
+        且 Python 3.12 起同一时刻只能启用一个 cProfile
+        """
+        return self.profile is not None
+
+    def run(self, stage, func, *args, **kwargs):
+        """运行一个阶段并记录耗时、内存和输出大小（并发运行时只记录墙钟时间和输出大小）"""
+        per_stage = not self.concurrent
+        if self.trace_memory and per_stage:
+            self._update_peak()
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        profiler = self._start_profiler()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        error = None
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            result, error = None, exc
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        profile_file = self._stop_profiler(profiler, stage)
+
+        rows, columns = output_shape(result)
+        record = {'stage': stage, 'wall_seconds': round(wall, 6), 'rows': rows, 'columns': columns}
+        if per_stage:
+            record['cpu_seconds'] = round(cpu, 6)
+        if error is not None:
+            record['error'] = f'{type(error).__name__}: {error}'
+        if self.trace_memory and per_stage:
+            current, peak = tracemalloc.get_traced_memory()
+            self._peak = max(self._peak, peak)
+            record['peak_memory_mb'] = round((peak - memory_before) / (1024 * 1024), 3)
+            record['retained_memory_mb'] = round((current - memory_before) / (1024 * 1024), 3)
+        if profile_file is not None:
+            record['profile'] = str(profile_file)
+        self.stages.append(record)
+        # 阶段失败时也写出报告，再把异常抛给调用方
+        if error is not None:
+            self.finish(status='failed')
+            raise error
+        return result
+
+    def _update_peak(self):
+        """把 tracemalloc 当前的峰值计入整次运行的峰值（reset_peak 之前调用）"""
+        if tracemalloc.is_tracing():
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+
+    def note(self, key, value):
+        """在报告中附加一项与阶段无关的信息（如紧凑模式的内存对比）"""
+        self.notes[key] = value
+
+    def _start_profiler(self):
+        if self.profile == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        if self.profile == 'sample':
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+            return profiler
+        return None
+
+    def _stop_profiler(self, profiler, stage):
+        """停止分析并把结果写在报告旁：cProfile 为 .prof（可用 snakeviz 查看），采样分析为 .html"""
+        if profiler is None:
+            return None
+        self.report_file.parent.mkdir(parents=True, exist_ok=True)
+        if self.profile == 'cprofile':
+            profiler.disable()
+            path = self.report_file.with_name(f"{self.report_file.stem}.{stage}.prof")
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = self.report_file.with_name(f"{self.report_file.stem}.{stage}.html")
+            path.write_text(profiler.output_html(), encoding='utf-8')
+        return path
+
+    def report(self):
+        peak = round((self._peak - self._memory_start) / (1024 * 1024), 3) if self.trace_memory else None
+        return {
+            'pipeline': self.pipeline,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - self._start, 6),
+            'status': self.status,
+            'cache_hit': self.cache_hit,
+            'concurrent_stages': self.concurrent,
+            'peak_memory_mb': peak,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'argv': sys.argv,
+            'stages': self.stages,
+            'notes': self.notes,
+        }
+
+    def finish(self, cache_hit=False, status='completed'):
+        """写出 JSON 报告（原子写入），返回报告路径"""
+        self.cache_hit = cache_hit
+        self.status = status
+        if self.trace_memory:
+            self._update_peak()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.report_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.report_file.with_name(self.report_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(tmp_file, self.report_file)
+        print(f"✓ Run report saved to {self.report_file}")
+        return self.report_file
+
+
+def add_arguments(parser):
+    """给管道脚本的命令行加上 --report / --profile / --no-trace-memory"""
+    parser.add_argument('--report', type=Path, default=None, help=f'运行报告路径（默认读取 ${REPORT_ENV}）')
+    parser.add_argument('--profile', choices=PROFILE_MODES, default=None,
+                        help=f'对每个阶段做性能分析（默认读取 ${PROFILE_ENV}）')
+    parser.add_argument('--no-trace-memory', action='store_true', help='不启用 tracemalloc')
+    return parser
+
+
+def recorder_options(args):
+    """命令行参数 → run_pipeline 的 report_file / profile / trace_memory"""
+    return {'report_file': args.report, 'profile': args.profile,
+            'trace_memory': False if args.no_trace_memory else None}
@@ -0,0 +1,124 @@
+"""
+流式 JSON 导出工具
+用途：直接从 DataFrame 的列数组分块生成 JSON / NDJSON 文本，不构建记录字典列表
+"""
+
+import json
+from json.encoder import encode_basestring, encode_basestring_ascii
+
+import numpy as np
+import pandas as pd
+
+# 每块处理的行数，决定写出时的内存上限
+CHUNK_SIZE = 10000
+
+JSON_FORMATS = ('pretty', 'compact', 'ndjson')
+
+
+def _encode_string(value, ensure_ascii):
+    return encode_basestring_ascii(value) if ensure_ascii else encode_basestring(value)
+
+
+def encode_column(series, ensure_ascii=False):
+    """
+    把一列编码为 JSON 文本片段列表，缺失值为 null
+    浮点数与 json.dump 一致使用 float.__repr__；文本和分类列只对去重后的值编码一次
+    """
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = [_encode_string(value, ensure_ascii) if isinstance(value, str)
+                      else json.dumps(value) for value in dtype.categories.tolist()]
+        lookup = np.array(categories + ['null'], dtype=object)
+        return lookup[series.cat.codes.to_numpy()].tolist()
+
+    if pd.api.types.is_bool_dtype(dtype):
+        missing = series.isna().to_numpy()
+        values = series.to_numpy(dtype=bool, na_value=False)
+        encoded = np.where(values, 'true', 'false').astype(object)
+        encoded[missing] = 'null'
+        return encoded.tolist()
+
+    if pd.api.types.is_integer_dtype(dtype):
+        missing = series.isna().to_numpy()
+        encoded = np.array(list(map(str, series.to_numpy(dtype='int64', na_value=0).tolist())), dtype=object)
+        encoded[missing] = 'null'
+        return encoded.tolist()
+
+    if pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        encoded = np.array(list(map(float.__repr__, values.tolist())), dtype=object)
+        encoded[np.isposinf(values)] = 'Infinity'
+        encoded[np.isneginf(values)] = '-Infinity'
+        encoded[np.isnan(values)] = 'null'
+        return encoded.tolist()
+
+    # 文本/对象列：先去重再编码
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    encoded = [_encode_string(value, ensure_ascii) if isinstance(value, str)
+               else json.dumps(value, ensure_ascii=ensure_ascii, default=str) for value in uniques.tolist()]
+    lookup = np.array(encoded + ['null'], dtype=object)
+    return lookup[codes].tolist()
+
+
+def _row_template(columns, json_format, ensure_ascii):
+    """生成每行对象的 % 格式模板，键名只编码一次"""
+    keys = [json.dumps(str(col), ensure_ascii=ensure_ascii).replace('%', '%%') for col in columns]
+    if json_format == 'pretty':
+        if not keys:
+            return '  {}'
+        fields = ',\n'.join(f'    {key}: %s' for key in keys)
+        return '  {\n' + fields + '\n  }'
+    return '{' + ','.join(f'{key}:%s' for key in keys) + '}'
+
+
+def write_json(df, output_file, json_format='pretty', ensure_ascii=False, chunk_size=CHUNK_SIZE):
+    """
+    流式写出 DataFrame 的每一行
+
+    json_format:
+      'pretty'  与 json.dump(records, indent=2) 字节一致
+      'compact' 无缩进、无多余空格的 JSON 数组
+      'ndjson'  每行一个 JSON 对象
+    返回写出的行数
+    """
+    if json_format not in JSON_FORMATS:
+        raise ValueError(f"Unknown json_format: {json_format!r} (expected one of {JSON_FORMATS})")
+
+    template = _row_template(df.columns, json_format, ensure_ascii)
+    separator = {'pretty': ',\n', 'compact': ',', 'ndjson': '\n'}[json_format]
+    n_rows = len(df)
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        if json_format == 'pretty':
+            f.write('[\n' if n_rows else '[')
+        elif json_format == 'compact':
+            f.write('[')
+
+        for start in range(0, n_rows, chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            columns = [encode_column(chunk.iloc[:, i], ensure_ascii) for i in range(chunk.shape[1])]
+            rows = [template % row for row in zip(*columns)] if columns else [template] * len(chunk)
+            if start:
+                f.write(separator)
+            f.write(separator.join(rows))
+
+        if json_format == 'pretty':
+            f.write('\n]' if n_rows else ']')
+        elif json_format == 'compact':
+            f.write(']')
+        elif n_rows:
+            f.write('\n')
+
+    return n_rows
+
+
+def to_records(df):
+    """整表转为字典列表（缺失值为 None），内容与写出的 JSON 相同"""
+    values = df.astype(object)
+    return values.where(values.notna(), None).to_dict('records')
+
+
+def preview_records(df, n=3):
+    """取前 n 行为字典列表（缺失值为 None），用于打印示例"""
+    return to_records(df.head(n))
@@ -0,0 +1,107 @@
+"""
+缺失指标的近邻插补
+用途：国家缺失的指标用"在它已有指标上最相似的 k 个国家"的取值均值填补，
+     推荐器和归一化之后就不必跳过这些维度
+
+距离只在该国家已有的指标上计算（各列先标准化为 z 分数，避免量纲大的指标主导距离）；
+候选国家为所有指标都有数据的国家。缺失模式相同的国家共用一次近邻查询：
+安装了 scipy 时在候选国家的这些列上建 KD 树，否则按块用矩阵乘法暴力计算距离。
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+DEFAULT_NEIGHBORS = 5
+
+# 某个缺失模式的国家数少于该值时直接暴力计算，建树不划算
+TREE_MIN_QUERIES = 64
+
+# 暴力计算时每块的查询行数，块内距离矩阵为 块大小 × 候选国家数
+BRUTE_CHUNK = 1024
+
+
+def _standardize(values):
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std = np.where(std > 0, std, 1.0)
+    return (values - mean) / std
+
+
+def _brute_neighbors(donors, queries, k):
+    """|q - d|² = |q|² - 2q·d + |d|²，|q|² 对每行是常数，不影响排序"""
+    donor_norms = np.einsum('ij,ij->i', donors, donors)
+    neighbors = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), BRUTE_CHUNK):
+        distances = donor_norms - 2 * (queries[start:start + BRUTE_CHUNK] @ donors.T)
+        neighbors[start:start + BRUTE_CHUNK] = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    return neighbors
+
+
+def _neighbors(donors, queries, k, eps=0.0):
+    """
+    每个查询行的 k 个最近候选行的位置 (查询数, k)
+    eps > 0 时 KD 树返回近似近邻（距离不超过真实第 k 近距离的 1 + eps 倍），查询更快
+    """
+    if cKDTree is not None and len(queries) >= TREE_MIN_QUERIES:
+        # 候选集每个缺失模式只用一次：不平衡划分、不压缩节点，建树更快
+        tree = cKDTree(donors, leafsize=32, balanced_tree=False, compact_nodes=False)
+        _, neighbors = tree.query(queries, k=k, eps=eps, workers=-1)
+        return np.asarray(neighbors, dtype=np.int64).reshape(len(queries), k)
+    return _brute_neighbors(donors, queries, k)
+
+
+def knn_impute(values, k=DEFAULT_NEIGHBORS, eps=0.0):
+    """
+    values: (国家数, 指标数) 的矩阵，缺失为 NaN
+    返回 (填补后的 float64 矩阵, 被填补位置的布尔掩码)
+    全为空的指标、没有任何已有指标的国家保持缺失；完整国家少于 k 个时用全部完整国家
+    """
+    values = np.array(values, dtype=np.float64)
+    missing = np.isnan(values)
+    imputed = np.zeros_like(missing)
+
+    usable = np.flatnonzero(~missing.all(axis=0))
+    observed_values, observed_missing = values[:, usable], missing[:, usable]
+    complete = np.flatnonzero(~observed_missing.any(axis=1))
+    rows = np.flatnonzero(observed_missing.any(axis=1) & ~observed_missing.all(axis=1))
+    k = min(k, len(complete))
+    if k == 0 or len(rows) == 0:
+        return values, imputed
+
+    scaled = _standardize(observed_values)
+    scaled_donors, donor_values = scaled[complete], observed_values[complete]
+
+    # 按缺失模式分组：同一组的国家在相同的列上计算距离、填补相同的列
+    # 每行先按位打包，再按行去重（比直接对布尔矩阵去重快数倍，列数不受限制）
+    packed, inverse = np.unique(np.packbits(observed_missing[rows], axis=1), axis=0, return_inverse=True)
+    patterns = np.unpackbits(packed, axis=1, count=len(usable)).astype(bool)
+    order = np.argsort(inverse.ravel(), kind='stable')
+    bounds = np.searchsorted(inverse.ravel()[order], np.arange(len(patterns) + 1))
+    for p in range(len(patterns)):
+        recipients = rows[order[bounds[p]:bounds[p + 1]]]
+        pattern = patterns[p]
+        observed, targets = np.flatnonzero(~pattern), np.flatnonzero(pattern)
+        neighbors = _neighbors(scaled_donors[:, observed], scaled[np.ix_(recipients, observed)], k, eps)
+        cells = np.ix_(recipients, usable[targets])
+        values[cells] = donor_values[:, targets][neighbors].mean(axis=1)
+        imputed[cells] = True
+    return values, imputed
+
+
+def impute_frame(df, columns, k=DEFAULT_NEIGHBORS, eps=0.0):
+    """
+    对 df 中的 columns 做近邻插补，返回 (填补后的 DataFrame, 同形状的布尔标记 DataFrame)
+    只改写被填补的单元格，已有值和列的 dtype 不变
+    """
+    columns = [col for col in columns if col in df.columns]
+    filled, imputed = knn_impute(df[columns].to_numpy(dtype=np.float64, na_value=np.nan), k, eps)
+    df = df.copy()
+    for j, col in enumerate(columns):
+        if imputed[:, j].any():
+            df[col] = df[col].mask(imputed[:, j], filled[:, j].astype(df[col].dtype))
+    return df, pd.DataFrame(imputed, index=df.index, columns=columns)
@@ -0,0 +1,69 @@
+"""
+等级分箱工具
+用途：用声明式阈值表把数值指标向量化地转换为等级，替代逐行 .apply() 的分类函数
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class LevelBins:
+    """
+    阈值表分箱器
+
+    thresholds 按 "score >= 阈值 → 等级" 的含义书写，与原来的 if/elif 链一一对应，
+    都不满足时返回 default。NaN 输入得到缺失值而不是落入某个等级。
+
+    invert_from 用于反向刻度（如生活成本）：先计算 invert_from - score 再比较阈值。
+    """
+
+    def __init__(self, thresholds, default, invert_from=None):
+        # 按阈值升序排列，np.digitize 需要单调递增的边界
+        table = sorted(thresholds, key=lambda item: item[0])
+        self.edges = np.array([edge for edge, _ in table], dtype='float64')
+        self.labels = [default] + [label for _, label in table]
+        self.invert_from = invert_from
+        self.numeric = all(isinstance(label, (int, np.integer)) for label in self.labels)
+
+        if len(self.labels) > np.iinfo(np.int8).max:
+            raise ValueError("LevelBins supports at most 127 levels")
+        if self.numeric and not all(np.iinfo(np.int8).min <= label <= np.iinfo(np.int8).max
+                                    for label in self.labels):
+            raise ValueError("Numeric level labels must fit in int8")
+
+    def __repr__(self):
+        # 作为缓存参数时需要稳定的表示
+        return (f"LevelBins(edges={self.edges.tolist()}, labels={self.labels}, "
+                f"invert_from={self.invert_from})")
+
+    def codes(self, values):
+        """返回 int8 等级编码（labels 的下标），缺失值为 -1"""
+        scores = pd.Series(values).to_numpy(dtype='float64', na_value=np.nan)
+        if self.invert_from is not None:
+            scores = self.invert_from - scores
+
+        codes = np.digitize(scores, self.edges).astype(np.int8)
+        codes[np.isnan(scores)] = -1
+        return codes
+
+    def cut(self, values):
+        """
+        返回等级列：数值等级为可空 Int8，文本等级为 categorical
+        保留输入 Series 的索引
+        """
+        index = values.index if isinstance(values, pd.Series) else None
+        return self.from_codes(self.codes(values), index)
+
+    def from_codes(self, codes, index=None):
+        """由 codes() 格式的 int8 编码（缺失为 -1）构建等级列，供在别处计算编码的后端使用"""
+        codes = np.asarray(codes, dtype=np.int8)
+        missing = codes < 0
+
+        if self.numeric:
+            data = np.asarray(self.labels, dtype=np.int8)[codes]
+            data[missing] = 0
+            levels = pd.arrays.IntegerArray(data, missing)
+        else:
+            levels = pd.Categorical.from_codes(codes, categories=self.labels)
+
+        return pd.Series(levels, index=index)
@@ -0,0 +1,237 @@
+"""
+国家 × 年份 × 指标 面板存储
+用途：把 WDI 指标宽表一次性转换为稠密的 float32 立方体，保存为可内存映射的 .npy 和 JSON 索引，
+     之后的时间序列特征（最近值、N 年均值、CAGR）直接在映射的数组上对所有国家向量化计算，
+     源文件内容不变时不再解析 CSV
+
+用法：
+    python scripts/panel_store.py                               # 用 data_cleaning.WDI_INDICATORS 构建并打印特征
+    python scripts/panel_store.py --data-dir data/dataset_exercise --years 5 10
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline_cache import PipelineCache
+from wdi_loader import read_wdi_wide, resolve_wdi_paths, year_columns
+
+PANEL_DIR = Path('./.cache/panel')
+VALUES_FILE = 'panel.npy'
+INDEX_FILE = 'panel.index.json'
+
+# 面板文件结构版本，布局变化时递增
+SCHEMA_VERSION = 1
+
+
+class PanelStore:
+    """
+    内存映射的面板
+
+    values: (国家, 年份, 指标) 的 float32 数组，缺失为 NaN；年份是连续的整数区间。
+    查询都返回以国家代码为索引的 Series/DataFrame，在 float64 上计算。
+    """
+
+    def __init__(self, values, countries, country_names, years, indicators):
+        self.values = values
+        self.countries = pd.Index(countries, name='country_code')
+        self.country_names = pd.Series(country_names, index=self.countries, name='country_name')
+        self.years = np.asarray(years, dtype=np.int64)
+        self.indicators = list(indicators)
+
+    @classmethod
+    def open(cls, directory=PANEL_DIR, mmap_mode='r'):
+        directory = Path(directory)
+        with open(directory / INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        values = np.load(directory / VALUES_FILE, mmap_mode=mmap_mode)
+        return cls(values, index['countries'], index['country_names'], index['years'], index['indicators'])
+
+    def __repr__(self):
+        return (f"PanelStore({len(self.countries)} countries × {self.years[0]}-{self.years[-1]} × "
+                f"{self.indicators})")
+
+    def matrix(self, indicator):
+        """某个指标的 (国家, 年份) float64 矩阵"""
+        return np.asarray(self.values[:, :, self.indicators.index(indicator)], dtype=np.float64)
+
+    def frame(self, indicator):
+        """某个指标的宽表：行为国家代码，列为年份"""
+        return pd.DataFrame(self.matrix(indicator), index=self.countries, columns=self.years)
+
+    def _end_positions(self, values, end):
+        """
+        每个国家窗口结束的年份位置：end 为 None 时取各自最近一个非空年份（没有数据为 -1），
+        否则为 end 年（超出面板范围时为 -1）
+        """
+        if end is None:
+            present = ~np.isnan(values)
+            last = values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+            return np.where(present.any(axis=1), last, -1)
+        position = int(end) - int(self.years[0])
+        position = position if 0 <= position < len(self.years) else -1
+        return np.full(len(values), position)
+
+    def latest(self, indicator, as_of=None):
+        """每个国家最近一年（不晚于 as_of）的非空值及其年份"""
+        values = self.matrix(indicator)
+        if as_of is not None:
+            values[:, self.years > as_of] = np.nan
+        last = self._end_positions(values, None)
+        has_value = last >= 0
+        rows = np.arange(len(values))
+        latest = np.where(has_value, values[rows, np.maximum(last, 0)], np.nan)
+        latest_year = pd.array(np.where(has_value, self.years[np.maximum(last, 0)], 0), dtype='Int16')
+        latest_year[~has_value] = pd.NA
+        return pd.DataFrame({indicator: latest, f'{indicator}_year': latest_year}, index=self.countries)
+
+    def mean(self, indicator, n_years, end=None, min_periods=1):
+        """
+        截至 end 年（默认各国最近有数据的一年）的 n_years 个日历年的平均值，
+        窗口内非空值少于 min_periods 时为缺失
+        """
+        values = self.matrix(indicator)
+        end_pos = self._end_positions(values, end)
+        positions = np.arange(len(self.years))
+        window = (positions[None, :] <= end_pos[:, None]) & (positions[None, :] > end_pos[:, None] - n_years)
+        window &= ~np.isnan(values)
+        counts = window.sum(axis=1)
+        totals = np.where(window, values, 0.0).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.where((counts >= min_periods) & (end_pos >= 0), totals / counts, np.nan)
+        return pd.Series(result, index=self.countries, name=f'{indicator}_mean_{n_years}y')
+
+    def cagr(self, indicator, n_years, end=None):
+        """
+        end 年（默认各国最近有数据的一年）相对 n_years 年前的复合年增长率
+        两端任一缺失或不为正时为缺失
+        """
+        values = self.matrix(indicator)
+        end_pos = self._end_positions(values, end)
+        start_pos = end_pos - n_years
+        valid = (end_pos >= 0) & (start_pos >= 0)
+        rows = np.arange(len(values))
+        end_values = np.where(valid, values[rows, np.maximum(end_pos, 0)], np.nan)
+        start_values = np.where(valid, values[rows, np.maximum(start_pos, 0)], np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            growth = np.where((start_values > 0) & (end_values > 0),
+                              (end_values / start_values) ** (1.0 / n_years) - 1, np.nan)
+        return pd.Series(growth, index=self.countries, name=f'{indicator}_cagr_{n_years}y')
+
+    def features(self, indicator, windows=(5, 10)):
+        """一个指标的时间序列特征表：最近值、年份，以及每个窗口的均值和 CAGR"""
+        columns = [self.latest(indicator)]
+        for n_years in windows:
+            columns += [self.mean(indicator, n_years), self.cagr(indicator, n_years)]
+        return pd.concat([self.country_names, *columns], axis=1)
+
+
+def _write_atomic(path, write):
+    tmp_path = path.with_name(path.name + '.tmp')
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def build_panel(indicators, directory=PANEL_DIR, countries_only=True, digests=None):
+    """
+    读取 {指标名: WDI 文件路径} 并写出面板，返回内存映射打开的 PanelStore
+    国家按首次出现的顺序排列，年份取所有文件的最小到最大年份
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    wides = {name: read_wdi_wide(path, countries_only) for name, path in indicators.items()}
+
+    countries, names = [], {}
+    for wide in wides.values():
+        for code, name in zip(wide['Country Code'], wide['Country Name']):
+            if code not in names:
+                countries.append(code)
+                names[code] = name
+    all_years = [int(year) for wide in wides.values() for year in year_columns(wide)]
+    years = np.arange(min(all_years), max(all_years) + 1) if all_years else np.array([], dtype=np.int64)
+
+    country_index = pd.Index(countries)
+    values_path = directory / VALUES_FILE
+
+    def write_values(path):
+        cube = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                         shape=(len(countries), len(years), len(wides)))
+        cube[:] = np.nan
+        for k, wide in enumerate(wides.values()):
+            wide_years = year_columns(wide)
+            rows = country_index.get_indexer(wide['Country Code'])
+            cols = np.array([int(year) for year in wide_years], dtype=np.int64) - years[0]
+            cube[rows[:, None], cols[None, :], k] = wide[wide_years].to_numpy(dtype=np.float64)
+        cube.flush()
+        del cube
+
+    _write_atomic(values_path, write_values)
+
+    index = {
+        'schema_version': SCHEMA_VERSION,
+        'countries': countries,
+        'country_names': [names[code] for code in countries],
+        'years': years.tolist(),
+        'indicators': list(wides),
+        'countries_only': countries_only,
+        'sources': digests or {},
+    }
+
+    def write_index(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+
+    # 索引最后写出：读者看到新索引时数组一定已经就绪
+    _write_atomic(directory / INDEX_FILE, write_index)
+    print(f"✓ Built panel store: {len(countries)} countries × {len(years)} years × {len(wides)} indicators "
+          f"→ {values_path}")
+    return PanelStore.open(directory)
+
+
+def load_panel(indicators, directory=PANEL_DIR, countries_only=True, cache=None):
+    """
+    打开面板；源文件内容（sha256）、指标列表或结构版本变化时重新构建
+    cache: 提供 file_digest 的 PipelineCache（默认新建一个）
+    """
+    directory = Path(directory)
+    cache = cache or PipelineCache()
+    digests = {name: cache.file_digest(path) for name, path in indicators.items()}
+    cache.flush()
+
+    try:
+        with open(directory / INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = None
+
+    if (index is not None and index.get('schema_version') == SCHEMA_VERSION
+            and index.get('sources') == digests and index.get('countries_only') == countries_only
+            and (directory / VALUES_FILE).exists()):
+        print(f"✓ Panel store up to date: {directory / VALUES_FILE}")
+        return PanelStore.open(directory)
+    return build_panel(indicators, directory, countries_only, digests)
+
+
+if __name__ == '__main__':
+    from data_cleaning import DATA_DIR, WDI_INDICATORS
+
+    parser = argparse.ArgumentParser(description='构建 WDI 面板存储并打印时间序列特征')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR / 'dataset_exercise')
+    parser.add_argument('--output-dir', type=Path, default=PANEL_DIR)
+    parser.add_argument('--years', type=int, nargs='+', default=[5, 10], help='均值和 CAGR 的窗口（年）')
+    args = parser.parse_args()
+
+    # 与 DataCleaner 相同：先在 data_dir 下查找，再按原样查找（gdp 的 zip 在仓库根目录），缺失的指标会提示
+    indicators = resolve_wdi_paths(WDI_INDICATORS, args.data_dir)
+    if not indicators:
+        raise SystemExit(f"No WDI indicator files found in {args.data_dir}")
+
+    panel = load_panel(indicators, args.output_dir)
+    print(panel)
+    for name in indicators:
+        print(f"\n{name} 时间序列特征（前10个国家）:")
+        print(panel.features(name, args.years).head(10).to_string())
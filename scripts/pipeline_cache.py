@@ -0,0 +1,120 @@
+"""
+增量构建缓存
+用途：按输入文件的内容哈希和阶段参数缓存管道中间结果，输入未变化时跳过重算
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+CACHE_DIR = Path('./.cache/pipeline')
+
+# 计算文件哈希时每次读取的字节数
+CHUNK_SIZE = 1 << 20
+
+
+class PipelineCache:
+    """
+    基于内容哈希的阶段缓存
+
+    每个条目以名称存储一份 (key, value)，key 由输入文件哈希和阶段参数组成；
+    同名条目被新 key 覆盖，缓存大小不会随运行次数增长。
+    文件哈希按 (大小, mtime, inode) 记忆，未修改的文件不会被重新读取。
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._digest_file = self.cache_dir / 'file_digests.json'
+        self._digests = self._read_digests()
+        self._dirty = False
+
+    def _read_digests(self):
+        try:
+            with open(self._digest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def file_digest(self, path):
+        """返回文件内容的 sha256；文件不存在时返回 None"""
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        memo_key = str(path.resolve())
+        signature = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+        memo = self._digests.get(memo_key)
+        if memo is not None and memo[0] == signature:
+            return memo[1]
+
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        self._digests[memo_key] = [signature, digest]
+        self._dirty = True
+        return digest
+
+    def key(self, *parts):
+        """把文件哈希和阶段参数组合成缓存 key"""
+        payload = json.dumps(parts, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, name):
+        return self.cache_dir / f'{name}.pkl'
+
+    def get(self, name, key):
+        """key 匹配时返回缓存值，否则返回 None"""
+        try:
+            with open(self._entry_path(name), 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return entry['value'] if entry.get('key') == key else None
+
+    def put(self, name, key, value):
+        """写入缓存条目（先写临时文件再替换，避免中断留下半个文件）"""
+        path = self._entry_path(name)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'key': key, 'value': value}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def get_run(self, name, key, outputs):
+        """
+        整次运行的缓存：key 相同且所有输出文件仍是上次写出的内容时返回上次的结果
+        """
+        entry = self.get(name, key)
+        if entry is None:
+            return None
+        for output, digest in entry['outputs'].items():
+            if self.file_digest(output) != digest:
+                return None
+        return entry['result']
+
+    def put_run(self, name, key, outputs, result):
+        """记录一次完整运行的输出文件哈希和返回值"""
+        digests = {str(output): self.file_digest(output) for output in outputs}
+        self.put(name, key, {'outputs': digests, 'result': result})
+
+    def flush(self):
+        """保存文件哈希记忆表"""
+        if not self._dirty:
+            return
+        tmp_path = self._digest_file.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._digests, f)
+        os.replace(tmp_path, self._digest_file)
+        self._dirty = False
+
+
+def code_digest(cache, *paths):
+    """管道代码本身的哈希：修改清洗逻辑后缓存自动失效"""
+    return cache.key(*(cache.file_digest(path) for path in paths))
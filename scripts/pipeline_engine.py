@@ -0,0 +1,253 @@
+"""
+DAG 管道引擎
+用途：把数据源读取、合并、归一化、等级派生和导出声明为带显式依赖的节点，
+     互不依赖的节点在线程池中并行运行，节点结果按输入文件哈希、参数和上游节点缓存
+"""
+
+import io
+import os
+import re
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# 默认线程数：节点主要是 CSV 解析和 numpy 运算，大部分时间释放 GIL
+MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+class _NodeOutput(io.TextIOBase):
+    """
+    运行期间代替 sys.stdout：节点在工作线程中打印的内容写入该节点自己的缓冲，
+    由主线程按拓扑顺序整段输出，并行节点的进度信息不会交错；其他线程照常写到原来的 stdout
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def capture(self, buffer):
+        self._local.buffer = buffer
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class Node:
+    """
+    管道节点
+
+    func 按 deps 的顺序接收上游节点的结果。缓存 key 由节点名称、params、inputs（文件内容哈希）
+    和 key_deps 中上游节点的 key 组成；key_deps 默认等于 deps。上游结果只决定行对齐、
+    节点的值只取决于自身数据源时，可以用 inputs 列出真正的依赖并把 key_deps 设为空，
+    避免无关数据源变化使缓存失效。
+    cache=False 的节点（导出器等有副作用的节点）每次都会运行。
+    """
+
+    def __init__(self, name, func, deps=(), params=None, inputs=(), key_deps=None, cache=True):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.params = params
+        self.inputs = tuple(inputs)
+        self.key_deps = self.deps if key_deps is None else tuple(key_deps)
+        self.cache = cache
+
+    def __repr__(self):
+        return f"Node({self.name!r}, deps={list(self.deps)})"
+
+
+class Pipeline:
+    """
+    节点图及其运行器
+
+    run() 只运行目标节点及其尚未计算的上游节点；已计算的结果保存在 results 中，
+    同一个 Pipeline 上分几次运行（如逐阶段调用）不会重复计算。
+    """
+
+    def __init__(self, name, cache=None, code_files=(), max_workers=None):
+        self.name = name
+        self.cache = cache
+        self.code_files = tuple(code_files)
+        self.max_workers = max_workers or MAX_WORKERS
+        self.nodes = {}
+        self.results = {}
+        self._keys = {}
+        self._code_key = cache.key(*(cache.file_digest(path) for path in code_files)) if cache else None
+
+    def add(self, name, func, deps=(), replace=False, **options):
+        """
+        添加节点，返回节点名称
+        replace=True 时替换同名节点，并丢弃它和所有下游节点已计算的结果
+        """
+        if name in self.nodes:
+            if not replace:
+                raise ValueError(f"Duplicate pipeline node: {name}")
+            self.discard(name)
+        self.nodes[name] = Node(name, func, deps, **options)
+        return name
+
+    def select(self, prefix):
+        """名称以 prefix 开头的节点（按添加顺序），如 select('level:')"""
+        return [name for name in self.nodes if name.startswith(prefix)]
+
+    def discard(self, name):
+        """丢弃节点及其所有下游节点已计算的结果和缓存 key"""
+        stale = {name}
+        changed = True
+        while changed:
+            changed = False
+            for node in self.nodes.values():
+                if node.name not in stale and stale.intersection(node.deps):
+                    stale.add(node.name)
+                    changed = True
+        for stale_name in stale:
+            self.results.pop(stale_name, None)
+            self._keys.pop(stale_name, None)
+
+    def workers(self, recorder=None):
+        """实际使用的线程数：recorder 要求逐阶段分析（recorder.serial）时为 1"""
+        if recorder is not None and recorder.serial:
+            return 1
+        return self.max_workers
+
+    def _required(self, targets):
+        """目标节点及其尚未计算的上游节点，依赖不存在或有环时报错"""
+        required, visiting = set(), set()
+
+        def visit(name, path):
+            if name not in self.nodes:
+                raise KeyError(f"Unknown pipeline node {name!r} (required by {path[-1] if path else 'run'})")
+            if name in required or name in self.results:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline dependency cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            required.add(name)
+
+        for target in targets:
+            visit(target, [])
+        return required
+
+    def node_key(self, name):
+        """节点的缓存 key（递归包含 key_deps 的 key），同一 Pipeline 内记忆"""
+        if name not in self._keys:
+            node = self.nodes[name]
+            self._keys[name] = self.cache.key(
+                self.name, name, node.params, self._code_key,
+                [self.cache.file_digest(path) for path in node.inputs],
+                [self.node_key(dep) for dep in node.key_deps],
+            )
+        return self._keys[name]
+
+    def _compute(self, node, args):
+        if self.cache is None or not node.cache:
+            return node.func(*args)
+        entry = re.sub(r'[^\w.-]+', '-', f'{self.name}-{node.name}')
+        key = self.node_key(node.name)
+        value = self.cache.get(entry, key)
+        if value is None:
+            value = node.func(*args)
+            if value is not None:
+                self.cache.put(entry, key, value)
+        return value
+
+    def _ordered(self, names):
+        """names 的拓扑顺序：先上游后下游，其余按添加顺序"""
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen or name not in names:
+                return
+            seen.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
+
+    def _execute(self, name, recorder, stdout, printed):
+        node = self.nodes[name]
+        args = [self.results[dep] for dep in node.deps]
+        buffer = io.StringIO()
+        stdout.capture(buffer)
+        try:
+            if recorder is None:
+                return self._compute(node, args)
+            return recorder.run(name, self._compute, node, args)
+        finally:
+            stdout.capture(None)
+            printed[name] = buffer.getvalue()
+
+    def run(self, targets=None, recorder=None):
+        """
+        并行运行 targets（默认全部节点）需要的节点，返回 {目标: 结果}
+        节点打印的内容先缓存，再由调用线程按拓扑顺序输出（上游节点都已输出后才输出下游节点）
+        recorder: instrumentation.RunRecorder，每个节点记为一个阶段；
+                  并行运行时只记录各节点的墙钟时间和整次运行的峰值内存，
+                  recorder 启用性能分析时节点逐个运行（见 workers）
+        """
+        targets = list(self.nodes) if targets is None else list(targets)
+        required = self._required(targets)
+        waiting = {name: {dep for dep in self.nodes[name].deps if dep in required} for name in required}
+        dependents = {name: [] for name in required}
+        for name, deps in waiting.items():
+            for dep in deps:
+                dependents[dep].append(name)
+
+        workers = self.workers(recorder)
+        if recorder is not None:
+            recorder.concurrent = workers > 1
+
+        order = self._ordered(required)
+        printed = {}
+        emitted = 0
+        stdout = sys.stdout = _NodeOutput(sys.stdout)
+
+        def emit(partial=False):
+            # 输出已完成的最长前缀；partial=True（出错时）跳过未运行的节点，输出其余全部
+            nonlocal emitted
+            while emitted < len(order) and (partial or order[emitted] in printed):
+                stdout.stream.write(printed.pop(order[emitted], ''))
+                emitted += 1
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                running = {}
+
+                def submit(names):
+                    for name in sorted(names, key=list(self.nodes).index):
+                        running[pool.submit(self._execute, name, recorder, stdout, printed)] = name
+
+                submit([name for name, deps in waiting.items() if not deps])
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    ready = []
+                    for future in done:
+                        name = running.pop(future)
+                        try:
+                            self.results[name] = future.result()
+                        except BaseException:
+                            # 不再提交新节点，等正在运行的节点结束后抛出
+                            for pending in running:
+                                pending.cancel()
+                            raise
+                        for dependent in dependents[name]:
+                            waiting[dependent].discard(name)
+                            if not waiting[dependent]:
+                                ready.append(dependent)
+                    emit()
+                    submit(ready)
+        finally:
+            sys.stdout = stdout.stream
+            emit(partial=True)
+
+        return {target: self.results[target] for target in targets}
@@ -0,0 +1,99 @@
+"""
+Polars 惰性后端
+用途：把按国家代码对齐的管道（V3）的 读取 → 合并 → 归一化 → 分级 → 选择导出列 构建为一个 LazyFrame 查询，
+     由 Polars 做投影下推（每个CSV只读取键列和分数列）、表达式融合和多线程执行；
+     结果与 pandas 路径的导出表逐值一致，等级列在 pandas 边缘由 LevelBins.from_codes 解码
+"""
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# 与 pandas.read_csv 默认的缺失值字符串一致，保证两条路径丢弃相同的键
+PANDAS_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+def scan_source(path, key_column, columns, schema_overrides=None):
+    """只扫描需要的列，去掉空键并按键保留第一条（与 read_source / read_country_names 相同）"""
+    frame = pl.scan_csv(path, schema_overrides=schema_overrides, null_values=PANDAS_NA_VALUES,
+                        infer_schema=schema_overrides is None)
+    frame = frame.select([key_column, *columns]).filter(pl.col(key_column).is_not_null())
+    return frame.unique(subset=[key_column], keep='first', maintain_order=True)
+
+
+def as_column(scalar):
+    """
+    把标量表达式展开为整列：Polars 对标量除数会改为乘以倒数，结果与 pandas 的逐元素除法相差 1 ulp，
+    除数为普通列时才逐元素相除
+    """
+    return pl.int_range(pl.len()).cast(pl.Float64) * 0.0 + scalar
+
+
+def normalize_expr(col, old_min=None, old_max=None):
+    """
+    normalize_to_ten_scale 的表达式版本，运算顺序相同因此结果逐位一致：
+    (x - min) / (max - min) * 9 + 1，min/max 缺省时取列的最小/最大值，两者相等时为 5
+    """
+    value = pl.col(col)
+    low = value.min() if old_min is None else pl.lit(old_min)
+    high = value.max() if old_max is None else pl.lit(old_max)
+    scaled = (value - low) / as_column(high - low) * 9 + 1
+    constant = pl.when(value.is_not_null()).then(pl.lit(5.0))
+    if old_min is not None and old_max is not None:
+        result = constant if old_min == old_max else scaled
+    else:
+        result = pl.when(high == low).then(constant).otherwise(scaled)
+    return result.alias(col + '_normalized')
+
+
+def level_codes_expr(bins, col, name):
+    """LevelBins.codes 的表达式版本：满足 score >= 阈值 的个数即 np.digitize 的编码，缺失为 -1"""
+    score = pl.col(col)
+    if bins.invert_from is not None:
+        score = pl.lit(float(bins.invert_from)) - score
+    code = pl.sum_horizontal([(score >= float(edge)).cast(pl.Int8) for edge in bins.edges]).cast(pl.Int8)
+    return pl.when(score.is_null() | score.is_nan()).then(pl.lit(-1, pl.Int8)).otherwise(code).alias(name)
+
+
+def build_plan(config, data_dir, sources, metadata_file, key_column='Country Code'):
+    """
+    构建导出表的惰性查询：country_name、country_code + 导出列，等级列为 int8 编码
+    sources: 存在的数据源 [(文件名, 分数列, 输出列名)]，第一项为基础表
+    """
+    (base_name, base_score, base_output), others = sources[0], sources[1:]
+    plan = scan_source(data_dir / base_name, key_column, [base_score, 'Country Name'],
+                       {base_score: pl.Float64}).rename({base_score: base_output})
+    for filename, score_column, output_name in others:
+        source = scan_source(data_dir / filename, key_column, [score_column], {score_column: pl.Float64})
+        plan = plan.join(source.rename({score_column: output_name}), on=key_column, how='left',
+                         maintain_order='left')
+
+    # 国家名称：基础数据源的拼写优先，缺失时用WDI标准名称
+    name = pl.col('Country Name')
+    metadata = data_dir / metadata_file
+    if metadata.exists():
+        names = scan_source(metadata, key_column, ['TableName'])
+        plan = plan.join(names, on=key_column, how='left', maintain_order='left')
+        name = pl.coalesce(name, pl.col('TableName'))
+
+    columns = [output_name for _, _, output_name in sources]
+    normalized = [col for col in config.normalize if col in columns]
+    levels = [(level_col, index_col, bins) for level_col, index_col, bins in config.levels if index_col in normalized]
+    plan = plan.with_columns([normalize_expr(col, *config.normalize[col]) for col in normalized])
+    plan = plan.with_columns([level_codes_expr(bins, index_col + '_normalized', level_col)
+                              for level_col, index_col, bins in levels])
+
+    available_columns = set(columns) | {col + '_normalized' for col in normalized} | {col for col, _, _ in levels}
+    export_cols = [col for col in config.export_columns if col in available_columns]
+    return plan.select([name.alias('country_name'), pl.col(key_column).alias('country_code'), *export_cols])
+
+
+def collect_export(plan, config):
+    """执行查询并转为 pandas 导出表，等级编码解码为与 LevelBins.cut 相同的列"""
+    df = plan.collect().to_pandas()
+    for level_col, _, bins in config.levels:
+        if level_col in df.columns:
+            df[level_col] = bins.from_codes(df[level_col].to_numpy(), df.index)
+    return df
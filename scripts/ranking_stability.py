@@ -0,0 +1,211 @@
+"""
+排名稳定性分析（蒙特卡洛）
+用途：在默认权重附近按 Dirichlet 分布采样大量权重向量（可选给指标值加噪声），
+     每个样本对所有国家重新排名，统计每个国家的排名分布：中位排名、90% 区间和进入前 10 的概率
+
+采样按块在进程池中并行：每块是一次矩阵乘法加一次 argsort，各块只返回 国家 × 名次 的计数直方图。
+
+用法：
+    python scripts/ranking_stability.py                                   # V1 综合评分，20 万个样本
+    python scripts/ranking_stability.py --model recommender --answers high low high high medium temperate
+    python scripts/ranking_stability.py --samples 500000 --noise 0.5 --concentration 20 --output stability.json
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from composite_score import CompositeScorer
+from recommender import DIMENSIONS, MIN_MATCH_COUNT, BatchRecommender
+
+DATA_DIR = Path('./data')
+
+# 每块的样本数：块内评分矩阵为 块大小 × 国家数
+CHUNK_SIZE = 4096
+
+# Dirichlet 集中度：alpha = 集中度 × 默认权重，越大采样的权重越接近默认值
+DEFAULT_CONCENTRATION = 50.0
+
+# 默认统计进入前多少名的概率
+TOP_K = 10
+
+
+class StabilityModel:
+    """
+    可批量评分的线性模型
+
+    values: (国家数, 维度数) 各维度的得分（已归一化，未加权）
+    weights: 默认权重
+    denominators: 可选的 (国家数, 维度数) 0/1 矩阵；给出时评分为 W·values / W·denominators × 10
+                  （推荐器按国家实际有数据的维度归一化）
+    base_scores: 默认权重下由原评分器算出的分数，决定 base_rank（避免矩阵乘法的舍入改变同分顺序）
+    只包含参与排名的国家（评分缺失或不足最少匹配维度的国家事先去掉）。
+    """
+
+    def __init__(self, names, values, weights, denominators=None, base_scores=None):
+        self.names = list(names)
+        self.base_scores = None if base_scores is None else np.asarray(base_scores, dtype=np.float64)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.denominators = None if denominators is None else np.ascontiguousarray(denominators, dtype=np.float64)
+
+    def scores(self, weights, noise=None, rng=None):
+        """
+        weights: (样本数, 维度数)；noise: 每个维度得分的噪声标准差（标量或 (维度数,)），需要同时给出 rng
+        独立正态噪声加权求和后仍是正态，标准差为 sqrt(Σ w_j² σ_j²)（只计国家有数据的维度），
+        所以每个样本每个国家只需一个随机数，不必为每个维度生成噪声
+        """
+        totals = weights @ self.values.T
+        if noise is not None:
+            variance = weights ** 2 * np.square(noise)
+            if self.denominators is None:
+                sigma = np.sqrt(variance.sum(axis=1, keepdims=True))
+            else:
+                sigma = np.sqrt(variance @ self.denominators.T)
+            totals += sigma * rng.standard_normal(totals.shape)
+        if self.denominators is None:
+            return totals
+        return totals / (weights @ self.denominators.T) * 10
+
+    def base_ranks(self):
+        """默认权重下的名次（1 开始，同分按原始顺序）"""
+        scores = self.base_scores if self.base_scores is not None else self.scores(self.weights[None, :])[0]
+        order = np.argsort(-scores, kind='stable')
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(1, len(order) + 1)
+        return ranks
+
+
+def sample_weights(rng, base_weights, n_samples, concentration):
+    """在默认权重附近采样：Dirichlet(集中度 × 默认权重)；集中度为 None 时在单纯形上均匀采样"""
+    if concentration is None:
+        alpha = np.ones(len(base_weights))
+    else:
+        alpha = concentration * base_weights / base_weights.sum()
+    return rng.dirichlet(alpha, n_samples)
+
+
+def _sample_chunk(model, seed, n_samples, concentration, noise):
+    """一块样本的 国家 × 名次 计数直方图"""
+    rng = np.random.default_rng(seed)
+    weights = sample_weights(rng, model.weights, n_samples, concentration)
+    scores = model.scores(weights, noise, rng)
+
+    # 每行降序排列后第 r 位的国家即排第 r 名；一次 bincount 累加到 (国家, 名次) 直方图
+    n_countries = len(model.names)
+    order = np.argsort(-scores, axis=1, kind='stable')
+    positions = np.broadcast_to(np.arange(n_countries), order.shape)
+    flat = (order * n_countries + positions).ravel()
+    return np.bincount(flat, minlength=n_countries * n_countries).reshape(n_countries, n_countries)
+
+
+def rank_histogram(model, n_samples, concentration=DEFAULT_CONCENTRATION, noise=None, seed=0,
+                   workers=None, chunk_size=CHUNK_SIZE):
+    """把 n_samples 个样本分块，在进程池中并行采样，返回合计的 (国家数, 国家数) 名次直方图"""
+    chunks = [chunk_size] * (n_samples // chunk_size)
+    if n_samples % chunk_size:
+        chunks.append(n_samples % chunk_size)
+    # 每块独立的随机流，结果与进程数无关
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        histograms = [_sample_chunk(model, s, size, concentration, noise) for s, size in zip(seeds, chunks)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            histograms = list(pool.map(_sample_chunk, [model] * len(chunks), seeds, chunks,
+                                       [concentration] * len(chunks), [noise] * len(chunks)))
+    return np.sum(histograms, axis=0)
+
+
+def _rank_quantile(cumulative, q):
+    """由累计直方图求每个国家名次的 q 分位数（1 开始）"""
+    return (cumulative < q * cumulative[:, -1:]).sum(axis=1) + 1
+
+
+def summarize(model, histogram, top_k=TOP_K):
+    """每个国家的默认名次、中位名次、90% 区间和进入前 top_k 的概率，按中位名次排序"""
+    cumulative = np.cumsum(histogram, axis=1)
+    n_samples = cumulative[:, -1]
+    summary = pd.DataFrame({
+        'country_name': model.names,
+        'base_rank': model.base_ranks(),
+        'median_rank': _rank_quantile(cumulative, 0.5),
+        'rank_p05': _rank_quantile(cumulative, 0.05),
+        'rank_p95': _rank_quantile(cumulative, 0.95),
+        f'p_top{top_k}': cumulative[:, min(top_k, histogram.shape[1]) - 1] / n_samples,
+        'mean_rank': (histogram * np.arange(1, histogram.shape[1] + 1)).sum(axis=1) / n_samples,
+    })
+    return summary.sort_values(['median_rank', 'base_rank'], kind='stable').reset_index(drop=True)
+
+
+def composite_model(cleaned_file, weights=None):
+    """V1 综合评分：所有权重列都有数据的国家参与排名"""
+    from data_cleaning import COMPOSITE_WEIGHTS, INVERTED_SCORE_COLUMNS
+
+    weights = dict(COMPOSITE_WEIGHTS if weights is None else weights)
+    df = pd.read_csv(cleaned_file)
+    scorer = CompositeScorer(df, list(weights), invert=INVERTED_SCORE_COLUMNS)
+    complete = ~scorer.missing.any(axis=1)
+    return StabilityModel(df['country_name'][complete], scorer.values[complete], scorer.weight_vector(weights),
+                          base_scores=scorer.score(weights).to_numpy()[complete])
+
+
+def recommender_model(countries_file, answers):
+    """推荐器：给定问卷答案，各维度的匹配分为得分，按国家有数据的维度归一化（与 calculateScore 相同）"""
+    recommender = BatchRecommender.from_json(countries_file)
+    codes = recommender.encode_answers([answers])[0]
+    weights = np.array([weight for _, _, _, weight in DIMENSIONS])
+
+    values = np.zeros((recommender.n_countries, len(DIMENSIONS)))
+    active = np.zeros_like(values)
+    for d, weight in enumerate(weights):
+        if codes[d] < 0:
+            continue
+        values[:, d] = recommender.contributions[d][codes[d]] / weight
+        active[:, d] = recommender.active[d]
+
+    # 匹配维度不足的国家得 0 分，不出现在推荐结果中
+    eligible = active.sum(axis=1) >= MIN_MATCH_COUNT
+    names = np.array([country.get('country_name') for country in recommender.countries], dtype=object)
+    return StabilityModel(names[eligible], values[eligible], weights, active[eligible],
+                          base_scores=recommender.score(answers)[eligible])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='蒙特卡洛排名稳定性分析')
+    parser.add_argument('--model', choices=['composite', 'recommender'], default='composite')
+    parser.add_argument('--cleaned-file', type=Path, default=DATA_DIR / 'dataset_exercise' / 'cleaned_countries_data.csv')
+    parser.add_argument('--countries-file', type=Path, default=Path('countries.json'))
+    parser.add_argument('--answers', nargs=6, default=['high', 'low', 'high', 'high', 'medium', 'temperate'],
+                        help='推荐器模式的 6 道题答案（按题号顺序）')
+    parser.add_argument('--samples', type=int, default=200_000)
+    parser.add_argument('--concentration', type=float, default=DEFAULT_CONCENTRATION,
+                        help='Dirichlet 集中度，越大越接近默认权重；0 表示在单纯形上均匀采样')
+    parser.add_argument('--noise', type=float, default=None, help='各维度得分（0-10）的噪声标准差')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=TOP_K)
+    parser.add_argument('--output', type=Path, help='把完整结果写成 JSON')
+    args = parser.parse_args()
+
+    if args.model == 'composite':
+        model = composite_model(args.cleaned_file)
+    else:
+        model = recommender_model(args.countries_file, args.answers)
+
+    start = time.perf_counter()
+    histogram = rank_histogram(model, args.samples, args.concentration or None, args.noise, args.seed, args.workers)
+    summary = summarize(model, histogram, args.top)
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ Ranked {len(model.names)} countries under {args.samples} sampled weight vectors in {elapsed:.2f}s")
+    print(summary.head(20).to_string(index=False, float_format=lambda value: f'{value:.3f}'))
+    if args.output:
+        summary.to_json(args.output, orient='records', indent=2, force_ascii=False)
+        print(f"✓ Saved rank distributions to {args.output}")
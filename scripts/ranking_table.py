@@ -0,0 +1,160 @@
+"""
+问卷答案排名表
+用途：为全部 3^6 = 729 种问卷答案预先计算排好序的推荐结果，
+     写成紧凑的查找文件（答案编号 → 国家下标 + 分数），推荐时只需一次 O(1) 查表
+
+用法：
+    python scripts/ranking_table.py [countries.json]
+"""
+
+import hashlib
+import itertools
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from recommender import DIMENSIONS, QUIZ_OPTIONS, BatchRecommender, answer_value, is_truthy
+
+# 排名表文件与 countries.json 同名，后缀为 .ranking.npz
+RANKING_TABLE_SUFFIX = '.ranking.npz'
+
+# 每道题的选项数，答案编号按题号 1..6 从高位到低位的混合进制计算
+RADICES = [len(QUIZ_OPTIONS[question]) for _, question, _, _ in DIMENSIONS]
+N_COMBINATIONS = int(np.prod(RADICES))
+
+
+def ranking_table_path(countries_file):
+    """countries.json 对应的排名表路径"""
+    countries_file = Path(countries_file)
+    return countries_file.with_name(countries_file.stem + RANKING_TABLE_SUFFIX)
+
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def answer_index(answers):
+    """
+    问卷答案 → 答案编号（0..728）
+    answers 可以是 {题号: 选项} 或按题号顺序的 6 元组，必须全部作答
+    """
+    index = 0
+    for (_, question, _, _), radix in zip(DIMENSIONS, RADICES):
+        value = answer_value(answers, question)
+        if not is_truthy(value):
+            raise ValueError(f"Question {question} is unanswered; the ranking table only covers complete answers")
+        options = QUIZ_OPTIONS[question]
+        if value not in options:
+            raise ValueError(f"Invalid answer {value!r} for question {question} (expected one of {options})")
+        index = index * radix + options.index(value)
+    return index
+
+
+def answer_tuple(index):
+    """答案编号 → 按题号顺序的答案元组"""
+    values = []
+    for (_, question, _, _), radix in reversed(list(zip(DIMENSIONS, RADICES))):
+        index, code = divmod(index, radix)
+        values.append(QUIZ_OPTIONS[question][code])
+    return tuple(reversed(values))
+
+
+def build_ranking_table(countries_file, table_file=None):
+    """
+    为所有答案组合打分排序，写出排名表
+    文件内容：
+      offsets        (729 + 1,) 每种答案的结果在 country_ids/scores 中的起止位置
+      country_ids    排好序的国家下标（countries.json 中的行号）
+      scores         对应的推荐分数（与浏览器端 calculateScore 一致）
+      country_codes / country_names  下标对应的国家
+      source_digest  生成时 countries.json 的 sha256，用于判断是否过期
+    """
+    countries_file = Path(countries_file)
+    table_file = ranking_table_path(countries_file) if table_file is None else Path(table_file)
+    digest = file_sha256(countries_file)
+
+    recommender = BatchRecommender.from_json(countries_file)
+    codes = np.array(list(itertools.product(*(range(radix) for radix in RADICES))), dtype=np.int8)
+    scores = recommender.score_batch(codes)
+
+    rankings = [recommender.rank(row) for row in scores]
+    offsets = np.zeros(N_COMBINATIONS + 1, dtype=np.int64)
+    np.cumsum([len(ranking) for ranking in rankings], out=offsets[1:])
+    id_dtype = np.int16 if recommender.n_countries <= np.iinfo(np.int16).max else np.int32
+    country_ids = np.concatenate(rankings).astype(id_dtype)
+    ranked_scores = np.concatenate([row[ranking] for row, ranking in zip(scores, rankings)])
+
+    countries = recommender.countries
+    tmp_file = table_file.with_name(table_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        np.savez(
+            f,
+            offsets=offsets,
+            country_ids=country_ids,
+            scores=ranked_scores,
+            country_codes=np.array([str(c.get('country_code') or '') for c in countries]),
+            country_names=np.array([str(c.get('country_name') or '') for c in countries]),
+            source_digest=np.array(digest),
+        )
+    os.replace(tmp_file, table_file)
+    return table_file
+
+
+class RankingTable:
+    """已加载的排名表"""
+
+    def __init__(self, table_file):
+        with np.load(table_file, allow_pickle=False) as data:
+            self.offsets = data['offsets']
+            self.country_ids = data['country_ids']
+            self.scores = data['scores']
+            self.country_codes = data['country_codes']
+            self.country_names = data['country_names']
+            self.source_digest = str(data['source_digest'])
+
+    def lookup(self, answers):
+        """返回 (国家下标, 分数)，已按推荐顺序排列"""
+        index = answer_index(answers)
+        start, stop = self.offsets[index], self.offsets[index + 1]
+        return self.country_ids[start:stop], self.scores[start:stop]
+
+    def recommend(self, answers, k=None):
+        """返回前 k 个推荐：[{country_code, country_name, score, rank}, ...]"""
+        ids, scores = self.lookup(answers)
+        if k is not None:
+            ids, scores = ids[:k], scores[:k]
+        return [
+            {
+                'country_code': str(self.country_codes[i]),
+                'country_name': str(self.country_names[i]),
+                'score': float(score),
+                'rank': rank,
+            }
+            for rank, (i, score) in enumerate(zip(ids.tolist(), scores.tolist()), start=1)
+        ]
+
+
+def load_ranking_table(countries_file, table_file=None):
+    """加载排名表；文件不存在或 countries.json 已变化时自动重建"""
+    countries_file = Path(countries_file)
+    table_file = ranking_table_path(countries_file) if table_file is None else Path(table_file)
+
+    if table_file.exists():
+        table = RankingTable(table_file)
+        if table.source_digest == file_sha256(countries_file):
+            return table
+
+    build_ranking_table(countries_file, table_file)
+    return RankingTable(table_file)
+
+
+if __name__ == '__main__':
+    countries_file = sys.argv[1] if len(sys.argv) > 1 else 'countries.json'
+    path = build_ranking_table(countries_file)
+    print(f"✓ Ranking table for {N_COMBINATIONS} answer combinations saved to {path}")
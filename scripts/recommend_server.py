@@ -0,0 +1,320 @@
+"""
+推荐 HTTP 服务（asyncio，只用标准库和 NumPy）
+用途：启动时把 V3 生成的 countries.json 一次性载入 NumPy 数组，由服务端打分和排序，
+     浏览器只需下载前 k 个结果（几 KB），不必下载整个数据集再在前端打分
+
+接口（GET，JSON 响应）：
+    /recommend?q1=high&q2=low&q3=high&q4=high&q5=medium&q6=temperate&k=10
+                                    按问卷答案推荐（可以只答部分题，与 Recommender.recommendCountries 排序相同）
+    /country/{code}                 一个国家的完整记录（国家代码或名称）
+    /rank?field=safety_index&k=10&order=desc
+                                    按数值字段排名（缺失值不参与）
+
+响应带 ETag（数据集版本，即 countries.json 的 sha256 前 16 位），请求的 If-None-Match 相同时返回 304；
+同一请求的响应体缓存在进程内的 LRU 中。压测见 benchmarks/bench_recommend_server.py。
+请求体超过 MAX_BODY_BYTES 时返回 413，分块传输（Transfer-Encoding）返回 501，并关闭连接。
+
+用法：
+    python scripts/recommend_server.py --port 8000
+    python scripts/recommend_server.py --countries-file countries.json --cache-size 4096
+"""
+
+import argparse
+import asyncio
+import json
+from functools import lru_cache
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import numpy as np
+
+from ranking_table import file_sha256
+from recommender import DIMENSIONS, BatchRecommender
+
+DEFAULT_K = 10
+# LRU 中缓存的响应数
+CACHE_SIZE = 2048
+# 请求行和请求头的大小上限
+MAX_HEADER_BYTES = 16 * 1024
+# 请求体的大小上限（接口都是 GET，请求体只会被读掉丢弃）
+MAX_BODY_BYTES = 64 * 1024
+
+# 推荐结果中附带的字段（国家卡片需要的等级）
+RESULT_FIELDS = ['country_code', 'country_name'] + [field for _, _, field, _ in DIMENSIONS]
+
+
+class RequestError(Exception):
+    """请求参数错误，转换为 4xx 响应"""
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+class RecommendData:
+    """
+    启动时载入的数据集
+
+    recommender: 问卷评分用的 BatchRecommender（等级编码和得分贡献表）
+    numbers: {字段: (国家数,) float64 数组}，countries.json 中所有数值字段，缺失为 NaN
+    version: 数据集版本，用作 ETag
+    """
+
+    def __init__(self, countries_file):
+        self.countries_file = Path(countries_file)
+        self.version = file_sha256(self.countries_file)[:16]
+        self.recommender = BatchRecommender.from_json(self.countries_file)
+        self.countries = self.recommender.countries
+
+        self._positions = {}
+        for i, country in enumerate(self.countries):
+            for key in (country.get('country_code'), country.get('country_name')):
+                if key:
+                    self._positions.setdefault(str(key).casefold(), i)
+
+        fields = dict.fromkeys(field for country in self.countries for field in country)
+        self.numbers = {}
+        for field in fields:
+            values = [country.get(field) for country in self.countries]
+            if all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+                   for value in values) and any(value is not None for value in values):
+                self.numbers[field] = np.array([np.nan if value is None else value for value in values],
+                                               dtype=np.float64)
+
+    def position(self, country):
+        try:
+            return self._positions[country.casefold()]
+        except KeyError:
+            raise RequestError(f"Unknown country {country!r}", HTTPStatus.NOT_FOUND) from None
+
+    def _result(self, i, rank, **values):
+        country = self.countries[i]
+        result = {'rank': rank, **values}
+        result.update((field, country.get(field)) for field in RESULT_FIELDS)
+        return result
+
+    def recommend(self, answers, k=DEFAULT_K):
+        """answers: {题号: 选项}"""
+        try:
+            scores = self.recommender.score(answers)
+        except ValueError as exc:
+            raise RequestError(str(exc)) from None
+        ids = self.recommender.rank(scores, k)
+        return {
+            'version': self.version,
+            'answers': {str(question): value for question, value in sorted(answers.items())},
+            'count': int((scores > 0).sum()),
+            'results': [self._result(i, rank, score=float(scores[i]))
+                        for rank, i in enumerate(ids.tolist(), start=1)],
+        }
+
+    def country(self, country):
+        return {'version': self.version, 'country': self.countries[self.position(country)]}
+
+    def rank(self, field, k=DEFAULT_K, descending=True):
+        """按数值字段排名，同值按原始顺序"""
+        if field not in self.numbers and f'{field}_normalized' in self.numbers:
+            field = f'{field}_normalized'
+        if field not in self.numbers:
+            raise RequestError(f"Unknown numeric field {field!r}")
+        values = self.numbers[field]
+        candidates = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(-values[candidates] if descending else values[candidates], kind='stable')
+        ids = candidates[order[:k]]
+        return {
+            'version': self.version,
+            'field': field,
+            'order': 'desc' if descending else 'asc',
+            'count': len(candidates),
+            'results': [self._result(i, rank, value=float(values[i]))
+                        for rank, i in enumerate(ids.tolist(), start=1)],
+        }
+
+
+def _parse_k(query):
+    try:
+        k = int(query.get('k', DEFAULT_K))
+    except ValueError:
+        raise RequestError("k must be an integer") from None
+    if k < 1:
+        raise RequestError("k must be at least 1")
+    return k
+
+
+def _parse_answers(query):
+    """q1..q6=选项，或 answers=选项1,选项2,...（按题号顺序，留空表示未作答）"""
+    answers = {}
+    if 'answers' in query:
+        values = query['answers'].split(',')
+        if len(values) > len(DIMENSIONS):
+            raise RequestError(f"answers has {len(values)} values, expected at most {len(DIMENSIONS)}")
+        answers.update((question, value) for (_, question, _, _), value in zip(DIMENSIONS, values) if value)
+    for _, question, _, _ in DIMENSIONS:
+        value = query.get(f'q{question}')
+        if value:
+            answers[question] = value
+    return answers
+
+
+class RecommendService:
+    """路由和响应缓存：同一个 (路径, 排序后的查询参数) 的响应体只生成一次"""
+
+    def __init__(self, data, cache_size=CACHE_SIZE):
+        self.data = data
+        self.etag = f'"{data.version}"'
+        self.render = lru_cache(maxsize=cache_size)(self._render)
+
+    def _route(self, path, query):
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if parts == ['recommend']:
+            return self.data.recommend(_parse_answers(query), _parse_k(query))
+        if len(parts) == 2 and parts[0] == 'country':
+            return self.data.country(parts[1])
+        if parts == ['rank']:
+            if 'field' not in query:
+                raise RequestError("Missing required parameter: field")
+            order = query.get('order', 'desc')
+            if order not in ('asc', 'desc'):
+                raise RequestError("order must be 'asc' or 'desc'")
+            return self.data.rank(query['field'], _parse_k(query), order == 'desc')
+        raise RequestError(f"Not found: {path}", HTTPStatus.NOT_FOUND)
+
+    def _render(self, path, query):
+        """返回 (状态码, JSON 响应体)；query 为排序后的 (键, 值) 元组"""
+        try:
+            status, payload = HTTPStatus.OK, self._route(path, dict(query))
+        except RequestError as exc:
+            status, payload = exc.status, {'error': str(exc)}
+        return status, json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def respond(self, method, target, headers):
+        """返回 (状态码, 响应头列表, 响应体)"""
+        content_type = ('Content-Type', 'application/json; charset=utf-8')
+        if method not in ('GET', 'HEAD'):
+            body = json.dumps({'error': f'Method {method} not allowed'}).encode('utf-8')
+            return HTTPStatus.METHOD_NOT_ALLOWED, [content_type, ('Allow', 'GET, HEAD')], body
+
+        common = [('ETag', self.etag), ('Cache-Control', 'no-cache'), ('Access-Control-Allow-Origin', '*')]
+        url = urlsplit(target)
+        status, body = self.render(url.path, tuple(sorted(parse_qsl(url.query))))
+        if status == HTTPStatus.OK and _etag_matches(headers.get('if-none-match'), self.etag):
+            return HTTPStatus.NOT_MODIFIED, common, b''
+        return status, [content_type, *common], body
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return '*' in tags or etag in tags
+
+
+async def _read_request(reader):
+    """读取请求行和请求头，连接关闭时返回 None"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise RequestError("Request header too large", HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE) from None
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise RequestError(f"Malformed request line: {lines[0]!r}") from None
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    # GET 请求一般没有请求体；有的话读掉，保证同一连接上的下一个请求从头开始
+    # 不支持分块传输：无法确定请求体在哪里结束，拒绝后关闭连接
+    if 'transfer-encoding' in headers:
+        raise RequestError(f"Transfer-Encoding {headers['transfer-encoding']!r} is not supported",
+                           HTTPStatus.NOT_IMPLEMENTED)
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise RequestError(f"Invalid Content-Length: {headers['content-length']!r}")
+    if length > MAX_BODY_BYTES:
+        raise RequestError(f"Request body too large: {length} bytes (limit {MAX_BODY_BYTES})",
+                           HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    if length:
+        await reader.readexactly(length)
+    return method, target, version, headers
+
+
+def _encode_response(status, headers, body, keep_alive, head_only=False):
+    lines = [f'HTTP/1.1 {status.value} {status.phrase}', f'Content-Length: {len(body)}',
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f'{name}: {value}' for name, value in headers]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (b'' if head_only else body)
+
+
+async def handle_connection(service, reader, writer):
+    """一个连接上依次处理多个请求（HTTP/1.1 keep-alive）"""
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except RequestError as exc:
+                body = json.dumps({'error': str(exc)}).encode('utf-8')
+                headers = [('Content-Type', 'application/json; charset=utf-8')]
+                writer.write(_encode_response(exc.status, headers, body, keep_alive=False))
+                break
+            if request is None:
+                break
+            method, target, version, headers = request
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+            try:
+                status, response_headers, body = service.respond(method, target, headers)
+            except Exception as exc:
+                # 未预料的错误只影响这个请求：返回 500 并关闭连接，不让连接任务直接退出
+                print(f"⚠ Error handling {method} {target}: {exc!r}")
+                status, keep_alive = HTTPStatus.INTERNAL_SERVER_ERROR, False
+                response_headers = [('Content-Type', 'application/json; charset=utf-8')]
+                body = json.dumps({'error': 'Internal server error'}).encode('utf-8')
+            writer.write(_encode_response(status, response_headers, body, keep_alive, method == 'HEAD'))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host='127.0.0.1', port=8000):
+    return await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer),
+                                      host, port, limit=MAX_HEADER_BYTES)
+
+
+async def serve(countries_file, host, port, cache_size):
+    data = RecommendData(countries_file)
+    service = RecommendService(data, cache_size)
+    server = await start_server(service, host, port)
+    print(f"✓ Loaded {len(data.countries)} countries from {countries_file} (version {data.version})")
+    print(f"✓ Recommendation service listening on http://{host}:{port} (/recommend, /country/{{code}}, /rank)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--countries-file', type=Path, default=Path('countries.json'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help='LRU 中缓存的响应数')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.countries_file, args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
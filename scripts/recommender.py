@@ -0,0 +1,298 @@
+"""
+批量推荐评分引擎
+用途：与 js/services/recommender.js 中 Recommender.calculateScore 等价的 Python 实现，
+     把国家等级编码为 int8 数组，用查找表一次性为一批偏好向量给所有国家打分
+"""
+
+import json
+import math
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+# 评分维度：(偏好键, 题号, 国家字段, 权重)，顺序与 calculateScore 的累加顺序一致
+DIMENSIONS = [
+    ('education', 1, 'education_level', 0.25),
+    ('livingCosts', 2, 'cost_level', 0.25),
+    ('jobOpportunities', 3, 'economic_opportunity_level', 0.20),
+    ('safety', 4, 'safety_level', 0.15),
+    ('healthcare', 5, 'healthcare_level', 0.10),
+    ('climate', 6, 'climate_preference', 0.05),
+]
+
+# 每道题的可选答案（js/quiz.js）
+QUIZ_OPTIONS = {
+    1: ('high', 'medium', 'low'),
+    2: ('low', 'medium', 'high'),
+    3: ('high', 'medium', 'low'),
+    4: ('high', 'medium', 'low'),
+    5: ('high', 'medium', 'low'),
+    6: ('tropical', 'temperate', 'cold'),
+}
+
+# 至少匹配这么多个维度才给分
+MIN_MATCH_COUNT = 3
+
+ONE_LEVEL_APART = {('high', 'medium'), ('medium', 'high'), ('medium', 'low'), ('low', 'medium')}
+
+
+def is_truthy(value):
+    """JavaScript 的真值判断（null/undefined/''/0/NaN 为假）"""
+    if value is None:
+        return False
+    if isinstance(value, float) and math.isnan(value):
+        return False
+    if isinstance(value, (str, int, float, np.number)):
+        return bool(value)
+    return True
+
+
+def to_number(value):
+    """JavaScript 的 Number() 转换，用于比较运算：'low' 等非数字文本得到 NaN"""
+    if isinstance(value, (bool, np.bool_)):
+        return float(value)
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return 0.0
+        try:
+            return float(text)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def match_score(country_level, preference_level):
+    """getMatchScore：完全匹配 10 分，相差一级 8 分，其余 5 分"""
+    if not is_truthy(country_level) or not is_truthy(preference_level):
+        return 5
+    if country_level == preference_level:
+        return 10
+    if (country_level, preference_level) in ONE_LEVEL_APART:
+        return 8
+    return 5
+
+
+def cost_match_score(cost_level, preference_level):
+    """
+    getCostMatchScore：按数值比较成本等级
+    与浏览器行为一致，'low'/'medium'/'high' 这类文本等级在比较中视为 NaN
+    """
+    if not is_truthy(cost_level) or not is_truthy(preference_level):
+        return 5
+
+    cost = to_number(cost_level)
+    if preference_level == 'low':
+        if cost <= 4:
+            return 10
+        if cost <= 6:
+            return 8
+        if cost <= 8:
+            return 5
+        return 2
+    if preference_level == 'medium':
+        if 4 <= cost <= 7:
+            return 10
+        if 3 <= cost <= 8:
+            return 8
+        if 2 <= cost <= 9:
+            return 5
+        return 2
+    if preference_level == 'high':
+        if cost >= 7:
+            return 10
+        if cost >= 5:
+            return 8
+        if cost >= 3:
+            return 5
+        return 2
+    return 5
+
+
+def climate_match_score(country_climate, preference_climate):
+    """getClimateMatchScore：气候完全匹配 10 分，否则 3 分"""
+    if not is_truthy(country_climate) or not is_truthy(preference_climate):
+        return 5
+    return 10 if country_climate == preference_climate else 3
+
+
+MATCH_FUNCTIONS = {
+    'education': match_score,
+    'livingCosts': cost_match_score,
+    'jobOpportunities': match_score,
+    'safety': match_score,
+    'healthcare': match_score,
+    'climate': climate_match_score,
+}
+
+
+def answer_value(answers, question):
+    """取某道题的答案：answers 为 {题号: 选项}（题号可为整数或字符串）或按题号顺序的序列"""
+    if isinstance(answers, Mapping):
+        return answers.get(question, answers.get(str(question)))
+    return answers[question - 1]
+
+
+def _encode_levels(values):
+    """把一列国家等级编码为 int8（缺失/假值为 -1），返回 (编码, 取值表)"""
+    vocabulary = []
+    positions = {}
+    codes = np.full(len(values), -1, dtype=np.int8)
+    for i, value in enumerate(values):
+        if not is_truthy(value):
+            continue
+        if value not in positions:
+            positions[value] = len(vocabulary)
+            vocabulary.append(value)
+        codes[i] = positions[value]
+    if len(vocabulary) > np.iinfo(np.int8).max:
+        raise ValueError("Too many distinct level values to encode as int8")
+    return codes, vocabulary
+
+
+class BatchRecommender:
+    """
+    向量化推荐评分
+
+    每个维度预先计算 (答案数 + 1) × 国家数 的得分贡献表（已乘权重，最后一行对应未作答），
+    一批偏好的打分只需按答案编码取行并累加，结果与 calculateScore 逐位一致。
+    """
+
+    def __init__(self, countries):
+        if isinstance(countries, pd.DataFrame):
+            frame = countries.astype(object).where(countries.notna(), None)
+            countries = frame.to_dict('records')
+        self.countries = list(countries)
+        self.n_countries = len(self.countries)
+
+        self.level_codes = []      # 每个维度的国家等级编码 (N,) int8
+        self.level_values = []     # 每个维度的等级取值表
+        self.match_tables = []     # 每个维度的匹配分查找表 (取值数, 答案数)
+        self.contributions = []    # 每个维度的加权得分贡献 (答案数 + 1, N)
+        self.active = []           # 每个维度国家数据是否存在 (N,) bool
+
+        for key, question, field, weight in DIMENSIONS:
+            codes, vocabulary = _encode_levels([country.get(field) for country in self.countries])
+            options = QUIZ_OPTIONS[question]
+            match = MATCH_FUNCTIONS[key]
+
+            table = np.array([[match(value, option) for option in options] for value in vocabulary],
+                             dtype=np.float64).reshape(len(vocabulary), len(options))
+            active = codes >= 0
+
+            contribution = np.zeros((len(options) + 1, self.n_countries))
+            if vocabulary:
+                contribution[:len(options), active] = table[codes[active]].T * weight
+
+            self.level_codes.append(codes)
+            self.level_values.append(vocabulary)
+            self.match_tables.append(table)
+            self.contributions.append(contribution)
+            self.active.append(active)
+
+    @classmethod
+    def from_json(cls, path):
+        """从 countries.json 加载（JSON 数组或 NDJSON）"""
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        if text.lstrip().startswith('['):
+            return cls(json.loads(text))
+        return cls(json.loads(line) for line in text.splitlines() if line.strip())
+
+    def encode_answers(self, answers_batch):
+        """
+        把一批问卷答案编码为 (B, 6) int8 数组，未作答为 -1
+        每份答案可以是 {题号: 选项}（与 QuizManager.answers 相同）或按题号顺序的 6 元组
+        """
+        codes = np.full((len(answers_batch), len(DIMENSIONS)), -1, dtype=np.int8)
+        for row, answers in enumerate(answers_batch):
+            for d, (_, question, _, _) in enumerate(DIMENSIONS):
+                value = answer_value(answers, question)
+                if not is_truthy(value):
+                    continue
+                options = QUIZ_OPTIONS[question]
+                if value not in options:
+                    raise ValueError(f"Invalid answer {value!r} for question {question} (expected one of {options})")
+                codes[row, d] = options.index(value)
+        return codes
+
+    def score_batch(self, preference_codes):
+        """
+        为 (B, 6) 偏好编码打分，返回 (B, N) 的 0-100 分数矩阵（与 Recommender.calculateScore 相同：
+        各维度 0-10 的匹配分加权平均后乘 10，JS 注释中的 "0-10 scale" 指的是匹配分）
+        匹配维度少于 MIN_MATCH_COUNT 的国家得 0 分
+        """
+        preference_codes = np.asarray(preference_codes)
+        batch = len(preference_codes)
+        total = np.zeros((batch, self.n_countries))
+        max_score = np.zeros((batch, self.n_countries))
+        match_count = np.zeros((batch, self.n_countries), dtype=np.int8)
+
+        # 按 calculateScore 的顺序逐维累加，保证浮点结果一致
+        for d, (_, _, _, weight) in enumerate(DIMENSIONS):
+            answered = preference_codes[:, d] >= 0
+            matched = answered[:, None] & self.active[d][None, :]
+            total += self.contributions[d][preference_codes[:, d]]
+            max_score += np.where(matched, weight, 0.0)
+            match_count += matched
+
+        scores = np.zeros((batch, self.n_countries))
+        enough = match_count >= MIN_MATCH_COUNT
+        scores[enough] = total[enough] / max_score[enough] * 10
+        return scores
+
+    def score(self, answers):
+        """为单份问卷答案给所有国家打分，返回 (N,) 分数"""
+        return self.score_batch(self.encode_answers([answers]))[0]
+
+    def rank(self, scores, k=None):
+        """
+        与 recommendCountries 相同的排序：去掉 0 分，按分数降序稳定排序，返回国家下标
+        指定 k 时只返回前 k 个，先用 np.partition 找出第 k 大的分数再只对入选的 k 个排序，
+        同分时与完整排序一样按原始顺序取舍，结果等于完整排序的前 k 项
+        """
+        candidates = np.flatnonzero(scores > 0)
+        if k is not None and k < len(candidates):
+            if k <= 0:
+                return candidates[:0]
+            values = scores[candidates]
+            kth = np.partition(values, len(values) - k)[len(values) - k]
+            above = candidates[values > kth]
+            ties = candidates[values == kth][:k - len(above)]
+            candidates = np.sort(np.concatenate([above, ties]))
+        order = np.argsort(-scores[candidates], kind='stable')
+        return candidates[order]
+
+    def _match_details(self, index, preference_codes):
+        """按查找表取匹配分；国家数据缺失或未作答时与匹配函数一样为 5 分"""
+        country = self.countries[index]
+        details = {}
+        for d, (key, _, field, _) in enumerate(DIMENSIONS):
+            level, preference = self.level_codes[d][index], preference_codes[d]
+            match = self.match_tables[d][level, preference] if level >= 0 and preference >= 0 else 5
+            details[key] = {'country': country.get(field), 'match': int(match)}
+        return details
+
+    def match_details(self, index, answers):
+        """getMatchDetails：单个国家在各维度上的等级与匹配分"""
+        return self._match_details(index, self.encode_answers([answers])[0])
+
+    def recommend(self, answers, k=None):
+        """
+        与 recommendCountries 等价：返回带 score、matchDetails、rank 的国家列表
+        指定 k 时只返回前 k 个，匹配详情也只为这 k 个国家生成
+        """
+        preference_codes = self.encode_answers([answers])
+        scores = self.score_batch(preference_codes)[0]
+        results = []
+        for rank, index in enumerate(self.rank(scores, k), start=1):
+            results.append({
+                **self.countries[index],
+                'score': float(scores[index]),
+                'matchDetails': self._match_details(index, preference_codes[0]),
+                'rank': rank,
+            })
+        return results
@@ -0,0 +1,260 @@
+"""
+相似国家索引
+用途：基于 countries.json 中的 *_normalized 列预先计算所有国家两两之间的距离（float32 矩阵），
+     查询"和某国最相似的 k 个国家"时只需取一行做一次部分排序，并给出各维度的差值；
+     可以按维度加权（加权查询在内存中的指标矩阵上即时计算一行距离）
+
+距离为两国都有数据的维度上的（加权）均方根差；共同维度少于 MIN_COMMON_DIMENSIONS 的两国互不相似。
+countries.json 重新生成后，只重算取值变化或新增的国家所在的行和列，其余距离从旧索引复制。
+
+用法：
+    python scripts/similarity_index.py Japan
+    python scripts/similarity_index.py DEU --k 5 --weights safety_index_normalized=2 climate_index_normalized=0
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ranking_table import file_sha256
+from recommender import BatchRecommender
+
+# 相似度索引与 countries.json 同名，后缀为 .similarity.npz
+SIMILARITY_INDEX_SUFFIX = '.similarity.npz'
+
+NORMALIZED_SUFFIX = '_normalized'
+
+# 两国至少在这么多个维度上都有数据才计算距离
+MIN_COMMON_DIMENSIONS = 3
+
+# 分块计算距离时每块的行数，块内临时矩阵为 块大小 × 国家数
+BLOCK_SIZE = 1024
+
+
+def similarity_index_path(countries_file):
+    """countries.json 对应的相似度索引路径"""
+    countries_file = Path(countries_file)
+    return countries_file.with_name(countries_file.stem + SIMILARITY_INDEX_SUFFIX)
+
+
+def read_vectors(countries_file):
+    """
+    读取 countries.json，返回 (国家键, 国家名称, 维度列名, (国家数, 维度数) 矩阵)
+    国家键为国家代码（没有代码列时为名称）；维度为所有 *_normalized 列，缺失为 NaN
+    """
+    countries = BatchRecommender.from_json(countries_file).countries
+    columns = [col for col in (countries[0] if countries else {}) if col.endswith(NORMALIZED_SUFFIX)]
+    keys = np.array([str(c.get('country_code') or c.get('country_name') or '') for c in countries])
+    names = np.array([str(c.get('country_name') or '') for c in countries])
+    vectors = np.array([[np.nan if c.get(col) is None else c[col] for col in columns] for c in countries],
+                       dtype=np.float64).reshape(len(countries), len(columns))
+    return keys, names, columns, vectors
+
+
+def pairwise_distances(vectors, rows=None, weights=None):
+    """
+    rows（默认全部）与所有国家之间的距离 (行数, 国家数) float32，按块计算
+
+    只在两国都有数据的维度上求和：Σ w p_i p_j (x_i - x_j)² 展开为三次矩阵乘法，再除以共同维度的权重和
+    """
+    rows = np.arange(len(vectors)) if rows is None else np.asarray(rows, dtype=np.int64)
+    weights = np.ones(vectors.shape[1]) if weights is None else np.asarray(weights, dtype=np.float64)
+    present = (~np.isnan(vectors)).astype(np.float64)
+    values = np.where(present > 0, vectors, 0.0)
+    squares = values ** 2
+
+    distances = np.empty((len(rows), len(vectors)), dtype=np.float32)
+    for start in range(0, len(rows), BLOCK_SIZE):
+        block = rows[start:start + BLOCK_SIZE]
+        p, v = present[block] * weights, values[block] * weights
+        total = (v * values[block]) @ present.T + p @ squares.T - 2 * v @ values.T
+        weight_sum = p @ present.T
+        common = (present[block] * (weights > 0)) @ present.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            block_distances = np.sqrt(np.maximum(total, 0.0) / weight_sum)
+        block_distances[(common < MIN_COMMON_DIMENSIONS) | ~(weight_sum > 0)] = np.inf
+        distances[start:start + len(block)] = block_distances
+    return distances
+
+
+def _same_rows(old, new):
+    """逐行比较两个矩阵（NaN 视为相等）"""
+    return ((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=1)
+
+
+def build_similarity_index(countries_file, index_file=None, previous=None):
+    """
+    计算距离矩阵并写出索引，返回 (索引文件, 重算的国家数)
+    previous: 旧的 SimilarityIndex；维度相同时，取值未变的国家之间的距离直接复制
+    文件内容：
+      distances      (国家数, 国家数) float32 距离矩阵
+      vectors        (国家数, 维度数) 各国的 *_normalized 值
+      columns / country_keys / country_names
+      source_digest  生成时 countries.json 的 sha256，用于判断是否过期
+    """
+    countries_file = Path(countries_file)
+    index_file = similarity_index_path(countries_file) if index_file is None else Path(index_file)
+    digest = file_sha256(countries_file)
+    keys, names, columns, vectors = read_vectors(countries_file)
+
+    changed = np.arange(len(keys))
+    if previous is not None and previous.columns == columns:
+        old_rows = previous.positions(keys)
+        kept = old_rows >= 0
+        kept[kept] = _same_rows(previous.vectors[old_rows[kept]], vectors[kept])
+        changed = np.flatnonzero(~kept)
+
+    if len(changed) == len(keys):
+        distances = pairwise_distances(vectors)
+    else:
+        # 未变化的国家之间沿用旧距离，变化的国家重算整行，再按对称性写入对应的列
+        kept_rows = np.flatnonzero(kept)
+        distances = np.empty((len(keys), len(keys)), dtype=np.float32)
+        old_kept = old_rows[kept_rows]
+        distances[np.ix_(kept_rows, kept_rows)] = previous.distances[np.ix_(old_kept, old_kept)]
+        if len(changed):
+            changed_distances = pairwise_distances(vectors, changed)
+            distances[changed] = changed_distances
+            distances[:, changed] = changed_distances.T
+
+    tmp_file = index_file.with_name(index_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        np.savez(
+            f,
+            distances=distances,
+            vectors=vectors,
+            columns=np.array(columns),
+            country_keys=keys,
+            country_names=names,
+            source_digest=np.array(digest),
+        )
+    os.replace(tmp_file, index_file)
+    return index_file, len(changed)
+
+
+class SimilarityIndex:
+    """已加载的相似度索引"""
+
+    def __init__(self, index_file):
+        with np.load(index_file, allow_pickle=False) as data:
+            self.distances = data['distances']
+            self.vectors = data['vectors']
+            self.columns = data['columns'].tolist()
+            self.country_keys = data['country_keys']
+            self.country_names = data['country_names']
+            self.source_digest = str(data['source_digest'])
+        self._lookup = {}
+        # 国家代码和名称（不区分大小写）都可以查询；名称重复时保留第一个
+        for i, (key, name) in enumerate(zip(self.country_keys.tolist(), self.country_names.tolist())):
+            self._lookup.setdefault(key.lower(), i)
+            self._lookup.setdefault(name.lower(), i)
+
+    def __len__(self):
+        return len(self.country_keys)
+
+    def position(self, country):
+        """国家代码或名称 → 行号"""
+        try:
+            return self._lookup[str(country).strip().lower()]
+        except KeyError:
+            raise KeyError(f"Unknown country {country!r}") from None
+
+    def positions(self, keys):
+        """一组国家键 → 行号（不在索引中的为 -1）"""
+        index = {key: i for i, key in enumerate(self.country_keys.tolist())}
+        return np.array([index.get(key, -1) for key in keys], dtype=np.int64)
+
+    def weight_vector(self, weights):
+        """{维度列: 权重} → 与 columns 对齐的权重向量；未给出的维度权重为 1，列名可以省略 _normalized 后缀"""
+        vector = np.ones(len(self.columns))
+        for col, weight in weights.items():
+            col = col if col.endswith(NORMALIZED_SUFFIX) else col + NORMALIZED_SUFFIX
+            if col not in self.columns:
+                raise KeyError(f"Unknown dimension {col!r}, expected one of {self.columns}")
+            vector[self.columns.index(col)] = weight
+        return vector
+
+    def distances_from(self, country, weights=None):
+        """某国与所有国家的距离；不加权时直接取预先计算的一行"""
+        row = self.position(country)
+        if weights is None:
+            return row, self.distances[row]
+        return row, pairwise_distances(self.vectors, [row], self.weight_vector(weights))[0]
+
+    def nearest(self, country, k=10, weights=None):
+        """最相似的 k 个国家的 (行号, 距离)，距离相同按原始顺序，不含自身和无法比较的国家"""
+        row, distances = self.distances_from(country, weights)
+        distances = distances.copy()
+        distances[row] = np.inf
+        candidates = np.flatnonzero(np.isfinite(distances))
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(distances[candidates], k - 1)[:k]]
+            # argpartition 不保证边界上同距离的国家取哪个：补上与第 k 名同距离的国家再排序截断
+            cutoff = distances[candidates].max()
+            candidates = np.union1d(candidates, np.flatnonzero(distances == cutoff))
+        order = np.lexsort((candidates, distances[candidates]))[:k]
+        return candidates[order], distances[candidates[order]]
+
+    def similar(self, country, k=10, weights=None):
+        """
+        返回最相似的 k 个国家：[{country_code, country_name, distance, rank, deltas}, ...]
+        deltas 为 {维度列: 该国值 - 查询国家值}，任一方缺失时为 None
+        """
+        row = self.position(country)
+        ids, distances = self.nearest(country, k, weights)
+        deltas = self.vectors[ids] - self.vectors[row]
+        return [
+            {
+                'country_code': str(self.country_keys[i]),
+                'country_name': str(self.country_names[i]),
+                'distance': float(distance),
+                'rank': rank,
+                'deltas': {col: (None if np.isnan(delta) else float(delta))
+                           for col, delta in zip(self.columns, row_deltas.tolist())},
+            }
+            for rank, (i, distance, row_deltas) in enumerate(zip(ids.tolist(), distances.tolist(), deltas), start=1)
+        ]
+
+
+def load_similarity_index(countries_file, index_file=None):
+    """加载相似度索引；文件不存在或 countries.json 已变化时（增量）重建"""
+    countries_file = Path(countries_file)
+    index_file = similarity_index_path(countries_file) if index_file is None else Path(index_file)
+
+    previous = None
+    if index_file.exists():
+        previous = SimilarityIndex(index_file)
+        if previous.source_digest == file_sha256(countries_file):
+            return previous
+
+    _, n_changed = build_similarity_index(countries_file, index_file, previous)
+    index = SimilarityIndex(index_file)
+    print(f"✓ Similarity index rebuilt: {n_changed}/{len(index)} countries recomputed → {index_file}")
+    return index
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='查询和某个国家最相似的国家')
+    parser.add_argument('country', help='国家代码或名称')
+    parser.add_argument('--countries-file', type=Path, default=Path('countries.json'))
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--weights', nargs='+', default=[], metavar='DIMENSION=WEIGHT',
+                        help='维度权重（默认都为 1，0 表示忽略该维度）')
+    args = parser.parse_args()
+
+    index = load_similarity_index(args.countries_file)
+    weights = {col: float(weight) for col, weight in (item.split('=', 1) for item in args.weights)} or None
+
+    start = time.perf_counter()
+    results = index.similar(args.country, args.k, weights)
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ {len(results)} countries most similar to {index.country_names[index.position(args.country)]} "
+          f"({elapsed * 1000:.3f} ms)")
+    for result in results:
+        deltas = ', '.join(f"{col.removesuffix(NORMALIZED_SUFFIX)}={delta:+.2f}"
+                           for col, delta in result['deltas'].items() if delta is not None)
+        print(f"  {result['rank']:>2}. {result['country_name']:<28} distance={result['distance']:.3f}  {deltas}")
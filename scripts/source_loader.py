@@ -0,0 +1,84 @@
+"""
+多数据源加载工具
+用途：读取指标CSV（各数据源由管道引擎的 source:* 节点并发读取），以共享的 ISO3 国家代码分类索引一次性对齐拼接
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+# 世界银行国家元数据，提供标准的 ISO3 国家代码列表
+COUNTRY_METADATA_FILE = Path('dataset_exercise/gdp/Metadata_Country_API_NY.GDP.PCAP.CD_DS2_en_csv_v2_46.csv')
+
+
+def load_country_codes(data_dir, metadata_file=COUNTRY_METADATA_FILE):
+    """读取标准国家代码，返回 代码 → 名称 的 Series（元数据不存在时为空）"""
+    path = data_dir / metadata_file
+    if not path.exists():
+        return pd.Series(dtype=object, name='country_name')
+
+    meta = pd.read_csv(path, usecols=['Country Code', 'TableName'], encoding='utf-8-sig')
+    meta = meta.dropna(subset=['Country Code']).drop_duplicates('Country Code')
+    return meta.set_index('Country Code')['TableName'].rename('country_name')
+
+
+def read_country_names(path, key_column='Country Code', name_column='Country Name', engine=CSV_ENGINE):
+    """读取数据源中的 代码 → 名称 对照"""
+    df = pd.read_csv(path, usecols=[key_column, name_column], engine=engine)
+    df = df.dropna(subset=[key_column]).drop_duplicates(key_column)
+    return df.set_index(key_column)[name_column].rename('country_name')
+
+
+def read_source(path, score_column, output_name, key_column='Country Code', engine=CSV_ENGINE):
+    """只读取键列和分数列，返回以键为索引、名为 output_name 的 Series"""
+    df = pd.read_csv(
+        path,
+        usecols=[key_column, score_column],
+        dtype={score_column: 'float64'},
+        engine=engine,
+    )
+    series = df.dropna(subset=[key_column]).set_index(key_column)[score_column]
+    # 重复的键只保留第一条，保证后续按索引对齐
+    series = series[~series.index.duplicated()]
+    return series.rename(output_name)
+
+
+def country_code_dtype(codes, known=None):
+    """标准代码在前、数据源中额外出现的代码追加在后，构建共享的国家代码分类"""
+    categories = pd.Index([] if known is None else list(known), dtype=object)
+    extra = pd.Index(pd.unique(np.asarray(codes, dtype=object)), dtype=object)
+    return pd.CategoricalDtype(categories.append(extra.difference(categories, sort=False)))
+
+
+def align_sources(columns, how='left', categories=None):
+    """
+    把 read_source 读出的多个 Series 按国家代码一次性拼接成 DataFrame
+    categories: 标准国家代码列表；结果索引为共享该分类的 CategoricalIndex('country_code')
+    how='left' 时以第一个数据源的行为准（等价于依次 left merge），
+    how='outer' 时保留所有数据源中出现过的代码
+    """
+    dtype = country_code_dtype(np.concatenate([column.index.to_numpy(dtype=object) for column in columns]),
+                               known=categories)
+    codes = [pd.Categorical(column.index, dtype=dtype).codes for column in columns]
+
+    if how == 'left':
+        rows = codes[0]
+    else:
+        rows = pd.unique(np.concatenate(codes))
+
+    # 按分类编码整数对齐：每列先散布到完整代码表，再按目标行取出
+    data = {}
+    for column, column_codes in zip(columns, codes):
+        dense = np.full(len(dtype.categories), np.nan)
+        dense[column_codes] = column.to_numpy(dtype='float64', na_value=np.nan)
+        data[column.name] = dense[rows]
+
+    index = pd.CategoricalIndex(pd.Categorical.from_codes(rows, dtype=dtype), name='country_code')
+    return pd.DataFrame(data, index=index)
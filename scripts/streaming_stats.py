@@ -0,0 +1,295 @@
+"""
+单遍流式统计
+用途：按块扫描一次表格，同时累计所有列的计数、缺失数、均值、最小/最大值、近似分位数（t-digest）
+     以及指定列的前 N / 后 N 名（有界堆），代替对整表的多次 isnull / describe / nlargest / nsmallest 扫描
+
+累加器可以合并：各块（或各进程处理的块）分别累计后按行顺序 merge，结果与整表一次累计相同（均值只差浮点求和的舍入）。
+数值少于 QuantileDigest 的缓冲上限时分位数是精确的（与 pandas describe 的线性插值一致），
+超过后压缩为 t-digest 质心，误差集中在中间分位、两端保持精确。
+"""
+
+import heapq
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 65536
+
+# t-digest 压缩参数：压缩后约 DIGEST_DELTA / 2 个质心
+DIGEST_DELTA = 100
+
+# 未压缩的数值超过 DIGEST_DELTA × 该倍数时压缩
+BUFFER_FACTOR = 20
+
+# describe() 报告的分位数
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class QuantileDigest:
+    """
+    可合并的 t-digest（k1 尺度函数）
+
+    质心按均值排序，每个质心覆盖的累计比例在 k(q) = δ/2π · asin(2q - 1) 上不超过 1 个单位
+    （合并后再压缩也保持这一上限）。所有质心权重为 1（从未压缩）时按排序后的原始值线性插值。
+    """
+
+    def __init__(self, delta=DIGEST_DELTA):
+        self.delta = delta
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def count(self):
+        return int(self.weights.sum()) + self._buffered
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(values)
+        self._buffered += len(values)
+        if len(self.means) + self._buffered > self.delta * BUFFER_FACTOR:
+            self._compress()
+
+    def merge(self, other):
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._flush()
+        other._flush()
+        self.means = np.concatenate([self.means, other.means])
+        self.weights = np.concatenate([self.weights, other.weights])
+        # 两边的质心按相同的 k 刻度划分、均值几乎重合，不重新压缩的话插值会变成阶梯；
+        # 只有全部是原始数值（仍然精确）且未超过缓冲上限时才保留
+        self._sort()
+        if len(self.means) > self.delta * BUFFER_FACTOR or (self.weights > 1).any():
+            self._compress()
+        return self
+
+    def _sort(self):
+        order = np.argsort(self.means, kind='stable')
+        self.means, self.weights = self.means[order], self.weights[order]
+
+    def _flush(self):
+        if self._buffer:
+            self.means = np.concatenate([self.means, *self._buffer])
+            self.weights = np.concatenate([self.weights, np.ones(self._buffered)])
+            self._buffer, self._buffered = [], 0
+            self._sort()
+
+    def _k(self, q):
+        return self.delta / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k):
+        return (math.sin(2 * math.pi * k / self.delta) + 1) / 2
+
+    def _compress(self):
+        """
+        合并式 t-digest 压缩（质心已按均值排序）：从左到右装入质心，累计比例在 k 刻度上跨满 1 个单位时结束当前组
+        每组用 searchsorted 一次找到边界，循环次数约为压缩后的质心数，与数值个数无关
+        """
+        self._flush()
+        weights = self.weights
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        starts = []
+        i, n = 0, len(weights)
+        while i < n:
+            starts.append(i)
+            q_left = (cumulative[i] - weights[i]) / total
+            q_limit = self._q(min(self._k(q_left) + 1, self.delta / 4))
+            # 至少装入一个质心（单个质心权重超过上限时自成一组）
+            i = max(int(np.searchsorted(cumulative, q_limit * total, side='right')), i + 1)
+        starts = np.array(starts)
+        new_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(self.means * weights, starts) / new_weights
+        self.weights = new_weights
+
+    def quantile(self, q):
+        """q 分位数；没有数值时为 NaN"""
+        self._flush()
+        n = len(self.means)
+        if n == 0:
+            return math.nan
+        if (self.weights == 1).all():
+            # 精确：与 numpy / pandas 的 linear 插值相同
+            position = q * (n - 1)
+            lower = int(math.floor(position))
+            upper = min(lower + 1, n - 1)
+            return float(self.means[lower] + (self.means[upper] - self.means[lower]) * (position - lower))
+        cumulative = np.cumsum(self.weights)
+        centers = cumulative - self.weights / 2
+        total = cumulative[-1]
+        return float(np.interp(q * total, np.r_[0.0, centers, total], np.r_[self.min, self.means, self.max]))
+
+
+class RankHeap:
+    """
+    有界的前 N 名（largest=True）或后 N 名
+    同值按行号先后取舍，与 nlargest / nsmallest 的 keep='first' 一致
+    """
+
+    def __init__(self, n, largest=True):
+        self.n = n
+        self.largest = largest
+        self.items = []    # (值, ±行号, 标签)
+
+    def update(self, values, labels, positions):
+        """values / positions: 数组；labels: 与之对齐的 Series，只取候选行的标签"""
+        valid = np.flatnonzero(~np.isnan(values))
+        # 排序键：越大越靠前
+        keys = values[valid] if self.largest else -values[valid]
+        # 块内先用 partition 筛出候选（含与第 N 名同值的行），再与已有的 N 项合并
+        if len(valid) > self.n:
+            keep = keys >= np.partition(keys, len(keys) - self.n)[len(keys) - self.n]
+            valid, keys = valid[keep], keys[keep]
+        order = valid[np.lexsort((positions[valid], -keys))[:self.n]]
+        sign = -1 if self.largest else 1
+        candidates = zip(values[order].tolist(), (sign * positions[order]).tolist(), labels.iloc[order].tolist())
+        select = heapq.nlargest if self.largest else heapq.nsmallest
+        self.items = select(self.n, [*self.items, *candidates])
+
+    def merge(self, other, offset):
+        """other 的行排在本累加器之后，行号平移 offset"""
+        shift = -offset if self.largest else offset
+        shifted = [(value, position + shift, label) for value, position, label in other.items]
+        select = heapq.nlargest if self.largest else heapq.nsmallest
+        self.items = select(self.n, [*self.items, *shifted])
+        return self
+
+    def records(self):
+        """[(标签, 值)]，前 N 名按值降序、后 N 名按值升序"""
+        return [(label, value) for value, _, label in self.items]
+
+
+class StreamingStats:
+    """
+    整张表的单遍统计累加器
+
+    label: 排名中显示的标签列；rank_columns: 需要前 N / 后 N 名的数值列
+    每块只转换一次数值矩阵，计数、缺失、求和、最小/最大值都按列向量化累计
+    """
+
+    def __init__(self, columns, numeric_columns, label=None, rank_columns=(), top_n=10, delta=DIGEST_DELTA):
+        self.columns = list(columns)
+        self.numeric_columns = list(numeric_columns)
+        self.label = label
+        self.rows = 0
+        self.nulls = np.zeros(len(self.columns), dtype=np.int64)
+        self.sums = np.zeros(len(self.numeric_columns))
+        self.digests = {col: QuantileDigest(delta) for col in self.numeric_columns}
+        self.top = {col: RankHeap(top_n, largest=True) for col in rank_columns}
+        self.bottom = {col: RankHeap(top_n, largest=False) for col in rank_columns}
+
+    @classmethod
+    def for_frame(cls, df, label=None, rank_columns=(), top_n=10, delta=DIGEST_DELTA):
+        """按 df 的列和类型创建空累加器（数值列不含布尔列）"""
+        numeric = [col for col in df.columns
+                   if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+        rank_columns = [col for col in rank_columns if col in numeric]
+        label = label if label in df.columns else None
+        return cls(df.columns, numeric, label, rank_columns, top_n, delta)
+
+    def update(self, chunk):
+        """累计一块（列与创建时相同，行接在已累计的行之后）"""
+        self.nulls += chunk.isna().to_numpy().sum(axis=0)
+        values = chunk[self.numeric_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.sums += np.nansum(values, axis=0)
+        for j, col in enumerate(self.numeric_columns):
+            self.digests[col].add(values[:, j])
+
+        if self.top:
+            positions = np.arange(self.rows, self.rows + len(chunk))
+            labels = chunk[self.label] if self.label else pd.Series(positions)
+            for col in self.top:
+                column = values[:, self.numeric_columns.index(col)]
+                self.top[col].update(column, labels, positions)
+                self.bottom[col].update(column, labels, positions)
+        self.rows += len(chunk)
+        return self
+
+    def merge(self, other):
+        """合并另一个累加器（其行排在本累加器之后）"""
+        for col in self.top:
+            self.top[col].merge(other.top[col], self.rows)
+            self.bottom[col].merge(other.bottom[col], self.rows)
+        self.nulls += other.nulls
+        self.sums += other.sums
+        for col, digest in self.digests.items():
+            digest.merge(other.digests[col])
+        self.rows += other.rows
+        return self
+
+    @classmethod
+    def from_frame(cls, df, label=None, rank_columns=(), top_n=10, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+        """按块扫描 df；workers > 1 时各块在进程池中累计，再按块顺序合并"""
+        empty = cls.for_frame(df, label, rank_columns, top_n)
+        chunks = [df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size)]
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_accumulate_chunk, [empty] * len(chunks), chunks))
+            return _merge_all(empty, parts)
+        for chunk in chunks:
+            empty.update(chunk)
+        return empty
+
+    def column(self, col):
+        """一列的统计：count / nulls，数值列另有 mean / min / max / 25% / 50% / 75%"""
+        count = self.rows - int(self.nulls[self.columns.index(col)])
+        stats = {'count': count, 'nulls': self.rows - count}
+        if col in self.digests:
+            digest = self.digests[col]
+            has_values = digest.count > 0
+            stats['mean'] = float(self.sums[self.numeric_columns.index(col)]) / count if count else math.nan
+            stats['min'] = digest.min if has_values else math.nan
+            stats['max'] = digest.max if has_values else math.nan
+            for q in QUANTILES:
+                stats[f'{q:.0%}'] = digest.quantile(q)
+        return stats
+
+    def to_dict(self):
+        """可写成 JSON 的统计结果（NaN 为 None）"""
+        result = {
+            'rows': self.rows,
+            'columns': len(self.columns),
+            'missing': int(self.nulls.sum()),
+            'column_stats': {col: self.column(col) for col in self.columns},
+            'rankings': {
+                col: {
+                    'top': [{'label': label, 'value': value} for label, value in self.top[col].records()],
+                    'bottom': [{'label': label, 'value': value} for label, value in self.bottom[col].records()],
+                }
+                for col in self.top
+            },
+        }
+        return _json_safe(result)
+
+
+def _accumulate_chunk(empty, chunk):
+    return empty.update(chunk)
+
+
+def _merge_all(first, parts):
+    for part in parts:
+        first.merge(part)
+    return first
+
+
+def _json_safe(value):
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
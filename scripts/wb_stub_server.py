@@ -0,0 +1,153 @@
+"""
+世界银行 / REST Countries 本地替身服务
+用途：离线测试和压测 fetch_economy_data.py。国家列表来自本地 WDI 元数据，
+     GDP 和人均 GDP 使用仓库中的 WDI 文件，其余指标按国家代码生成固定的模拟值
+
+用法：
+    python scripts/wb_stub_server.py --port 8765 --latency 50 --fail-rate 0.05
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+from source_loader import COUNTRY_METADATA_FILE
+from wdi_loader import read_wdi_wide
+
+DATA_DIR = Path('./data')
+
+# 有本地 WDI 文件的指标
+WDI_FILES = {
+    'NY.GDP.PCAP.CD': DATA_DIR / 'dataset_exercise/gdp/API_NY.GDP.PCAP.CD_DS2_en_csv_v2_46.csv',
+    'NY.GDP.MKTP.CD': Path('API_NY.GDP.MKTP.CD_DS2_en_csv_v2_32.zip'),
+}
+
+
+def synthetic_value(code, indicator, year):
+    """没有本地数据的指标：由 (代码, 指标, 年份) 决定的固定模拟值"""
+    digest = hashlib.sha256(f'{code}|{indicator}|{year}'.encode()).digest()
+    return round(int.from_bytes(digest[:4], 'big') / 2 ** 32 * 100, 3)
+
+
+class StubData:
+    def __init__(self, data_dir=DATA_DIR):
+        meta = pd.read_csv(data_dir / COUNTRY_METADATA_FILE, encoding='utf-8-sig',
+                           usecols=['Country Code', 'Region', 'TableName'])
+        self.names = dict(zip(meta['Country Code'], meta['TableName']))
+        # 与 REST Countries 一样只包含国家，不包含汇总地区
+        self.countries = meta.loc[meta['Region'].notna(), ['Country Code', 'TableName']].to_numpy().tolist()
+
+        self.indicators = {}
+        for indicator, path in WDI_FILES.items():
+            if path.exists():
+                self.indicators[indicator] = read_wdi_wide(path, countries_only=False).set_index('Country Code')
+
+    def value(self, code, indicator, year):
+        wide = self.indicators.get(indicator)
+        if wide is None:
+            return synthetic_value(code, indicator, year) if code in self.names else None
+        if code not in wide.index or str(year) not in wide.columns:
+            return None
+        value = wide.at[code, str(year)]
+        return None if isinstance(value, float) and math.isnan(value) else float(value)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    data = None
+    latency = 0.0
+    fail_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self.send_json({'message': 'Service Unavailable'}, status=503)
+            return
+
+        url = urlparse(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if parts[:2] == ['v3.1', 'all']:
+            self.send_json([self.country_record(code, name) for code, name in self.data.countries])
+        elif parts[:2] == ['v3.1', 'name'] and len(parts) == 3:
+            needle = parts[2].casefold()
+            matches = [self.country_record(code, name) for code, name in self.data.countries
+                       if needle in name.casefold()]
+            if matches:
+                self.send_json(matches)
+            else:
+                self.send_json({'status': 404, 'message': 'Not Found'}, status=404)
+        elif len(parts) == 5 and parts[0] == 'v2' and parts[1] == 'country' and parts[3] == 'indicator':
+            self.send_json(self.indicator_page(parts[2].split(';'), parts[4], query))
+        else:
+            self.send_json({'message': 'Not Found'}, status=404)
+
+    @staticmethod
+    def country_record(code, name):
+        return {'name': {'common': name, 'official': name}, 'cca3': code, 'altSpellings': [code]}
+
+    def indicator_page(self, codes, indicator, query):
+        """与世界银行 v2 API 相同的分页结构：[分页信息, 数据行]"""
+        year = query.get('date', '2022')
+        per_page = int(query.get('per_page', 50))
+        page = int(query.get('page', 1))
+
+        rows = [
+            {
+                'indicator': {'id': indicator, 'value': indicator},
+                'country': {'id': code, 'value': self.data.names.get(code, code)},
+                'countryiso3code': code,
+                'date': year,
+                'value': self.data.value(code, indicator, year),
+            }
+            for code in codes if code in self.data.names
+        ]
+        pages = max(1, -(-len(rows) // per_page))
+        header = {'page': page, 'pages': pages, 'per_page': per_page, 'total': len(rows)}
+        return [header, rows[(page - 1) * per_page:page * per_page]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0, help='每个请求的模拟延迟（毫秒）')
+    parser.add_argument('--fail-rate', type=float, default=0, help='随机返回 503 的比例，用于测试重试')
+    args = parser.parse_args()
+
+    StubHandler.data = StubData()
+    StubHandler.latency = args.latency / 1000
+    StubHandler.fail_rate = args.fail_rate
+
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"✓ Stub server listening on http://{args.host}:{args.port} (v2 = World Bank, v3.1 = REST Countries)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
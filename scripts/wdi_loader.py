@@ -0,0 +1,178 @@
+"""
+世界银行 WDI 指标文件加载工具
+用途：直接读取 WDI 下载的宽表 CSV（或未解压的 zip），跳过文件头说明行，
+     把年份列转换为长表，并向量化地取出每个国家最近一年的非空值
+"""
+
+import io
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# WDI 文件在表头前有 4 行说明（数据来源、更新日期及空行）
+WDI_PREAMBLE_ROWS = 4
+
+WDI_ID_COLUMNS = ['Country Name', 'Country Code', 'Indicator Name', 'Indicator Code']
+
+
+def _find_member(names, prefix):
+    matches = [name for name in names if Path(name).name.startswith(prefix) and name.endswith('.csv')]
+    return matches[0] if matches else None
+
+
+def resolve_wdi_paths(indicators, data_dir):
+    """
+    {指标: 路径} → {指标: 存在的文件}：路径先相对 data_dir 查找，再按原样查找（如仓库根目录下的 zip）
+    找不到文件的指标打印提示后跳过
+    """
+    paths = {}
+    for output_name, path in indicators.items():
+        for candidate in (Path(data_dir) / path, Path(path)):
+            if candidate.exists():
+                paths[output_name] = candidate
+                break
+        else:
+            print(f"⚠ WDI file for {output_name} not found: {path}")
+    return paths
+
+
+@contextmanager
+def open_wdi_file(path, prefix='API_'):
+    """
+    打开 WDI 文件的文本流
+    path 为 zip 时不解压，直接读取包内以 prefix 开头的 CSV；不存在时返回 None
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.zip':
+        with zipfile.ZipFile(path) as archive:
+            member = _find_member(archive.namelist(), prefix)
+            if member is None:
+                yield None
+                return
+            with archive.open(member) as raw:
+                yield io.TextIOWrapper(raw, encoding='utf-8-sig')
+        return
+
+    if prefix != 'API_':
+        # 元数据文件与指标文件放在同一目录，文件名为 Metadata_Country_<指标文件名>
+        path = path.with_name(prefix + path.name)
+        if not path.exists():
+            yield None
+            return
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        yield f
+
+
+def read_country_regions(path):
+    """读取随指标文件下载的国家元数据，返回 代码 → 地区（汇总地区如 World 的地区为空）"""
+    with open_wdi_file(path, prefix='Metadata_Country_') as f:
+        if f is None:
+            return None
+        meta = pd.read_csv(f, usecols=['Country Code', 'Region'])
+    return meta.set_index('Country Code')['Region']
+
+
+def read_wdi_wide(path, countries_only=True):
+    """
+    读取 WDI 宽表：每行一个国家，每个年份一列（float64）
+    countries_only=True 时根据国家元数据去掉 World、Euro area 等汇总地区
+    """
+    with open_wdi_file(path) as f:
+        if f is None:
+            raise FileNotFoundError(f"No WDI indicator CSV found in {path}")
+        header = pd.read_csv(f, skiprows=WDI_PREAMBLE_ROWS, nrows=0).columns
+        f.seek(0)
+        year_columns = [col for col in header if col.strip().isdigit()]
+        df = pd.read_csv(
+            f,
+            skiprows=WDI_PREAMBLE_ROWS,
+            usecols=WDI_ID_COLUMNS + year_columns,
+            dtype={col: 'float64' for col in year_columns},
+        )
+
+    df = df.dropna(subset=['Country Code'])
+    if countries_only:
+        regions = read_country_regions(path)
+        if regions is not None:
+            df = df[df['Country Code'].map(regions).notna().to_numpy()]
+    return df.reset_index(drop=True)
+
+
+def year_columns(wide):
+    """宽表中的年份列"""
+    return [col for col in wide.columns if str(col).strip().isdigit()]
+
+
+def wdi_to_long(wide):
+    """
+    宽表 → 长表：country_code / country_name / indicator_code 为分类列，
+    year 为 int16，value 为 float64，只保留非空值
+    """
+    years = year_columns(wide)
+    long = wide.melt(
+        id_vars=['Country Code', 'Country Name', 'Indicator Code'],
+        value_vars=years,
+        var_name='year',
+        value_name='value',
+    ).dropna(subset=['value'])
+    long = long.rename(columns={
+        'Country Code': 'country_code',
+        'Country Name': 'country_name',
+        'Indicator Code': 'indicator_code',
+    })
+    return long.astype({
+        'country_code': 'category',
+        'country_name': 'category',
+        'indicator_code': 'category',
+        'year': 'int16',
+    }).reset_index(drop=True)
+
+
+def latest_values(wide, output_name='value'):
+    """
+    每个国家最近一年的非空值（向量化，不逐行循环）
+    返回以国家代码为索引的 DataFrame：country_name、output_name、{output_name}_year
+    没有任何数据的国家值和年份均为缺失
+    """
+    years = year_columns(wide)
+    values = wide[years].to_numpy(dtype='float64')
+    present = ~np.isnan(values)
+
+    # 反转年份后的第一个非空位置即最近一年
+    last = values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+    has_value = present.any(axis=1)
+    rows = np.arange(len(values))
+
+    latest = np.where(has_value, values[rows, last], np.nan)
+    year_array = np.array([int(year) for year in years], dtype='int64')
+    latest_year = pd.array(np.where(has_value, year_array[last], 0), dtype='Int16')
+    latest_year[~has_value] = pd.NA
+
+    return pd.DataFrame({
+        'country_name': wide['Country Name'].to_numpy(),
+        output_name: latest,
+        f'{output_name}_year': latest_year,
+    }, index=pd.Index(wide['Country Code'].to_numpy(), name='country_code'))
+
+
+def load_wdi_latest(indicators, countries_only=True):
+    """
+    读取多个 WDI 指标文件并取各自最近一年的值，按国家代码外连接
+    indicators: {输出列名: 文件路径}
+    """
+    frames = []
+    for output_name, path in indicators.items():
+        latest = latest_values(read_wdi_wide(path, countries_only), output_name)
+        frames.append(latest)
+
+    if not frames:
+        return None
+
+    merged = frames[0]
+    for frame in frames[1:]:
+        merged = merged.combine_first(frame)
+    columns = ['country_name'] + [col for frame in frames for col in frame.columns if col != 'country_name']
+    return merged[columns]
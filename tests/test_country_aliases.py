@@ -0,0 +1,69 @@
+"""
+scripts/country_aliases.py 的测试：拼写相近的不同国家不会被模糊匹配混在一起，常见拼写错误仍能解析
+运行：python -m pytest tests/test_country_aliases.py
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+from country_aliases import AliasIndex, load_alias_index  # noqa: E402
+
+DATA_DIR = ROOT / 'data' / 'dataset_exercise'
+
+# 拼写相近、但属于不同国家的名称
+NEAR_MISSES = {
+    'Niger': 'NER',
+    'Nigeria': 'NGA',
+    'Austria': 'AUT',
+    'Australia': 'AUS',
+    'Guinea': 'GIN',
+    'Guinea-Bissau': 'GNB',
+    'Equatorial Guinea': 'GNQ',
+    'Papua New Guinea': 'PNG',
+}
+
+
+@pytest.fixture(scope='module')
+def index():
+    """与 V1 清洗相同的索引：WDI 国家元数据 + country_name.csv"""
+    return load_alias_index(
+        standard_file=DATA_DIR / 'country_name.csv',
+        metadata_files=[DATA_DIR / 'gdp' / 'Metadata_Country_API_NY.GDP.PCAP.CD_DS2_en_csv_v2_46.csv'],
+    )
+
+
+@pytest.mark.parametrize('name, code', NEAR_MISSES.items())
+def test_near_misses_resolve_to_their_own_code(index, name, code):
+    assert index.lookup(name) == code
+
+
+@pytest.mark.parametrize('missing', NEAR_MISSES.values())
+def test_missing_country_does_not_borrow_its_neighbour(missing):
+    # 索引里缺了某个国家时，它的名称应解析失败，而不是模糊匹配到拼写相近的另一个国家
+    index = AliasIndex.build([pd.Series({code: name for name, code in NEAR_MISSES.items() if code != missing})],
+                             aliases={})
+    for name, code in NEAR_MISSES.items():
+        assert index.lookup(name) == (None if code == missing else code), name
+
+
+@pytest.mark.parametrize('name, code', [
+    ('Phillipines', 'PHL'),
+    ('Kazakstan', 'KAZ'),
+    ('Guinea Bissau', 'GNB'),
+    ('  nigeria ', 'NGA'),
+])
+def test_misspellings_resolve(index, name, code):
+    assert index.lookup(name) == code
+
+
+def test_canonical_names_keep_unresolved_values(index):
+    names = index.canonical_names(pd.Series(['Phillipines', 'Niger', 'Atlantis', None], index=[3, 1, 2, 0]))
+    assert names.index.tolist() == [3, 1, 2, 0]
+    assert names.tolist()[:3] == ['Philippines', 'Niger', 'Atlantis']
+    assert pd.isna(names.iloc[3])
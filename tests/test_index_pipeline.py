@@ -0,0 +1,97 @@
+"""
+scripts/index_pipeline.py 的测试：并行节点的输出按拓扑顺序整段打印、缺少数据源时的报错、
+run_pipeline / save_to_json 返回与写出的 JSON 相同的记录列表
+运行：python -m pytest tests/test_index_pipeline.py
+"""
+
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+import data_cleaning_v3  # noqa: E402
+from data_cleaning_v3 import DataCleanerV3  # noqa: E402
+from pipeline_engine import Pipeline  # noqa: E402
+from source_loader import COUNTRY_METADATA_FILE  # noqa: E402
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """V3 数据源的临时副本（DATA_DIR 是相对路径）"""
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for path in (ROOT / 'data').glob('*.csv'):
+        shutil.copy(path, data_dir)
+    (data_dir / COUNTRY_METADATA_FILE).parent.mkdir(parents=True)
+    shutil.copy(ROOT / 'data' / COUNTRY_METADATA_FILE, data_dir / COUNTRY_METADATA_FILE)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_node_output_is_printed_in_topological_order(capsys):
+    def node(name, delay):
+        def func(*_):
+            # 先完成的节点排在后面，输出仍按声明顺序
+            print(f'{name} start')
+            time.sleep(delay)
+            print(f'{name} done')
+            return name
+        return func
+
+    pipeline = Pipeline('test', max_workers=4)
+    for i in range(4):
+        pipeline.add(f'node:{i}', node(f'node:{i}', 0.04 - 0.01 * i))
+    pipeline.add('total', node('total', 0), pipeline.select('node:'))
+    pipeline.run(['total'])
+
+    names = ['node:0', 'node:1', 'node:2', 'node:3', 'total']
+    expected = [f'{name} {event}' for name in names for event in ('start', 'done')]
+    assert capsys.readouterr().out.splitlines() == expected
+    # 运行结束后恢复原来的 stdout
+    print('after')
+    assert capsys.readouterr().out == 'after\n'
+
+
+def test_failed_node_output_is_still_printed(capsys):
+    def fail():
+        print('failing')
+        raise RuntimeError('boom')
+
+    pipeline = Pipeline('test', max_workers=2)
+    pipeline.add('ok', lambda: print('ok') or 1)
+    pipeline.add('fail', fail)
+    with pytest.raises(RuntimeError):
+        pipeline.run()
+    assert sorted(capsys.readouterr().out.splitlines()) == ['failing', 'ok']
+
+
+def test_missing_sources_are_reported(workdir, capsys):
+    (workdir / 'data' / '4-safety-index.csv').unlink()
+    cleaner = DataCleanerV3(use_cache=False)
+    assert 'safety_index' not in [output_name for _, _, output_name in cleaner.sources]
+    assert '4-safety-index.csv not found' in capsys.readouterr().out
+
+    for path in (workdir / 'data').glob('*.csv'):
+        path.unlink()
+    with pytest.raises(FileNotFoundError, match='2-cost-of-living.csv'):
+        DataCleanerV3(use_cache=False)
+
+
+def test_run_pipeline_returns_exported_records(workdir):
+    records = DataCleanerV3(use_cache=False).run_pipeline('countries.json')
+    assert isinstance(records, list) and isinstance(records[0], dict)
+    assert records == json.loads((workdir / 'countries.json').read_text(encoding='utf-8'))
+    assert list(records[0]) == ['country_name', 'country_code', *data_cleaning_v3.CONFIG.export_columns]
+
+
+@pytest.mark.parametrize('impute', [None, 5])
+def test_compact_output_is_byte_identical(workdir, impute):
+    DataCleanerV3(use_cache=False, impute=impute).save_to_json('standard.json', columnar=False)
+    DataCleanerV3(use_cache=False, impute=impute, compact=True).save_to_json('compact.json', columnar=False)
+    assert (workdir / 'compact.json').read_bytes() == (workdir / 'standard.json').read_bytes()
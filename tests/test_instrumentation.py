@@ -0,0 +1,62 @@
+"""
+scripts/instrumentation.py 的测试：并行运行时不按阶段记录进程级的 CPU 时间和内存，
+启用性能分析时管道节点逐个在同一线程中运行
+运行：python -m pytest tests/test_instrumentation.py
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from instrumentation import RunRecorder  # noqa: E402
+from pipeline_engine import Pipeline  # noqa: E402
+
+
+def _pipeline(threads):
+    """四个互不依赖的节点加一个汇总节点，记录各节点运行的线程"""
+    def node(i):
+        def func():
+            threads.append(threading.get_ident())
+            time.sleep(0.01)
+            return [bytearray(1 << 20) for _ in range(i)]
+        return func
+
+    pipeline = Pipeline('test', max_workers=4)
+    for i in range(4):
+        pipeline.add(f'node:{i}', node(i))
+    pipeline.add('total', lambda *parts: sum(map(len, parts)), pipeline.select('node:'))
+    return pipeline
+
+
+def test_concurrent_stages_record_wall_time_and_global_peak(tmp_path):
+    recorder = RunRecorder('test', tmp_path / 'run.json', trace_memory=True)
+    assert _pipeline([]).run(['total'], recorder) == {'total': 6}
+    report = json.loads(recorder.finish().read_text(encoding='utf-8'))
+
+    assert report['concurrent_stages'] is True
+    assert report['peak_memory_mb'] >= 1
+    assert {stage['stage'] for stage in report['stages']} == {'node:0', 'node:1', 'node:2', 'node:3', 'total'}
+    for stage in report['stages']:
+        assert stage['wall_seconds'] >= 0
+        assert 'cpu_seconds' not in stage and 'peak_memory_mb' not in stage
+
+
+def test_profiling_runs_stages_one_at_a_time(tmp_path):
+    threads = []
+    recorder = RunRecorder('test', tmp_path / 'run.json', profile='cprofile', trace_memory=True)
+    pipeline = _pipeline(threads)
+    assert pipeline.workers(recorder) == 1
+    pipeline.run(['total'], recorder)
+    report = json.loads(recorder.finish().read_text(encoding='utf-8'))
+
+    assert len(set(threads)) == 1
+    assert report['concurrent_stages'] is False
+    for stage in report['stages']:
+        assert Path(stage['profile']).exists()
+        assert 'cpu_seconds' in stage and 'peak_memory_mb' in stage
+    peaks = {stage['stage']: stage['peak_memory_mb'] for stage in report['stages']}
+    assert peaks['node:3'] >= 3 and peaks['node:0'] < 1
@@ -0,0 +1,159 @@
+"""
+scripts/level_binning.py 的测试：各阈值表与原来逐行 .apply() 的 if/elif 分类函数结果相同
+运行：python -m pytest tests/test_level_binning.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import data_cleaning  # noqa: E402
+import data_cleaning_v2  # noqa: E402
+import data_cleaning_v3  # noqa: E402
+
+
+# 原来的分类函数（逐字保留判断顺序和边界）
+
+def quality_level(score):
+    if score >= 200:
+        return 10
+    elif score >= 180:
+        return 9
+    elif score >= 160:
+        return 8
+    elif score >= 140:
+        return 7
+    elif score >= 120:
+        return 6
+    elif score >= 100:
+        return 5
+    elif score >= 80:
+        return 4
+    elif score >= 60:
+        return 3
+    elif score >= 40:
+        return 2
+    else:
+        return 1
+
+
+def cost_level(index):
+    if index >= 100:
+        return 10
+    elif index >= 80:
+        return 9
+    elif index >= 60:
+        return 8
+    elif index >= 50:
+        return 7
+    elif index >= 40:
+        return 6
+    elif index >= 30:
+        return 5
+    elif index >= 25:
+        return 4
+    elif index >= 20:
+        return 3
+    elif index >= 15:
+        return 2
+    else:
+        return 1
+
+
+def income_group_score(gdp_per_capita):
+    if pd.isna(gdp_per_capita):
+        return None
+    if gdp_per_capita >= 50000:
+        return 10
+    elif gdp_per_capita >= 30000:
+        return 8
+    elif gdp_per_capita >= 15000:
+        return 6
+    elif gdp_per_capita >= 5000:
+        return 4
+    else:
+        return 2
+
+
+def three_levels(high, medium, labels=('high', 'medium', 'low')):
+    def level(score):
+        if pd.isna(score):
+            return None
+        if score >= high:
+            return labels[0]
+        elif score >= medium:
+            return labels[1]
+        else:
+            return labels[2]
+    return level
+
+
+def v3_cost_level(score):
+    if pd.isna(score):
+        return None
+    inverted_score = 11 - score
+    if inverted_score >= 7:
+        return 'low'
+    elif inverted_score >= 4:
+        return 'medium'
+    else:
+        return 'high'
+
+
+def _inputs(bins, low, high):
+    """每个阈值本身及其两侧最近的浮点数、区间内的随机值、NaN 和 ±inf"""
+    edges = bins.edges if bins.invert_from is None else bins.invert_from - bins.edges
+    around = np.concatenate([edges, np.nextafter(edges, -np.inf), np.nextafter(edges, np.inf)])
+    uniform = np.random.default_rng(0).uniform(low, high, 2000)
+    return np.concatenate([around, uniform, uniform.round(1), [np.nan, -np.inf, np.inf, low, high]])
+
+
+CASES = [
+    (data_cleaning.QUALITY_LEVELS, quality_level, 0, 250),
+    (data_cleaning.COST_LEVELS, cost_level, 0, 150),
+    (data_cleaning.INCOME_GROUP_SCORES, income_group_score, 0, 120_000),
+    (data_cleaning_v2.LEVEL_BINS, three_levels(8, 5), 1, 10),
+    (data_cleaning_v2.CLIMATE_BINS, three_levels(7, 4, ('tropical', 'temperate', 'cold')), 1, 10),
+    (data_cleaning_v3.LEVEL_BINS, three_levels(7, 4), 1, 10),
+    (data_cleaning_v3.COST_LEVEL_BINS, v3_cost_level, 1, 10),
+    (data_cleaning_v3.CLIMATE_PREFERENCE_BINS, three_levels(8, 5, ('tropical', 'temperate', 'cold')), 1, 10),
+]
+
+
+@pytest.mark.parametrize('bins, classify, low, high', CASES)
+def test_matches_if_elif_chain(bins, classify, low, high):
+    values = _inputs(bins, low, high)
+    levels = bins.cut(pd.Series(values)).astype(object)
+    for value, level in zip(values, levels):
+        if np.isnan(value):
+            assert pd.isna(level)
+        else:
+            assert level == classify(value), value
+
+
+def test_numeric_levels_are_nullable_int8():
+    levels = data_cleaning.QUALITY_LEVELS.cut(pd.Series([39.9, 40.0, np.nan, 200.0], index=[5, 6, 7, 8]))
+    assert levels.dtype == 'Int8'
+    assert levels.index.tolist() == [5, 6, 7, 8]
+    assert levels.tolist() == [1, 2, pd.NA, 10]
+
+
+def test_text_levels_are_categorical_and_keep_missing():
+    levels = data_cleaning_v3.COST_LEVEL_BINS.cut(pd.Series([1.0, 4.0, 4.0000001, 10.0, np.nan]))
+    assert isinstance(levels.dtype, pd.CategoricalDtype)
+    # 11 - 4 = 7 恰好落在 'low' 的边界上
+    assert levels.astype(object).tolist()[:4] == ['low', 'low', 'medium', 'high']
+    assert pd.isna(levels.iloc[4])
+
+
+def test_codes_round_trip():
+    bins = data_cleaning_v3.LEVEL_BINS
+    values = pd.Series([1.0, 3.99, 4.0, 7.0, np.nan])
+    codes = bins.codes(values)
+    assert codes.tolist() == [0, 0, 1, 2, -1]
+    assert bins.from_codes(codes).astype(object).tolist()[:4] == bins.cut(values).astype(object).tolist()[:4]
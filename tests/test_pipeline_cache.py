@@ -0,0 +1,97 @@
+"""
+scripts/pipeline_cache.py 的测试：在 V3 管道上检查增量构建
+修改一个数据源只重算依赖它的节点；输入和输出都未变化时整次运行直接命中运行缓存
+运行：python -m pytest tests/test_pipeline_cache.py
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+from data_cleaning_v3 import DataCleanerV3  # noqa: E402
+from pipeline_cache import PipelineCache  # noqa: E402
+from source_loader import COUNTRY_METADATA_FILE  # noqa: E402
+
+OUTPUT_FILE = 'countries.json'
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """复制 V3 的数据源到临时目录并切换过去（DATA_DIR 和缓存目录都是相对路径）"""
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for path in (ROOT / 'data').glob('*.csv'):
+        shutil.copy(path, data_dir)
+    (data_dir / COUNTRY_METADATA_FILE).parent.mkdir(parents=True)
+    shutil.copy(ROOT / 'data' / COUNTRY_METADATA_FILE, data_dir / COUNTRY_METADATA_FILE)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """记录写入缓存的条目名称，即本次实际计算（未命中缓存）的节点"""
+    names = []
+    put = PipelineCache.put
+
+    def recording_put(self, name, key, value):
+        names.append(name)
+        return put(self, name, key, value)
+
+    monkeypatch.setattr(PipelineCache, 'put', recording_put)
+    return names
+
+
+def _run():
+    return DataCleanerV3().run_pipeline(OUTPUT_FILE)
+
+
+def _edit_score(path):
+    """改动一个国家的分数（行数和国家不变）"""
+    lines = path.read_text(encoding='utf-8').splitlines(keepends=True)
+    code, name, score = lines[1].rstrip('\n').rsplit(',', 2)
+    lines[1] = f'{code},{name},{float(score) + 1:.2f}\n'
+    path.write_text(''.join(lines), encoding='utf-8')
+
+
+def test_unchanged_rerun_hits_run_cache(workdir, computed, capsys):
+    first = _run()
+    assert 'v3-run' in computed
+    assert 'v3-normalized-safety_index' in computed
+
+    computed.clear()
+    output = (workdir / OUTPUT_FILE).read_bytes()
+    second = _run()
+    assert computed == []
+    assert '沿用已有的' in capsys.readouterr().out
+    assert (workdir / OUTPUT_FILE).read_bytes() == output
+    assert second == first
+
+
+def test_edited_output_file_is_rebuilt(workdir, computed):
+    _run()
+    (workdir / OUTPUT_FILE).write_text('[]', encoding='utf-8')
+    computed.clear()
+    _run()
+    # 节点结果仍来自缓存，只重新导出
+    assert computed == ['v3-run']
+    assert (workdir / OUTPUT_FILE).read_text(encoding='utf-8') != '[]'
+
+
+def test_changed_source_invalidates_only_its_dependents(workdir, computed):
+    _run()
+    computed.clear()
+    _edit_score(workdir / 'data' / '4-safety-index.csv')
+    _run()
+    assert sorted(computed) == sorted([
+        'v3-source-safety_index',
+        'v3-frame',
+        'v3-normalized-safety_index',
+        'v3-level-safety_level',
+        'v3-run',
+    ])
@@ -0,0 +1,91 @@
+"""
+scripts/recommend_server.py 的测试：请求体的长度校验（超限 413、不支持分块传输 501、非法长度 400）
+以及带请求体的请求之后同一连接仍可继续使用
+运行：python -m pytest tests/test_recommend_server.py
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+from recommend_server import MAX_BODY_BYTES, RecommendData, RecommendService, start_server  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def service():
+    return RecommendService(RecommendData(ROOT / 'countries.json'))
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if line)
+    body = await reader.readexactly(int(headers['content-length']))
+    return int(lines[0].split(' ')[1]), headers, body
+
+
+def _exchange(service, requests):
+    """发送原始请求字节，依次读取响应，直到读完 len(requests) 个响应或服务端关闭连接"""
+    async def run():
+        server = await start_server(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        try:
+            for request in requests:
+                writer.write(request)
+                await writer.drain()
+                responses.append(await _read_response(reader))
+                if responses[-1][1]['connection'] == 'close':
+                    assert await reader.read() == b''
+                    break
+        finally:
+            writer.close()
+            await writer.wait_closed()
+            server.close()
+            await server.wait_closed()
+        return responses
+    return asyncio.run(run())
+
+
+def _get(path, *headers, body=b''):
+    lines = [f'GET {path} HTTP/1.1', 'Host: localhost', *headers]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+def test_body_is_discarded_and_connection_reused(service):
+    responses = _exchange(service, [
+        _get('/country/JPN', 'Content-Length: 5', body=b'hello'),
+        _get('/country/DEU'),
+    ])
+    assert [status for status, _, _ in responses] == [200, 200]
+    assert json.loads(responses[1][2])['country']['country_code'] == 'DEU'
+
+
+def test_body_at_limit_is_accepted(service):
+    [(status, _, _)] = _exchange(service, [
+        _get('/country/JPN', f'Content-Length: {MAX_BODY_BYTES}', body=b'x' * MAX_BODY_BYTES)])
+    assert status == 200
+
+
+@pytest.mark.parametrize('header, expected', [
+    (f'Content-Length: {MAX_BODY_BYTES + 1}', 413),
+    ('Content-Length: 10000000000', 413),
+    ('Transfer-Encoding: chunked', 501),
+    ('Content-Length: -1', 400),
+    ('Content-Length: abc', 400),
+])
+def test_bad_bodies_are_rejected_and_connection_closed(service, header, expected):
+    # 被拒绝后服务端不读取请求体，直接回应并关闭连接
+    responses = _exchange(service, [_get('/country/JPN', header), _get('/country/DEU')])
+    assert len(responses) == 1
+    status, headers, body = responses[0]
+    assert status == expected
+    assert headers['connection'] == 'close'
+    assert 'error' in json.loads(body)
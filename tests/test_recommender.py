@@ -0,0 +1,102 @@
+"""
+scripts/recommender.py 的测试：BatchRecommender 的分数和排序与 js/services/recommender.js 完全相同
+对所有 729 种完整问卷答案（以及部分未作答的组合）在 countries.json 上运行 JS 的 recommendCountries，逐项比较
+需要 node；运行：python -m pytest tests/test_recommender.py
+"""
+
+import itertools
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+from recommender import DIMENSIONS, QUIZ_OPTIONS, BatchRecommender  # noqa: E402
+
+COUNTRIES_FILE = ROOT / 'countries.json'
+
+# 读取问卷答案列表，对每份答案输出 recommendCountries 结果的 [(国家下标, 分数)]
+NODE_SCRIPT = """
+import { readFileSync } from 'node:fs';
+import { pathToFileURL } from 'node:url';
+const [recommenderPath, countriesPath, answersPath] = process.argv.slice(1);
+const { default: Recommender } = await import(pathToFileURL(recommenderPath).href);
+const countries = JSON.parse(readFileSync(countriesPath, 'utf8')).map((c, i) => ({ ...c, _index: i }));
+const recommender = new Recommender(countries);
+const results = JSON.parse(readFileSync(answersPath, 'utf8')).map(
+    (answers) => recommender.recommendCountries(answers).map((c) => [c._index, c.score]));
+process.stdout.write(JSON.stringify(results));
+"""
+
+
+def answer_sets():
+    """729 种完整答案，加上第一个选项组合下每种"部分题目未作答"的情况"""
+    questions = [question for _, question, _, _ in DIMENSIONS]
+    complete = [dict(zip(questions, values))
+                for values in itertools.product(*(QUIZ_OPTIONS[q] for q in questions))]
+    partial = [{q: QUIZ_OPTIONS[q][0] for q, keep in zip(questions, mask) if keep}
+               for mask in itertools.product([True, False], repeat=len(questions))]
+    return complete + partial[1:]
+
+
+@pytest.fixture(scope='module')
+def js_results(tmp_path_factory):
+    if shutil.which('node') is None:
+        pytest.skip("node is not installed")
+    answers_file = tmp_path_factory.mktemp('recommender') / 'answers.json'
+    answers_file.write_text(json.dumps(answer_sets()), encoding='utf-8')
+    output = subprocess.run(
+        ['node', '--input-type=module', '-e', NODE_SCRIPT, '--',
+         str(ROOT / 'js' / 'services' / 'recommender.js'), str(COUNTRIES_FILE), str(answers_file)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+@pytest.fixture(scope='module')
+def recommender():
+    return BatchRecommender.from_json(COUNTRIES_FILE)
+
+
+def test_answer_sets_cover_all_complete_answers():
+    assert len(answer_sets()) == 729 + 63
+
+
+def test_scores_and_order_match_js(recommender, js_results):
+    answers_batch = answer_sets()
+    scores = recommender.score_batch(recommender.encode_answers(answers_batch))
+    assert len(js_results) == len(answers_batch)
+    for answers, row, expected in zip(answers_batch, scores, js_results):
+        ids = recommender.rank(row)
+        assert [int(i) for i in ids] == [index for index, _ in expected], answers
+        # 浮点累加顺序与 calculateScore 相同，分数逐位相等
+        assert row[ids].tolist() == [score for _, score in expected], answers
+
+
+def test_score_range(recommender):
+    # 各维度匹配分为 0-10，calculateScore 加权平均后再乘 10（JS 注释写的是 0-10，实际为 0-100）
+    scores = recommender.score_batch(recommender.encode_answers(answer_sets()))
+    assert scores.min() == 0
+    assert 10 < scores.max() <= 100 + 1e-9
+
+
+def test_top_k_equals_prefix_of_full_ranking(recommender, js_results):
+    answers_batch = answer_sets()
+    scores = recommender.score_batch(recommender.encode_answers(answers_batch))
+    for row, expected in zip(scores[::37], js_results[::37]):
+        for k in (1, 5, 10, 50):
+            assert recommender.rank(row, k).tolist() == [index for index, _ in expected[:k]]
+
+
+def test_recommend_matches_js(recommender, js_results):
+    answers = answer_sets()[0]
+    results = recommender.recommend(answers)
+    assert [(r['rank'], r['score']) for r in results] == \
+        [(rank, score) for rank, (_, score) in enumerate(js_results[0], start=1)]
+    assert np.all(np.diff([r['score'] for r in results]) <= 0)
@@ -0,0 +1,77 @@
+"""
+scripts/streaming_stats.py 的测试：分块 / 跨进程合并的结果与单遍累计一致
+运行：python -m pytest tests/test_streaming_stats.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from streaming_stats import QuantileDigest, StreamingStats  # noqa: E402
+
+# 合并后的分位数与单遍累计、与精确值之间允许的秩误差（按比例）
+RANK_TOLERANCE = 0.002
+
+PROBABILITIES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+def _rank(sorted_values, value):
+    return np.searchsorted(sorted_values, value) / len(sorted_values)
+
+
+@pytest.mark.parametrize('distribution', ['normal', 'lognormal', 'uniform'])
+@pytest.mark.parametrize('parts', [4, 16])
+def test_merged_quantiles_match_single_pass(distribution, parts):
+    values = getattr(np.random.default_rng(0), distribution)(size=400_000)
+    sorted_values = np.sort(values)
+
+    single = QuantileDigest()
+    for chunk in np.array_split(values, 8):
+        single.add(chunk)
+
+    merged = QuantileDigest()
+    for part in np.array_split(values, parts):
+        digest = QuantileDigest()
+        digest.add(part)
+        merged.merge(digest)
+
+    for q in PROBABILITIES:
+        assert abs(_rank(sorted_values, merged.quantile(q)) - _rank(sorted_values, single.quantile(q))) \
+            <= RANK_TOLERANCE
+        assert abs(_rank(sorted_values, merged.quantile(q)) - q) <= RANK_TOLERANCE
+
+
+def test_small_inputs_are_exact():
+    values = np.random.default_rng(1).normal(size=500)
+    merged = QuantileDigest()
+    for part in np.array_split(values, 5):
+        digest = QuantileDigest()
+        digest.add(part)
+        merged.merge(digest)
+    for q in PROBABILITIES:
+        assert merged.quantile(q) == pytest.approx(np.quantile(values, q), rel=0, abs=1e-12)
+
+
+def test_workers_match_single_pass():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        'country_name': [f'c{i}' for i in range(200_000)],
+        'score': rng.normal(size=200_000).round(2),
+    })
+    df.loc[::7, 'score'] = np.nan
+    single = StreamingStats.from_frame(df, 'country_name', ['score'], chunk_size=30_000)
+    merged = StreamingStats.from_frame(df, 'country_name', ['score'], chunk_size=30_000, workers=4)
+
+    assert merged.to_dict()['rankings'] == single.to_dict()['rankings']
+    assert single.top['score'].records() == list(df.nlargest(10, 'score').itertuples(index=False, name=None))
+    assert single.bottom['score'].records() == list(df.nsmallest(10, 'score').itertuples(index=False, name=None))
+
+    sorted_values = np.sort(df['score'].dropna().to_numpy())
+    for key, q in (('25%', 0.25), ('50%', 0.5), ('75%', 0.75)):
+        assert abs(_rank(sorted_values, merged.column('score')[key]) - q) <= RANK_TOLERANCE
+    assert merged.column('score')['count'] == df['score'].count()
@@ -0,0 +1,30 @@
+"""
+scripts/wdi_loader.py 的测试：WDI 指标文件路径的解析（data_dir 下的文件和仓库根目录下的 zip 都能找到）
+运行：python -m pytest tests/test_wdi_loader.py
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+from data_cleaning import WDI_INDICATORS  # noqa: E402
+from wdi_loader import resolve_wdi_paths  # noqa: E402
+
+
+def test_indicators_found_in_data_dir_and_as_given(monkeypatch, capsys):
+    monkeypatch.chdir(ROOT)
+    paths = resolve_wdi_paths(WDI_INDICATORS, Path('data/dataset_exercise'))
+    assert list(paths) == list(WDI_INDICATORS)
+    assert paths['gdp_per_capita'] == Path('data/dataset_exercise') / WDI_INDICATORS['gdp_per_capita']
+    # gdp 的 zip 在仓库根目录，不在 data_dir 下
+    assert paths['gdp'] == Path(WDI_INDICATORS['gdp'])
+    assert capsys.readouterr().out == ''
+
+
+def test_missing_indicators_are_skipped_with_warning(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    paths = resolve_wdi_paths({'gdp': 'missing.zip'}, tmp_path)
+    assert paths == {}
+    assert '⚠ WDI file for gdp not found: missing.zip' in capsys.readouterr().out